@@ -33,6 +33,11 @@ def get_database_uri():
     return app_config.settings.DEFAULT_SQLALCHEMY_DATABASE_URI
 
 
+def include_name(name, type_, parent_names):
+    # Partitions of note are managed by src.notes.partitions
+    return not (type_ == "table" and name.startswith(("note_p", "note_default")))
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -53,6 +58,7 @@ def run_migrations_offline():
         dialect_opts={"paramstyle": "named"},
         compare_type=True,
         compare_server_default=True,
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -61,7 +67,10 @@ def run_migrations_offline():
 
 def do_run_migrations(connection):
     context.configure(
-        connection=connection, target_metadata=target_metadata, compare_type=True
+        connection=connection,
+        target_metadata=target_metadata,
+        compare_type=True,
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -0,0 +1,179 @@
+"""partition_note
+
+Revision ID: be093634f7a2
+Revises: fbcde1ee0d89
+Create Date: 2026-10-18 13:50:37.028347
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "be093634f7a2"
+down_revision: Union[str, None] = "fbcde1ee0d89"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Monthly partitions created ahead of the current month, as NOTE_PARTITIONS_AHEAD
+PARTITIONS_AHEAD = 3
+
+NOTE_COLUMNS = "id, board_id, text, views_count, created_at, updated_at"
+
+
+def note_columns(created_at_nullable: bool) -> list[sa.Column]:
+    return [
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('note_id_seq')"),
+            nullable=False,
+        ),
+        sa.Column("board_id", sa.Integer(), nullable=True),
+        sa.Column("text", sa.String(length=250), nullable=False),
+        sa.Column("views_count", sa.Integer(), nullable=False),
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('simple', text)", persisted=True),
+            nullable=False,
+        ),
+        sa.Column("created_at", sa.DateTime(), nullable=created_at_nullable),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    ]
+
+
+def detach_note_table(name: str) -> None:
+    """Renames note out of the way with names of its constraints and indexes."""
+
+    for operation in ["insert", "update", "delete"]:
+        op.execute(f"DROP TRIGGER count_board_notes_on_{operation} ON note")
+    op.drop_index("ix_note_search_vector", table_name="note")
+    op.drop_index("ix_note_updated_at_id", table_name="note")
+    op.drop_index("ix_note_board_id_id", table_name="note")
+    op.rename_table("note", name)
+    op.execute(f"ALTER TABLE {name} RENAME CONSTRAINT note_pkey TO {name}_pkey")
+    op.execute(
+        f"ALTER TABLE {name} RENAME CONSTRAINT note_board_id_fkey"
+        f" TO {name}_board_id_fkey"
+    )
+
+
+def attach_note_table(old_name: str) -> None:
+    """Completes note once its rows are copied and drops the old table."""
+
+    op.execute("ALTER SEQUENCE note_id_seq OWNED BY note.id")
+    op.drop_table(old_name)
+    # Constraint and indexes are added after the copy, which is faster than
+    # maintaining them row by row
+    op.create_foreign_key(
+        "note_board_id_fkey", "note", "board", ["board_id"], ["id"], ondelete="CASCADE"
+    )
+    op.create_index("ix_note_board_id_id", "note", ["board_id", "id"])
+    op.create_index("ix_note_updated_at_id", "note", ["updated_at", "id"])
+    op.create_index(
+        "ix_note_search_vector", "note", ["search_vector"], postgresql_using="gin"
+    )
+    for operation, transition_tables in [
+        ("INSERT", "NEW TABLE AS new_notes"),
+        ("UPDATE", "OLD TABLE AS old_notes NEW TABLE AS new_notes"),
+        ("DELETE", "OLD TABLE AS old_notes"),
+    ]:
+        op.execute(
+            f"""
+            CREATE TRIGGER count_board_notes_on_{operation.lower()}
+            AFTER {operation} ON note
+            REFERENCING {transition_tables}
+            FOR EACH STATEMENT EXECUTE FUNCTION count_board_notes()
+            """
+        )
+
+
+def upgrade() -> None:
+    detach_note_table("note_unpartitioned")
+    op.create_table(
+        "note",
+        *note_columns(created_at_nullable=False),
+        sa.PrimaryKeyConstraint("id", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    # A partition per month from the one of the oldest note on, so that
+    # note_default stays empty and does not block creating partitions later
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            month timestamp;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc(
+                        'month',
+                        (SELECT coalesce(min(created_at), now())
+                         FROM note_unpartitioned)
+                    ),
+                    date_trunc('month', now()) + interval '{PARTITIONS_AHEAD} months',
+                    interval '1 month'
+                )
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF note FOR VALUES FROM (%L) TO (%L)',
+                    'note_p' || to_char(month, 'YYYYMM'),
+                    month,
+                    month + interval '1 month'
+                );
+            END LOOP;
+        END
+        $$
+        """
+    )
+    op.execute("CREATE TABLE note_default PARTITION OF note DEFAULT")
+    # The partition key cannot be null
+    op.execute(
+        f"""
+        INSERT INTO note ({NOTE_COLUMNS})
+        SELECT id, board_id, text, views_count,
+            coalesce(created_at, updated_at, now()), updated_at
+        FROM note_unpartitioned
+        """
+    )
+    attach_note_table("note_unpartitioned")
+
+    op.create_table(
+        "note_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("board_id", sa.Integer(), nullable=True),
+        sa.Column("text", sa.String(length=250), nullable=False),
+        sa.Column("views_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["board_id"], ["board.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_note_archive_board_id"), "note_archive", ["board_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    detach_note_table("note_partitioned")
+    op.create_table(
+        "note",
+        *note_columns(created_at_nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # Archived notes are live again, their boards already count them
+    op.execute(
+        f"""
+        INSERT INTO note ({NOTE_COLUMNS})
+        SELECT {NOTE_COLUMNS} FROM note_partitioned
+        UNION ALL
+        SELECT {NOTE_COLUMNS} FROM note_archive
+        """
+    )
+    op.drop_index(op.f("ix_note_archive_board_id"), table_name="note_archive")
+    op.drop_table("note_archive")
+    attach_note_table("note_partitioned")
@@ -0,0 +1,32 @@
+"""add_note_version
+
+Revision ID: 30ecb111a107
+Revises: dec23905fc48
+Create Date: 2026-10-18 14:23:25.345837
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "30ecb111a107"
+down_revision: Union[str, None] = "dec23905fc48"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A constant default fills existing rows without rewriting the partitions
+    for table in ["note", "note_archive"]:
+        op.add_column(
+            table,
+            sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+        )
+
+
+def downgrade() -> None:
+    for table in ["note_archive", "note"]:
+        op.drop_column(table, "version")
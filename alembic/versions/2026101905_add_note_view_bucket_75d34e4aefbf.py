@@ -0,0 +1,37 @@
+"""add_note_view_bucket
+
+Revision ID: 75d34e4aefbf
+Revises: 30ecb111a107
+Create Date: 2026-10-18 14:47:35.990615
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "75d34e4aefbf"
+down_revision: Union[str, None] = "30ecb111a107"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "note_view_bucket",
+        sa.Column("note_id", sa.Integer(), nullable=False),
+        sa.Column("bucket", sa.DateTime(), nullable=False),
+        sa.Column("board_id", sa.Integer(), nullable=True),
+        sa.Column("views", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("note_id", "bucket"),
+    )
+    op.create_index(
+        "ix_note_view_bucket_bucket", "note_view_bucket", ["bucket"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_note_view_bucket_bucket", table_name="note_view_bucket")
+    op.drop_table("note_view_bucket")
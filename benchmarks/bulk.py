@@ -0,0 +1,91 @@
+"""Compares throughput of single item and bulk note creation and linking.
+
+Run against a migrated database:
+
+    python -m benchmarks.bulk --notes 5000 --workers 20
+"""
+import argparse
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+from httpx import AsyncClient
+
+from main import app
+
+
+async def timed(action: Callable[[], Awaitable[None]]) -> float:
+    start = time.perf_counter()
+    await action()
+    return time.perf_counter() - start
+
+
+async def for_each(items: list, workers: int, send: Callable) -> None:
+    queue = iter(items)
+
+    async def worker() -> None:
+        for item in queue:
+            (await send(item)).raise_for_status()
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+
+
+async def main(notes: int, workers: int) -> None:
+    texts = [{"text": f"Bulk benchmark note {i}"} for i in range(notes)]
+    results = {}
+
+    async with AsyncClient(
+        app=app, base_url="http://localhost", headers={"Host": "localhost"}
+    ) as client:
+        board_id = (
+            await client.post("/board", json={"name": "Bulk benchmark"})
+        ).json()["id"]
+        single_ids: list[int] = []
+
+        async def create_single(note: dict):
+            response = await client.post("/note", json=note)
+            single_ids.append(response.json()["id"])
+            return response
+
+        results["create, single"] = await timed(
+            lambda: for_each(texts, workers, create_single)
+        )
+        results["link, single"] = await timed(
+            lambda: for_each(
+                single_ids,
+                workers,
+                lambda note_id: client.post(f"/board/{board_id}/link-note/{note_id}"),
+            )
+        )
+
+        bulk_ids: list[int] = []
+
+        async def create_bulk():
+            response = await client.post("/note/bulk", json=texts, timeout=None)
+            response.raise_for_status()
+            bulk_ids.extend(response.json()["ids"])
+
+        async def link_bulk():
+            response = await client.post(
+                f"/board/{board_id}/link-notes",
+                json={"note_ids": bulk_ids},
+                timeout=None,
+            )
+            response.raise_for_status()
+
+        results["create, bulk"] = await timed(create_bulk)
+        results["link, bulk"] = await timed(link_bulk)
+
+        await client.delete(f"/board/{board_id}")
+
+    print(f"notes: {notes}, workers for single item requests: {workers}")
+    for name, seconds in results.items():
+        print(f"{name:15} {seconds:8.2f}s {notes / seconds:12.1f} notes/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.notes, args.workers))
@@ -0,0 +1,344 @@
+"""Load test of every notes and boards endpoint against a seeded database.
+
+Seeds ``--boards`` boards with ``--notes-per-board`` notes each into the
+database configured in ``.env`` (the postgres service of docker-compose.yml),
+then runs one scenario per endpoint with ``--workers`` concurrent workers for
+``--duration`` seconds. Requests go to the ASGI app in process, or to a
+running server when ``--base-url`` is given, in which case queries per
+request are not reported.
+
+Results are printed and written as JSON to ``--output``. When ``--baseline``
+points to the JSON of an earlier run, scenarios whose p95 latency grew or
+whose throughput dropped by more than ``--tolerance`` are reported as
+regressions and the run exits with status 1:
+
+    python -m benchmarks.load --boards 100 --notes-per-board 100 \\
+        --output results.json --baseline baseline.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from statistics import quantiles
+
+from httpx import AsyncClient, Response
+from sqlalchemy import delete, event, insert
+
+from database import async_engine, async_session
+from main import app
+from src.notes.jobs import job_queue
+from src.notes.models import Board, Note
+
+SEED_CHUNK_SIZE = 10000
+# Seconds between polls of the jobs of deleted boards
+JOB_POLL_INTERVAL = 0.01
+WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel"]
+
+
+class Dataset:
+    def __init__(self, board_ids: list[int], note_ids: list[int]) -> None:
+        self.board_ids = board_ids
+        self.note_ids = note_ids
+        # Created by scenarios, so that they are removed with the seeded data
+        self.created_board_ids: list[int] = []
+        self.created_note_ids: list[int] = []
+
+    def board_id(self) -> int:
+        return random.choice(self.board_ids)
+
+    def note_id(self) -> int:
+        return random.choice(self.note_ids)
+
+
+async def seed(boards: int, notes_per_board: int) -> Dataset:
+    async with async_session() as session:
+        board_ids = list(
+            await session.scalars(
+                insert(Board).returning(Board.id),
+                [{"name": f"Load test board {i}"} for i in range(boards)],
+            )
+        )
+        notes = [
+            {"text": " ".join(random.choices(WORDS, k=5)), "board_id": board_id}
+            for board_id in board_ids
+            for _ in range(notes_per_board)
+        ]
+        note_ids = []
+        for start in range(0, len(notes), SEED_CHUNK_SIZE):
+            note_ids.extend(
+                await session.scalars(
+                    insert(Note).returning(Note.id),
+                    notes[start : start + SEED_CHUNK_SIZE],
+                )
+            )
+        await session.commit()
+    return Dataset(board_ids, note_ids)
+
+
+async def cleanup(dataset: Dataset) -> None:
+    async with async_session() as session:
+        for start in range(0, len(dataset.created_note_ids), SEED_CHUNK_SIZE):
+            chunk = dataset.created_note_ids[start : start + SEED_CHUNK_SIZE]
+            await session.execute(delete(Note).where(Note.id.in_(chunk)))
+        await session.execute(
+            delete(Board).where(
+                Board.id.in_(dataset.board_ids + dataset.created_board_ids)
+            )
+        )
+        await session.commit()
+
+
+async def create_note(client: AsyncClient, dataset: Dataset) -> Response:
+    response = await client.post("/note", json={"text": "Load test note"})
+    if response.status_code == 201:
+        dataset.created_note_ids.append(response.json()["id"])
+    return response
+
+
+async def create_notes(client: AsyncClient, dataset: Dataset) -> Response:
+    notes = [{"text": f"Load test bulk note {i}"} for i in range(100)]
+    response = await client.post("/note/bulk", json=notes)
+    if response.status_code == 201:
+        dataset.created_note_ids.extend(response.json()["ids"])
+    return response
+
+
+# Deleting scenarios create what they delete, so their latency covers both requests
+async def delete_note(client: AsyncClient, dataset: Dataset) -> Response:
+    response = await client.post("/note", json={"text": "Load test deleted note"})
+    return await client.delete(f"/note/{response.json()['id']}")
+
+
+async def create_board(client: AsyncClient, dataset: Dataset) -> Response:
+    response = await client.post("/board", json={"name": "Load test board"})
+    if response.status_code == 201:
+        dataset.created_board_ids.append(response.json()["id"])
+    return response
+
+
+async def delete_board(client: AsyncClient, dataset: Dataset) -> Response:
+    """Deletes a board and waits for the job which deletes it to finish."""
+
+    response = await client.post("/board", json={"name": "Load test deleted board"})
+    response = await client.delete(f"/board/{response.json()['id']}")
+    if response.status_code != 202:
+        return response
+    job_id = response.json()["id"]
+    while True:
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+        response = await client.get(f"/jobs/{job_id}")
+        if response.json()["status"] == "succeeded":
+            return response
+        if response.json()["status"] == "failed":
+            return Response(500, json=response.json(), request=response.request)
+
+
+async def stream_board_notes(client: AsyncClient, dataset: Dataset) -> Response:
+    async with client.stream("GET", f"/board/{dataset.board_id()}/notes") as response:
+        async for _ in response.aiter_lines():
+            pass
+    return response
+
+
+Scenario = Callable[[AsyncClient, Dataset], Awaitable[Response]]
+
+SCENARIOS: dict[str, Scenario] = {
+    "create_new_note": create_note,
+    "create_new_notes": create_notes,
+    "list_notes": lambda client, dataset: client.get(
+        "/note", params={"board_id": dataset.board_id()}
+    ),
+    "search_notes": lambda client, dataset: client.get(
+        "/note/search", params={"q": random.choice(WORDS)}
+    ),
+    "get_note": lambda client, dataset: client.get(f"/note/{dataset.note_id()}"),
+    "batch_get_notes": lambda client, dataset: client.post(
+        "/note/batch-get", json={"ids": [dataset.note_id() for _ in range(50)]}
+    ),
+    "update_note": lambda client, dataset: client.patch(
+        f"/note/{dataset.note_id()}", json={"text": "Load test updated note"}
+    ),
+    "delete_note": delete_note,
+    "create_new_board": create_board,
+    "list_boards": lambda client, dataset: client.get("/board"),
+    "get_board": lambda client, dataset: client.get(f"/board/{dataset.board_id()}"),
+    "batch_get_boards": lambda client, dataset: client.post(
+        "/board/batch-get", json={"ids": [dataset.board_id() for _ in range(50)]}
+    ),
+    "stream_board_notes": stream_board_notes,
+    "update_board": lambda client, dataset: client.patch(
+        f"/board/{dataset.board_id()}", json={"name": "Load test updated board"}
+    ),
+    "delete_board": delete_board,
+    "link_note_to_board": lambda client, dataset: client.post(
+        f"/board/{dataset.board_id()}/link-note/{dataset.note_id()}"
+    ),
+    "unlink_note_from_board": lambda client, dataset: client.post(
+        f"/board/{dataset.board_id()}/unlink-note/{dataset.note_id()}"
+    ),
+    "link_notes_to_board": lambda client, dataset: client.post(
+        f"/board/{dataset.board_id()}/link-notes",
+        json={"note_ids": [dataset.note_id() for _ in range(100)]},
+    ),
+    "unlink_notes_from_board": lambda client, dataset: client.post(
+        f"/board/{dataset.board_id()}/unlink-notes",
+        json={"note_ids": [dataset.note_id() for _ in range(100)]},
+    ),
+}
+
+
+class QueryCounter:
+    """Counts statements executed by the application engine."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        event.listen(async_engine.sync_engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args) -> None:
+        self.count += 1
+
+
+async def run_scenario(
+    client: AsyncClient,
+    dataset: Dataset,
+    scenario: Scenario,
+    workers: int,
+    duration: float,
+    query_counter: QueryCounter | None,
+) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    queries = query_counter.count if query_counter else 0
+    start = time.perf_counter()
+    deadline = start + duration
+
+    async def worker() -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            request_start = time.perf_counter()
+            response = await scenario(client, dataset)
+            latencies.append(time.perf_counter() - request_start)
+            if response.status_code >= 400:
+                errors += 1
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    elapsed = time.perf_counter() - start
+
+    p50, p95, p99 = (
+        [quantiles(latencies, n=100)[i] * 1000 for i in (49, 94, 98)]
+        if len(latencies) > 1
+        else [latencies[0] * 1000] * 3
+    )
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "queries_per_request": (
+            (query_counter.count - queries) / len(latencies) if query_counter else None
+        ),
+    }
+
+
+def find_regressions(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, result in results["scenarios"].items():
+        expected = baseline["scenarios"].get(name)
+        if expected is None:
+            continue
+        if result["p95_ms"] > expected["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {result['p95_ms']:.1f}ms, "
+                f"baseline {expected['p95_ms']:.1f}ms"
+            )
+        if result["throughput"] < expected["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {result['throughput']:.1f} req/s, "
+                f"baseline {expected['throughput']:.1f} req/s"
+            )
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    dataset = await seed(args.boards, args.notes_per_board)
+    query_counter = None if args.base_url else QueryCounter()
+    results = {
+        "config": {
+            "boards": args.boards,
+            "notes_per_board": args.notes_per_board,
+            "workers": args.workers,
+            "duration": args.duration,
+            "base_url": args.base_url,
+        },
+        "scenarios": {},
+    }
+
+    if not args.base_url:
+        # The in process app runs no lifespan, boards are deleted by this worker
+        job_queue.start()
+    try:
+        async with AsyncClient(
+            app=None if args.base_url else app,
+            base_url=args.base_url or "http://localhost",
+            headers={"Host": "localhost"},
+            timeout=None,
+        ) as client:
+            for name in names:
+                results["scenarios"][name] = await run_scenario(
+                    client,
+                    dataset,
+                    SCENARIOS[name],
+                    args.workers,
+                    args.duration,
+                    query_counter,
+                )
+    finally:
+        await job_queue.stop()
+        await cleanup(dataset)
+
+    print(
+        f"{'scenario':25} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        f" {'errors':>7} {'queries':>8}"
+    )
+    for name, result in results["scenarios"].items():
+        queries = result["queries_per_request"]
+        print(
+            f"{name:25} {result['throughput']:9.1f} {result['p50_ms']:8.2f}"
+            f" {result['p95_ms']:8.2f} {result['p99_ms']:8.2f} {result['errors']:7}"
+            f" {'-' if queries is None else f'{queries:8.2f}':>8}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--boards", type=int, default=100)
+    parser.add_argument("--notes-per-board", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--scenarios", help="comma separated, all by default")
+    parser.add_argument("--base-url", help="URL of a running server")
+    parser.add_argument("--output", help="file to write JSON results to")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,195 @@
+"""Overload test of admission control with open loop arrivals.
+
+Seeds the database like ``benchmarks.load``, measures capacity of a mix of
+note reads and bulk creates with ``--workers`` closed loop workers, then sends
+requests of the mix at ``--rates`` times that capacity for ``--duration``
+seconds each. Arrivals are a Poisson process which does not wait for
+responses, like clients of a loaded service, so that queues build up when the
+service falls behind.
+
+For every rate, p50 and p99 latency of admitted requests and the share of shed
+ones (503) are printed per kind, along with p99 of the time admitted requests
+ran in the app and waited for a connection, from their Server-Timing headers. ``--no-admission`` lifts the limits of the
+controller of the in process app, to compare; start a server with
+``ADMISSION_ENABLED=false`` to compare one given by ``--base-url``. Pass the
+capacity of the first run with ``--capacity`` to the second, so that both send
+requests at the same rates:
+
+    python -m benchmarks.overload --rates 1,2
+    python -m benchmarks.overload --rates 1,2 --no-admission --capacity 100
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from statistics import quantiles
+
+from httpx import AsyncClient, Limits, Response, TransportError
+
+from benchmarks.load import SCENARIOS, Dataset, Scenario, cleanup, seed
+from main import app
+from src.admission import admission
+
+# Connections of the client, many for requests of the open loop not to queue in
+# it, but few enough for the server to accept them
+MAX_CONNECTIONS = 500
+# Kinds of requests sent and their shares of the mix
+MIX: dict[str, tuple[Scenario, float]] = {
+    "read": (SCENARIOS["get_note"], 0.8),
+    "bulk": (SCENARIOS["create_new_notes"], 0.2),
+}
+
+
+def server_timing(response: Response, metric: str) -> float:
+    """Returns seconds of a metric of the Server-Timing header of response."""
+
+    for entry in response.headers["Server-Timing"].split(", "):
+        name, *params = entry.split(";")
+        if name == metric:
+            return float(params[0].removeprefix("dur=")) / 1000
+    raise KeyError(metric)
+
+
+def p99(values: list[float]) -> float:
+    if len(values) > 1:
+        return quantiles(values, n=100)[98] * 1000
+    return values[0] * 1000 if values else 0.0
+
+
+def pick() -> str:
+    return random.choices(list(MIX), weights=[share for _, share in MIX.values()])[0]
+
+
+async def capacity(
+    client: AsyncClient, dataset: Dataset, workers: int, duration: float
+) -> float:
+    """Returns requests per second of the mix served by closed loop workers."""
+
+    requests = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        nonlocal requests
+        while time.perf_counter() < deadline:
+            scenario, _ = MIX[pick()]
+            await scenario(client, dataset)
+            requests += 1
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return requests / duration
+
+
+async def open_loop(
+    client: AsyncClient, dataset: Dataset, rate: float, duration: float
+) -> dict[str, dict]:
+    latencies: dict[str, list[float]] = {kind: [] for kind in MIX}
+    runs: dict[str, list[float]] = {kind: [] for kind in MIX}
+    pool_waits: dict[str, list[float]] = {kind: [] for kind in MIX}
+    shed = dict.fromkeys(MIX, 0)
+    errors = dict.fromkeys(MIX, 0)
+
+    async def send(kind: str) -> None:
+        scenario, _ = MIX[kind]
+        start = time.perf_counter()
+        try:
+            response = await scenario(client, dataset)
+        except TransportError:
+            errors[kind] += 1
+            return
+        if response.status_code == 503:
+            shed[kind] += 1
+        elif response.status_code >= 400:
+            errors[kind] += 1
+        else:
+            latencies[kind].append(time.perf_counter() - start)
+            runs[kind].append(server_timing(response, "total"))
+            pool_waits[kind].append(server_timing(response, "db-pool"))
+
+    requests = []
+    # Arrivals are scheduled from the start, so that a late wake up sends the
+    # requests which are due at once instead of lowering the rate
+    arrival = time.perf_counter()
+    deadline = arrival + duration
+    while arrival < deadline:
+        requests.append(asyncio.create_task(send(pick())))
+        arrival += random.expovariate(rate)
+        await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+    await asyncio.gather(*requests)
+
+    results = {}
+    for kind, admitted in latencies.items():
+        total = len(admitted) + shed[kind] + errors[kind]
+        p50 = (
+            quantiles(admitted, n=100)[49] * 1000
+            if len(admitted) > 1
+            else p99(admitted)
+        )
+        results[kind] = {
+            "requests": total,
+            "p50_ms": p50,
+            "p99_ms": p99(admitted),
+            "run_p99_ms": p99(runs[kind]),
+            "pool_p99_ms": p99(pool_waits[kind]),
+            "shed": shed[kind] / total if total else 0.0,
+            "errors": errors[kind],
+        }
+    return results
+
+
+async def main(args: argparse.Namespace) -> int:
+    if args.no_admission:
+        admission.max_limit = admission.route_limit = sys.maxsize
+        admission.limit = float(sys.maxsize)
+    dataset = await seed(args.boards, args.notes_per_board)
+    try:
+        async with AsyncClient(
+            app=None if args.base_url else app,
+            base_url=args.base_url or "http://localhost",
+            headers={"Host": "localhost"},
+            timeout=None,
+            # Requests of the open loop must not queue in the client
+            limits=Limits(max_connections=MAX_CONNECTIONS),
+        ) as client:
+            served = args.capacity or await capacity(
+                client, dataset, args.workers, args.duration
+            )
+            print(f"capacity {served:.1f} req/s")
+            print(
+                f"{'rate':>5} {'kind':6} {'requests':>9} {'p50 ms':>8}"
+                f" {'p99 ms':>8} {'run p99':>8} {'pool p99':>9} {'shed':>6}"
+                f" {'errors':>7}"
+            )
+            for factor in map(float, args.rates.split(",")):
+                results = await open_loop(
+                    client, dataset, served * factor, args.duration
+                )
+                for kind, result in results.items():
+                    print(
+                        f"{factor:4.1f}x {kind:6} {result['requests']:9}"
+                        f" {result['p50_ms']:8.1f} {result['p99_ms']:8.1f}"
+                        f" {result['run_p99_ms']:8.1f} {result['pool_p99_ms']:9.1f}"
+                        f" {result['shed']:6.1%} {result['errors']:7}"
+                    )
+    finally:
+        await cleanup(dataset)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--boards", type=int, default=100)
+    parser.add_argument("--notes-per-board", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument(
+        "--capacity", type=float, help="req/s to use instead of measuring it"
+    )
+    parser.add_argument("--rates", default="1,2", help="multiples of capacity")
+    parser.add_argument("--base-url", help="URL of a running server")
+    parser.add_argument(
+        "--no-admission", action="store_true", help="lift limits of the in process app"
+    )
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,147 @@
+"""Seeds a partitioned note table and times note reads around archival.
+
+Notes are spread evenly over the months before the current one and written
+with ``INSERT ... SELECT generate_series(...)`` per month, then partition
+maintenance archives the cold months. ``GET /note/{id}`` is timed for live
+and archived notes before and after, with the cache cleared before each
+request so that every read reaches the database, and for live notes while
+the archival runs.
+
+Run against a migrated database of its own, as seeded notes are not removed:
+
+    python -m benchmarks.partitions --notes 10000000 --months 24 --repeat 200
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import date
+from statistics import median, quantiles
+
+from httpx import AsyncClient
+from sqlalchemy import func, select, text
+
+import config
+from database import async_session
+from main import app
+from src.cache import cache
+from src.notes.models import Note, NoteArchive
+from src.notes.partitions import PartitionMaintenance, add_months, create_partitions
+
+BOARDS = 1000
+
+
+async def seed(notes: int, months: int) -> None:
+    first_month = add_months(date.today(), -months)
+    per_month = notes // months
+    async with async_session() as session:
+        await create_partitions(session, first_month, months)
+        board_ids = list(
+            await session.scalars(
+                text(
+                    "INSERT INTO board (name, created_at, updated_at)"
+                    " SELECT 'Partitions benchmark ' || i, now(), now()"
+                    " FROM generate_series(1, :boards) AS i RETURNING id"
+                ),
+                {"boards": BOARDS},
+            )
+        )
+        await session.commit()
+    for month in range(months):
+        start = time.perf_counter()
+        async with async_session() as session:
+            await session.execute(
+                text(
+                    "INSERT INTO note"
+                    " (board_id, text, views_count, created_at, updated_at)"
+                    " SELECT :first_board + i % :boards, 'Partitions benchmark ' || i,"
+                    " i % 100, ts, ts"
+                    " FROM generate_series(1, :notes) AS i,"
+                    " LATERAL (SELECT CAST(:month AS timestamp)"
+                    " + (i % 28) * interval '1 day' AS ts) AS created"
+                ),
+                {
+                    "first_board": board_ids[0],
+                    "boards": BOARDS,
+                    "notes": per_month,
+                    "month": add_months(first_month, month),
+                },
+            )
+            await session.commit()
+        print(f"seeded {per_month} notes in {time.perf_counter() - start:.1f}s")
+
+
+async def sample_ids(model: type[Note] | type[NoteArchive], size: int) -> list[int]:
+    async with async_session() as session:
+        low, high = (
+            await session.execute(select(func.min(model.id), func.max(model.id)))
+        ).one()
+    if low is None:
+        return []
+    return [random.randint(low, high) for _ in range(size)]
+
+
+async def measure(ids: list[int]) -> tuple[float, float]:
+    durations = await measure_each(ids)
+    return median(durations), quantiles(durations, n=100)[98]
+
+
+async def measure_each(ids: list[int]) -> list[float]:
+    durations = []
+    async with AsyncClient(
+        app=app, base_url="http://localhost", headers={"Host": "localhost"}
+    ) as client:
+        for note_id in ids:
+            await cache.clear()
+            start = time.perf_counter()
+            response = await client.get(f"/note/{note_id}")
+            durations.append(time.perf_counter() - start)
+            assert response.status_code in (200, 404)
+    return durations
+
+
+async def report(label: str, repeat: int) -> None:
+    async with async_session() as session:
+        live = await session.scalar(select(func.count()).select_from(Note))
+        archived = await session.scalar(select(func.count()).select_from(NoteArchive))
+    print(f"{label}: {live} live notes, {archived} archived")
+    for name, model in [("live", Note), ("archived", NoteArchive)]:
+        if ids := await sample_ids(model, repeat):
+            p50, p99 = await measure(ids)
+            print(
+                f"  {name:>8} get_note p50 {p50 * 1000:.2f} ms p99 {p99 * 1000:.2f} ms"
+            )
+
+
+async def main(notes: int, months: int, repeat: int) -> None:
+    await seed(notes, months)
+    await report("before archival", repeat)
+    maintenance = PartitionMaintenance(
+        interval=0,
+        months_ahead=config.settings.NOTE_PARTITIONS_AHEAD,
+        archive_after_months=months // 2,
+    )
+    start = time.perf_counter()
+    archival = asyncio.create_task(maintenance.run())
+    durations = []
+    while not archival.done():
+        durations.extend(await measure_each(await sample_ids(Note, 10)))
+    created, archived = await archival
+    print(
+        f"archived {len(archived)} partitions in {time.perf_counter() - start:.1f}s,"
+        f" created {len(created)}"
+    )
+    print(
+        f"  live get_note during archival p50 {median(durations) * 1000:.2f} ms"
+        f" max {max(durations) * 1000:.2f} ms"
+    )
+    await report("after archival", repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=10_000_000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.notes, args.months, args.repeat))
@@ -0,0 +1,111 @@
+"""Compares board response times of ORM and row tuple serialization.
+
+"orm" serves ``GET /board/{id}`` the way ``get_board`` used to: notes are
+loaded as ORM objects, validated into ``schemas.Board`` with
+``from_attributes`` and encoded by FastAPI's default JSON path. "rows" goes
+through the current ``get_board``, which builds the payload from row tuples
+and encodes it with orjson. The cache is cleared before each request and the
+notes page size is raised, so that every response carries all notes of the
+board.
+
+Run against a migrated database:
+
+    python -m benchmarks.serialization --sizes 10,1000,100000 --repeat 5
+"""
+import argparse
+import asyncio
+import time
+from statistics import median
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import insert, select
+
+import config
+from database import async_session
+from main import app
+from src.cache import cache
+from src.notes import schemas
+from src.notes.models import Board, Note
+
+SEED_CHUNK_SIZE = 10000
+
+legacy_app = FastAPI()
+
+
+@legacy_app.get("/board/{board_id}", response_model=schemas.Board)
+async def get_board_from_orm(board_id: int):
+    async with async_session() as session:
+        board = await session.get(Board, board_id)
+        notes = list(
+            await session.scalars(
+                select(Note)
+                .where(Note.board_id == board_id)
+                .order_by(Note.id)
+                .limit(config.settings.BOARD_NOTES_PAGE_SIZE)
+            )
+        )
+        return schemas.Board(
+            id=board.id,
+            name=board.name,
+            notes=notes,
+            notes_count=len(notes),
+            version=board.version,
+            created_at=board.created_at,
+            updated_at=board.updated_at,
+        )
+
+
+async def create_board(notes: int) -> int:
+    async with async_session() as session:
+        board = Board(name=f"Serialization benchmark {notes}")
+        session.add(board)
+        await session.flush()
+        rows = [
+            {"text": f"Serialization benchmark note {i}", "board_id": board.id}
+            for i in range(notes)
+        ]
+        for start in range(0, notes, SEED_CHUNK_SIZE):
+            await session.execute(insert(Note), rows[start : start + SEED_CHUNK_SIZE])
+        await session.commit()
+        return board.id
+
+
+async def measure(app: FastAPI, board_id: int, repeat: int) -> tuple[float, bytes]:
+    durations = []
+    async with AsyncClient(
+        app=app, base_url="http://localhost", headers={"Host": "localhost"}
+    ) as client:
+        for _ in range(repeat):
+            await cache.clear()
+            start = time.perf_counter()
+            response = await client.get(f"/board/{board_id}")
+            durations.append(time.perf_counter() - start)
+            response.raise_for_status()
+    return median(durations), response.content
+
+
+async def main(sizes: list[int], repeat: int) -> None:
+    print(f"{'notes':>8} {'orm ms':>10} {'rows ms':>10} {'speedup':>8} {'size KiB':>9}")
+    for notes in sizes:
+        config.settings.BOARD_NOTES_PAGE_SIZE = notes
+        board_id = await create_board(notes)
+        try:
+            before, _ = await measure(legacy_app, board_id, repeat)
+            after, content = await measure(app, board_id, repeat)
+        finally:
+            async with async_session() as session:
+                await session.delete(await session.get(Board, board_id))
+                await session.commit()
+        print(
+            f"{notes:8} {before * 1000:10.2f} {after * 1000:10.2f}"
+            f" {before / after:7.2f}x {len(content) / 1024:9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10,1000,100000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main([int(size) for size in args.sizes.split(",")], args.repeat))
@@ -0,0 +1,81 @@
+"""Compares reads per second of a single note with and without the view counter.
+
+"before" serves every read with a commit of ``views_count += 1``, the way
+``get_note`` used to, "after" goes through the current ``get_note``. Both are
+called through the ASGI app by concurrent workers hammering the same note.
+
+Run against a migrated database:
+
+    python -m benchmarks.view_counter --workers 50 --duration 10
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from database import async_session
+from main import app
+from src.notes.models import Note
+from src.notes.view_counter import view_counter
+
+legacy_app = FastAPI()
+
+
+@legacy_app.get("/note/{note_id}")
+async def get_note_with_commit(note_id: int):
+    async with async_session() as session:
+        note = await session.get(Note, note_id)
+        note.views_count += 1
+        await session.commit()
+        return {"id": note.id, "views_count": note.views_count}
+
+
+async def measure(app: FastAPI, note_id: int, workers: int, duration: float) -> float:
+    reads = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(client: AsyncClient) -> None:
+        nonlocal reads
+        while time.perf_counter() < deadline:
+            response = await client.get(f"/note/{note_id}")
+            response.raise_for_status()
+            reads += 1
+
+    async with AsyncClient(
+        app=app, base_url="http://localhost", headers={"Host": "localhost"}
+    ) as client:
+        await asyncio.gather(*(worker(client) for _ in range(workers)))
+    return reads / duration
+
+
+async def main(workers: int, duration: float) -> None:
+    async with async_session() as session:
+        note = Note(text="View counter benchmark")
+        session.add(note)
+        await session.commit()
+
+    try:
+        before = await measure(legacy_app, note.id, workers, duration)
+
+        view_counter.start()
+        after = await measure(app, note.id, workers, duration)
+        await view_counter.stop()
+    finally:
+        async with async_session() as session:
+            await session.delete(await session.get(Note, note.id))
+            await session.commit()
+
+    print(f"workers: {workers}, duration: {duration}s")
+    print(f"before (commit per view): {before:10.1f} reads/s")
+    print(f"after (view counter):     {after:10.1f} reads/s")
+    print(f"speedup:                  {after / before:10.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.workers, args.duration))
@@ -37,6 +37,101 @@ class Settings(BaseSettings):
     TEST_DATABASE_PASSWORD: str = "postgres"
     TEST_DATABASE_PORT: int = 5432
     TEST_DATABASE_DB: str = "postgres"
+    # Stands in for a replica in tests, may be another database of the same server
+    TEST_DATABASE_REPLICA_HOSTNAME: str = "localhost"
+    TEST_DATABASE_REPLICA_PORT: int = 5432
+    TEST_DATABASE_REPLICA_DB: str = "postgres_replica"
+
+    # DATABASE CONNECTION POOL
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30.0
+    DATABASE_POOL_RECYCLE: int = -1
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_STATEMENT_CACHE_SIZE: int = 100
+    DATABASE_SERVER_SETTINGS: dict[str, str] = {}
+    # Connections opened at startup, each preparing the hottest statements. At
+    # most DATABASE_POOL_SIZE are kept, as the pool closes overflow ones
+    DATABASE_POOL_WARMUP: int = 5
+    # Seconds a process keeps serving after a shutdown signal while failing
+    # readiness probes, for load balancers to stop sending it requests. Waiting
+    # for requests in flight afterwards is bounded by uvicorn's
+    # --timeout-graceful-shutdown
+    SHUTDOWN_DRAIN_DELAY: float = 5.0
+    # Seconds after which statements are logged, None disables the logging
+    SLOW_QUERY_THRESHOLD: float | None = None
+
+    # READ REPLICAS
+    # SQLAlchemy URIs of read replicas, all reads go to the primary when empty
+    DATABASE_REPLICA_URIS: list[str] = []
+    REPLICA_CHECK_INTERVAL: float = 5.0
+    # Seconds after a mutation during which the client reads from the primary
+    READ_YOUR_WRITES_WINDOW: int = 5
+
+    # NOTE VIEWS COUNTER
+    VIEWS_FLUSH_INTERVAL: float = 1.0
+    VIEWS_FLUSH_THRESHOLD: int = 1000
+
+    # NOTE LEADERBOARD
+    # Seconds of views counted together, the granularity of the windows
+    LEADERBOARD_BUCKET_SIZE: int = 300
+    # Seconds of the sliding windows of the leaderboard by their names
+    LEADERBOARD_WINDOWS: dict[str, int] = {
+        "hour": 3600,
+        "day": 86400,
+        "week": 604800,
+    }
+    # Notes kept per window, of all boards and of each board
+    LEADERBOARD_SIZE: int = 100
+    LEADERBOARD_REFRESH_INTERVAL: float = 10.0
+
+    # PAGINATION
+    BOARD_NOTES_PAGE_SIZE: int = 50
+    STREAM_CHUNK_SIZE: int = 1000
+
+    # CACHE
+    CACHE_MAX_SIZE: int = 10000
+    CACHE_TTL: float = 60.0
+    # Channel over which processes tell each other which keys to invalidate
+    CACHE_INVALIDATIONS_CHANNEL: str = "cache_invalidations"
+
+    # BULK OPERATIONS
+    BULK_CHUNK_SIZE: int = 1000
+
+    # BOARD EVENTS
+    EVENTS_CHANNEL: str = "board_events"
+    # Events buffered per subscriber before it is evicted as too slow
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_KEEPALIVE_INTERVAL: float = 15.0
+
+    # NOTE PARTITIONS
+    # Monthly partitions created ahead of the current month
+    NOTE_PARTITIONS_AHEAD: int = 3
+    # Months after which partitions are moved to the archive, None keeps them
+    NOTE_ARCHIVE_AFTER_MONTHS: int | None = 12
+    NOTE_MAINTENANCE_INTERVAL: float = 3600.0
+
+    # ADMISSION CONTROL
+    ADMISSION_ENABLED: bool = True
+    # At most as many requests run at once as the primary pool keeps connections,
+    # and this share of them for one route, so that a slow one leaves room to
+    # others; latency over the target shrinks the limit
+    ADMISSION_ROUTE_SHARE: float = 0.8
+    # Requests run at once never go below this, however slow they get
+    ADMISSION_MIN_LIMIT: int = 2
+    ADMISSION_QUEUE_SIZE: int = 100
+    # Seconds a request waits to run before it is rejected
+    ADMISSION_QUEUE_TIMEOUT: float = 1.0
+    # Reads and writes slower than this many seconds shrink the limit
+    ADMISSION_LATENCY_TARGET: float = 0.25
+    ADMISSION_RETRY_AFTER: int = 1
+
+    # JOBS
+    # Seconds between polls of the job queue for jobs enqueued by other processes
+    JOB_POLL_INTERVAL: float = 1.0
+    # Seconds a running job stays claimed without progress before it is retried
+    JOB_LEASE: float = 60.0
+    JOB_MAX_ATTEMPTS: int = 3
 
     @computed_field
     @cached_property
@@ -66,6 +161,20 @@ class Settings(BaseSettings):
             )
         )
 
+    @computed_field
+    @cached_property
+    def TEST_SQLALCHEMY_REPLICA_URI(self) -> str:
+        return str(
+            PostgresDsn.build(
+                scheme="postgresql+asyncpg",
+                username=self.TEST_DATABASE_USER,
+                password=self.TEST_DATABASE_PASSWORD,
+                host=self.TEST_DATABASE_REPLICA_HOSTNAME,
+                port=self.TEST_DATABASE_REPLICA_PORT,
+                path=self.TEST_DATABASE_REPLICA_DB,
+            )
+        )
+
     model_config = SettingsConfigDict(
         env_file=f"{PROJECT_DIR}/.env", case_sensitive=True
     )
@@ -1,12 +1,275 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import asyncio
+import logging
+import time
+from collections.abc import Sequence
+
+from pydantic import BaseModel
+from sqlalchemy import Executable, event, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 import config
+from src.metrics import Histogram, HistogramSnapshot, request_stats
+
+logger = logging.getLogger(__name__)
 
 if config.settings.ENVIRONMENT == "PYTEST":
     sqlalchemy_database_uri = config.settings.TEST_SQLALCHEMY_DATABASE_URI
+    replica_database_uris = []
 else:
     sqlalchemy_database_uri = config.settings.DEFAULT_SQLALCHEMY_DATABASE_URI
+    replica_database_uris = config.settings.DATABASE_REPLICA_URIS
+
+
+class PoolStats(BaseModel):
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    wait_time: HistogramSnapshot
+    checkout_latency: HistogramSnapshot
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool recording how long checkouts wait for and take a connection.
+
+    Wait time covers getting a connection from the queue, including opening a
+    new one, checkout latency additionally covers pre-ping and checkout events.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_time = Histogram()
+        self.checkout_latency = Histogram()
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        # Disposing of the engine replaces its pool, the histograms are kept
+        pool = super().recreate()
+        pool.wait_time = self.wait_time
+        pool.checkout_latency = self.checkout_latency
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            duration = time.perf_counter() - start
+            self.wait_time.observe(duration)
+            if stats := request_stats.get():
+                stats.pool_wait += duration
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            self.checkout_latency.observe(time.perf_counter() - start)
+
+    def stats(self) -> PoolStats:
+        return PoolStats(
+            size=self.size(),
+            checked_out=self.checkedout(),
+            idle=self.checkedin(),
+            overflow=max(self.overflow(), 0),
+            wait_time=self.wait_time.snapshot(),
+            checkout_latency=self.checkout_latency.snapshot(),
+        )
+
+
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = time.perf_counter()
+
+
+def record_query_time(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info.pop("query_start")
+    if stats := request_stats.get():
+        stats.record_query(statement, duration)
+    threshold = config.settings.SLOW_QUERY_THRESHOLD
+    if threshold is not None and duration >= threshold:
+        logger.warning("Slow query took %.3fs: %s", duration, statement)
+
+
+def create_engine(uri: str) -> AsyncEngine:
+    """Creates an engine with the configured pool and query timing."""
+
+    engine = create_async_engine(
+        uri,
+        poolclass=InstrumentedQueuePool,
+        pool_size=config.settings.DATABASE_POOL_SIZE,
+        max_overflow=config.settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=config.settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=config.settings.DATABASE_POOL_RECYCLE,
+        pool_pre_ping=config.settings.DATABASE_POOL_PRE_PING,
+        connect_args={
+            # asyncpg's own cache and the one of prepared statements in SQLAlchemy,
+            # both have to be disabled behind pgbouncer in transaction mode
+            "statement_cache_size": config.settings.DATABASE_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": (
+                config.settings.DATABASE_STATEMENT_CACHE_SIZE
+            ),
+            "server_settings": config.settings.DATABASE_SERVER_SETTINGS,
+        },
+    )
+    event.listen(engine.sync_engine, "before_cursor_execute", start_query_timer)
+    event.listen(engine.sync_engine, "after_cursor_execute", record_query_time)
+    return engine
+
+
+async def warm_up(
+    engine: AsyncEngine, connections: int, statements: Sequence[Executable]
+) -> None:
+    """Opens connections of the pool and runs statements on each of them.
+
+    Running statements introspects their types and, unless the statement cache
+    is disabled, prepares them, so that first requests on a connection do not.
+    Connections are released to the pool only once all are open, as otherwise
+    they would be reused rather than opened.
+    """
+
+    connections = min(connections, engine.pool.size())
+    opened = await asyncio.gather(
+        *(engine.connect().start() for _ in range(connections)),
+        return_exceptions=True,
+    )
+    try:
+        for connection in opened:
+            if isinstance(connection, BaseException):
+                raise connection
+        for connection in opened:
+            for statement in statements:
+                await connection.execute(statement)
+    finally:
+        await asyncio.gather(
+            *(
+                connection.close()
+                for connection in opened
+                if not isinstance(connection, BaseException)
+            )
+        )
+
+
+class Replica:
+    """Read engine and whether its last health check succeeded."""
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+        self.session = async_sessionmaker(engine, expire_on_commit=False)
+        self.healthy = True
+
+
+class DatabaseRouter:
+    """Hands out sessions of the primary for writes and of replicas for reads.
+
+    Reads are spread over healthy replicas round robin and fall back to the
+    primary when none is healthy or when the client has to read its own writes.
+    Replicas are checked every ``check_interval`` seconds, and a replica whose
+    connection fails is left out until a check succeeds again.
+    """
+
+    def __init__(
+        self, primary: AsyncEngine, replicas: list[AsyncEngine], check_interval: float
+    ) -> None:
+        self.primary_engine = primary
+        self.primary = async_sessionmaker(primary, expire_on_commit=False)
+        self.replicas = [Replica(engine) for engine in replicas]
+        self.check_interval = check_interval
+        self._next = 0
+        self._task: asyncio.Task | None = None
+        for replica in self.replicas:
+            event.listen(
+                replica.engine.sync_engine, "handle_error", self._on_error(replica)
+            )
+
+    def _on_error(self, replica: Replica):
+        def mark_unhealthy(context) -> None:
+            if context.is_disconnect:
+                replica.healthy = False
+
+        return mark_unhealthy
+
+    def read_session(self, sticky: bool = False) -> AsyncSession:
+        """Returns a session of a healthy replica or of the primary.
+
+        Sticky reads always go to the primary, so that they see writes which
+        may not have reached the replicas yet.
+        """
+
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if sticky or not healthy:
+            return self.primary()
+        self._next = (self._next + 1) % len(healthy)
+        return healthy[self._next].session()
+
+    def is_replica(self, session: AsyncSession) -> bool:
+        """Tells whether session reads from a replica, which may lag behind."""
+
+        return any(session.bind is replica.engine for replica in self.replicas)
+
+    async def warm_up(self, connections: int, statements: Sequence[Executable]) -> None:
+        """Warms up pools of the primary and of the replicas.
+
+        Replicas which fail are left out until a check succeeds, while a failure
+        of the primary is raised.
+        """
+
+        await warm_up(self.primary_engine, connections, statements)
+        for replica in self.replicas:
+            try:
+                await warm_up(replica.engine, connections, statements)
+            except Exception:
+                logger.exception("Failed to warm up replica %s", replica.engine.url)
+                replica.healthy = False
+
+    async def dispose(self) -> None:
+        """Closes connections of the primary and of the replicas."""
+
+        await self.primary_engine.dispose()
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    async def check(self) -> None:
+        """Checks connections to all replicas."""
+
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+            except Exception:
+                if replica.healthy:
+                    logger.warning("Replica %s is unhealthy", replica.engine.url)
+                replica.healthy = False
+            else:
+                replica.healthy = True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check()
+
+    def start(self) -> None:
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
 
 
-async_engine = create_async_engine(sqlalchemy_database_uri, pool_pre_ping=True)
+async_engine = create_engine(sqlalchemy_database_uri)
 async_session = async_sessionmaker(async_engine, expire_on_commit=False)
+router = DatabaseRouter(
+    async_engine,
+    [create_engine(uri) for uri in replica_database_uris],
+    config.settings.REPLICA_CHECK_INTERVAL,
+)
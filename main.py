@@ -1,9 +1,51 @@
+from contextlib import asynccontextmanager
+
+import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
 import config
-from src.notes.endpoints import board_router, note_router
+from database import router
+from src.admission import AdmissionMiddleware, admission
+from src.cache import cache_router
+from src.health import InFlightMiddleware, drain_on_exit, health, health_router
+from src.monitoring import QueryTimingMiddleware, monitoring_router
+from src.notes.cache import cache_invalidations
+from src.notes.endpoints import board_router, note_router, warm_up_statements
+from src.notes.events import board_events
+from src.notes.jobs import job_queue, job_router
+from src.notes.leaderboard import leaderboard
+from src.notes.partitions import partition_maintenance
+from src.notes.view_counter import view_counter
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await router.warm_up(config.settings.DATABASE_POOL_WARMUP, warm_up_statements())
+    await cache_invalidations.start()
+    view_counter.start()
+    leaderboard.start()
+    router.start()
+    partition_maintenance.start()
+    job_queue.start()
+    health.state = "ready"
+    yield
+    health.state = "draining"
+    await job_queue.stop()
+    await partition_maintenance.stop()
+    await router.stop()
+    await leaderboard.stop()
+    await view_counter.stop()
+    await board_events.stop()
+    await cache_invalidations.stop()
+    await router.dispose()
+
+
+# Fails readiness probes and ends event streams when a shutdown signal arrives,
+# before uvicorn stops accepting requests
+health.on_draining(board_events.close)
+drain_on_exit(uvicorn.Server, config.settings.SHUTDOWN_DRAIN_DELAY)
 
 app = FastAPI(
     title=config.settings.PROJECT_NAME,
@@ -11,9 +53,14 @@ app = FastAPI(
     description=config.settings.DESCRIPTION,
     openapi_url="/openapi.json",
     docs_url="/",
+    lifespan=lifespan,
 )
 app.include_router(note_router, prefix="/note")
 app.include_router(board_router, prefix="/board")
+app.include_router(job_router, prefix="/jobs")
+app.include_router(cache_router, prefix="/cache")
+app.include_router(monitoring_router, prefix="/metrics")
+app.include_router(health_router, prefix="/health")
 
 
 # Sets all CORS enabled origins
@@ -27,3 +74,14 @@ app.add_middleware(
 
 # Guards against HTTP Host Header attacks
 app.add_middleware(TrustedHostMiddleware, allowed_hosts=config.settings.ALLOWED_HOSTS)
+
+# Records queries of each request, to time the whole request
+app.add_middleware(QueryTimingMiddleware)
+
+# Sheds load before it queues for connections, outside of query timing so that
+# timings are of admitted requests
+if config.settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+
+# Counts requests in flight, outermost so that whole requests are counted
+app.add_middleware(InFlightMiddleware)
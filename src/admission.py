@@ -0,0 +1,233 @@
+import asyncio
+import itertools
+import time
+from collections import Counter
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+import config
+
+# Lower runs first
+READ, WRITE, BULK = range(3)
+
+# Reads which are posted for the size of their bodies
+READ_ROUTES = {"batch_get_notes", "batch_get_boards"}
+BULK_ROUTES = {
+    "create_new_notes",
+    "link_notes_to_board",
+    "unlink_notes_from_board",
+    "delete_board",
+}
+# Probes and metrics have to answer under load, streams hold no connection
+# while they wait and would hold a slot for as long as they are open
+EXEMPT_ROUTES = {
+    "get_liveness",
+    "get_readiness",
+    "get_metrics",
+    "get_pool_stats",
+    "get_cache_stats",
+    "stream_board_notes",
+    "stream_board_events",
+}
+
+
+class Waiter:
+    """Request waiting in the queue, resolved with whether it was admitted."""
+
+    __slots__ = ("priority", "sequence", "route", "deadline", "future")
+
+    def __init__(self, priority: int, sequence: int, route: str, deadline: float):
+        self.priority = priority
+        self.sequence = sequence
+        self.route = route
+        self.deadline = deadline
+        self.future: asyncio.Future[bool] = asyncio.get_running_loop().create_future()
+
+    def order(self) -> tuple[int, int]:
+        return self.priority, self.sequence
+
+
+class AdmissionController:
+    """Limits requests running at once and sheds the ones which cannot run soon.
+
+    At most ``limit`` requests run at once, and at most ``route_limit`` of one
+    route, so that a slow route cannot take all connections of the pool. Other
+    requests wait in a queue of ``queue_size``, reads before writes before bulk
+    writes, for up to ``queue_timeout`` seconds. When the queue is full, the
+    request of the lowest priority is rejected.
+
+    The limit adapts to latency of reads and writes: it shrinks by ``backoff``
+    with every one slower than ``latency_target`` and grows by one per limit
+    ones under it, between ``min_limit`` and ``max_limit``. Bulk writes are
+    slow by design, so their latency is left out.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int,
+        route_limit: int,
+        queue_size: int,
+        queue_timeout: float,
+        latency_target: float,
+        backoff: float = 0.9,
+    ) -> None:
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.route_limit = route_limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.limit = float(max_limit)
+        self.running = 0
+        self.rejected = 0
+        self._running_routes: Counter[str] = Counter()
+        self._waiters: list[Waiter] = []
+        self._sequence = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _can_run(self, route: str) -> bool:
+        return (
+            self.running < int(self.limit)
+            and self._running_routes[route] < self.route_limit
+        )
+
+    def _start(self, route: str) -> None:
+        self.running += 1
+        self._running_routes[route] += 1
+
+    async def acquire(self, route: str, priority: int) -> bool:
+        """Waits until the request may run and tells whether it was admitted."""
+
+        # Waiters which could run were woken when their slot freed up
+        if self._can_run(route):
+            self._start(route)
+            return True
+        if len(self._waiters) >= self.queue_size:
+            lowest = max(self._waiters, key=Waiter.order)
+            if lowest.priority <= priority:
+                self.rejected += 1
+                return False
+            self._waiters.remove(lowest)
+            self.rejected += 1
+            lowest.future.set_result(False)
+
+        waiter = Waiter(
+            priority, next(self._sequence), route, time.monotonic() + self.queue_timeout
+        )
+        self._waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(waiter.future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._waiters.remove(waiter)
+            self.rejected += 1
+            return False
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                if waiter.future.result():
+                    self.release(route, None)
+            raise
+
+    def release(self, route: str, latency: float | None, priority: int = READ) -> None:
+        """Ends a request admitted for route and adapts the limit to its latency."""
+
+        self.running -= 1
+        self._running_routes[route] -= 1
+        if latency is not None and priority != BULK:
+            if latency > self.latency_target:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def _wake(self) -> None:
+        while True:
+            now = time.monotonic()
+            eligible = [
+                waiter
+                for waiter in self._waiters
+                if waiter.deadline > now and self._can_run(waiter.route)
+            ]
+            if not eligible:
+                return
+            waiter = min(eligible, key=Waiter.order)
+            self._waiters.remove(waiter)
+            self._start(waiter.route)
+            waiter.future.set_result(True)
+
+
+def route_of(scope: Scope) -> str | None:
+    """Returns name of the route matching the request, if any."""
+
+    for route in scope["app"].routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.name
+    return None
+
+
+def priority_of(route: str, method: str) -> int:
+    if route in BULK_ROUTES:
+        return BULK
+    if method in ("GET", "HEAD") or route in READ_ROUTES:
+        return READ
+    return WRITE
+
+
+class AdmissionMiddleware:
+    """Runs HTTP requests through the admission controller.
+
+    Requests which are not admitted fail fast with 503 and Retry-After.
+    """
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController) -> None:
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        route = route_of(scope) if scope["type"] == "http" else None
+        if route is None or route in EXEMPT_ROUTES:
+            await self.app(scope, receive, send)
+            return
+
+        priority = priority_of(route, scope["method"])
+        if not await self.controller.acquire(route, priority):
+            response = JSONResponse(
+                {"detail": [{"msg": "The server is overloaded, retry later."}]},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(config.settings.ADMISSION_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+        start = time.monotonic()
+        latency = None
+        try:
+            await self.app(scope, receive, send)
+            latency = time.monotonic() - start
+        finally:
+            self.controller.release(route, latency, priority)
+
+
+# Connections kept by the primary pool, which all writes share, bound requests run
+# at once, so that admitted ones do not wait for a connection. Overflow ones are
+# closed as they are returned, so they are left to exempt routes and background
+# tasks rather than opened for every request
+POOL_CONNECTIONS = config.settings.DATABASE_POOL_SIZE
+
+admission = AdmissionController(
+    max_limit=POOL_CONNECTIONS,
+    min_limit=min(config.settings.ADMISSION_MIN_LIMIT, POOL_CONNECTIONS),
+    route_limit=max(1, int(POOL_CONNECTIONS * config.settings.ADMISSION_ROUTE_SHARE)),
+    queue_size=config.settings.ADMISSION_QUEUE_SIZE,
+    queue_timeout=config.settings.ADMISSION_QUEUE_TIMEOUT,
+    latency_target=config.settings.ADMISSION_LATENCY_TARGET,
+)
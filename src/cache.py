@@ -0,0 +1,144 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from fastapi import APIRouter
+from pydantic import BaseModel
+
+import config
+
+cache_router = APIRouter()
+
+
+class CacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+
+
+class CacheBackend(ABC):
+    """Interface of a key-value cache storing JSON-compatible values."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Any | None:
+        """Returns cached value or None if key is missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, generation: int | None = None) -> None:
+        """Caches value under key, unless key changed generation since generation.
+
+        Values loaded before a concurrent delete of their key are thus dropped.
+        """
+
+    @abstractmethod
+    async def generation(self, key: str) -> int:
+        """Returns generation of key, to be read before loading its value.
+
+        Generations are opaque to callers, which only hand them back to set().
+        They grow with every delete of the key.
+        """
+
+    @abstractmethod
+    async def update(self, key: str, change: Callable[[Any], Any]) -> None:
+        """Replaces value of key with change of it, if key is cached.
+
+        Neither the generation nor the expiry of key change.
+        """
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        """Removes keys from cache and starts a new generation of each."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Removes all keys from cache."""
+
+    @abstractmethod
+    def stats(self) -> CacheStats:
+        """Returns hit, miss and eviction counters."""
+
+
+class MemoryCache(CacheBackend):
+    """In-process cache evicting least recently used and expired entries."""
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._stats = CacheStats()
+        # Generations of the max_size most recently deleted keys, other keys are
+        # of the floor generation, which is raised to the ones forgotten
+        self._generations: OrderedDict[str, int] = OrderedDict()
+        self._floor = 0
+        self._last_generation = 0
+
+    async def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._stats.misses += 1
+            self._stats.evictions += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any, generation: int | None = None) -> None:
+        if generation is not None and generation != self._generation(key):
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+
+    async def generation(self, key: str) -> int:
+        return self._generation(key)
+
+    async def update(self, key: str, change: Callable[[Any], Any]) -> None:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries[key] = (entry[0], change(entry[1]))
+
+    def _generation(self, key: str) -> int:
+        return self._generations.get(key, self._floor)
+
+    def _next_generation(self) -> int:
+        self._last_generation += 1
+        return self._last_generation
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+            self._generations[key] = self._next_generation()
+            self._generations.move_to_end(key)
+        while len(self._generations) > self.max_size:
+            _, generation = self._generations.popitem(last=False)
+            self._floor = max(self._floor, generation)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._generations.clear()
+        self._floor = self._next_generation()
+
+    def stats(self) -> CacheStats:
+        return self._stats.model_copy(update={"size": len(self._entries)})
+
+
+cache: CacheBackend = MemoryCache(
+    max_size=config.settings.CACHE_MAX_SIZE, ttl=config.settings.CACHE_TTL
+)
+
+
+@cache_router.get("/stats", response_model=CacheStats, status_code=200)
+async def get_cache_stats():
+    """Returns cache hit, miss and eviction counters."""
+
+    return cache.stats()
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from collections.abc import Callable
+from types import FrameType
+from typing import Literal
+
+import uvicorn
+from fastapi import APIRouter, Response, status
+from pydantic import BaseModel
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+health_router = APIRouter()
+
+
+class HealthStatus(BaseModel):
+    state: Literal["starting", "ready", "draining"]
+    in_flight: int
+
+
+class Health:
+    """State of this process for probes of the load balancer and its requests.
+
+    A process is ready once its connections are warmed up and stops being ready
+    when it is told to shut down, while it still serves requests.
+    """
+
+    def __init__(self) -> None:
+        self.state: Literal["starting", "ready", "draining"] = "starting"
+        self.in_flight = 0
+        self._on_draining: list[Callable[[], None]] = []
+        self._draining: asyncio.Task | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def request_started(self) -> None:
+        self.in_flight += 1
+
+    def request_finished(self) -> None:
+        self.in_flight -= 1
+
+    def on_draining(self, callback: Callable[[], None]) -> None:
+        """Registers callback ending long lived requests once draining starts."""
+
+        self._on_draining.append(callback)
+
+    async def drain(self, delay: float) -> None:
+        """Stops being ready and keeps serving requests for delay seconds.
+
+        Load balancers stop sending requests to the process in the meantime,
+        before the server stops accepting them and waits for the ones in flight.
+        """
+
+        self.state = "draining"
+        for callback in self._on_draining:
+            callback()
+        await asyncio.sleep(delay)
+
+    def status(self) -> HealthStatus:
+        return HealthStatus(state=self.state, in_flight=self.in_flight)
+
+
+health = Health()
+
+
+def drain_on_exit(server_class: type[uvicorn.Server], delay: float) -> None:
+    """Makes servers drain for delay seconds before they handle a shutdown signal.
+
+    Uvicorn stops accepting connections and waits for open ones before the
+    lifespan shuts down, too late to fail readiness probes or to end event
+    streams, so its signal handler is wrapped. A second signal shuts down at once.
+    """
+
+    handle_exit = server_class.handle_exit
+
+    def drain_then_exit(
+        server: uvicorn.Server, sig: int, frame: FrameType | None
+    ) -> None:
+        if health.state != "ready":
+            handle_exit(server, sig, frame)
+            return
+        logger.info("Draining for %s seconds before shutting down", delay)
+        health._draining = asyncio.get_running_loop().create_task(health.drain(delay))
+        health._draining.add_done_callback(lambda _: handle_exit(server, sig, frame))
+
+    server_class.handle_exit = drain_then_exit  # type: ignore[method-assign]
+
+
+class InFlightMiddleware:
+    """Counts HTTP requests in flight, reported by the probes."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        health.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            health.request_finished()
+
+
+@health_router.get("/live", response_model=HealthStatus, status_code=200)
+async def get_liveness():
+    """Responds while the process serves requests, also when it is not ready."""
+
+    return health.status()
+
+
+@health_router.get(
+    "/ready",
+    response_model=HealthStatus,
+    status_code=200,
+    responses={503: {"model": HealthStatus}},
+)
+async def get_readiness(response: Response):
+    """Responds with 503 while the process warms up or drains."""
+
+    if not health.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return health.status()
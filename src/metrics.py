@@ -0,0 +1,119 @@
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Sequence
+from contextvars import ContextVar
+
+from pydantic import BaseModel
+
+# Upper bounds in seconds, from 1ms up to 10s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# Characters of the slowest statement kept in the Server-Timing header
+SLOWEST_STATEMENT_LENGTH = 120
+
+
+class HistogramSnapshot(BaseModel):
+    buckets: dict[str, int]
+    sum: float
+    count: int
+
+
+class Histogram:
+    """Cumulative histogram of observed values, by default durations in seconds."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> list[tuple[str, int]]:
+        """Returns counts of observations less than or equal to each bucket."""
+
+        result = []
+        total = 0
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], self._counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def snapshot(self) -> HistogramSnapshot:
+        return HistogramSnapshot(
+            buckets=dict(self.cumulative_counts()), sum=self.sum, count=self.count
+        )
+
+
+def quote(statement: str) -> str:
+    """Returns statement shortened and escaped for a quoted header parameter."""
+
+    statement = " ".join(statement.split())
+    if len(statement) > SLOWEST_STATEMENT_LENGTH:
+        statement = statement[: SLOWEST_STATEMENT_LENGTH - 3] + "..."
+    statement = statement.encode("ascii", "replace").decode()
+    return statement.replace("\\", "\\\\").replace('"', '\\"')
+
+
+class RequestStats:
+    """Database usage of one request."""
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.db_time = 0.0
+        self.pool_wait = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: str | None = None
+
+    def record_query(self, statement: str, duration: float) -> None:
+        self.queries += 1
+        self.db_time += duration
+        if duration >= self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+
+    def server_timing(self, total: float) -> str:
+        """Returns value of Server-Timing header with durations in milliseconds.
+
+        The slowest statement is described by its start, on a single line.
+        """
+
+        slowest = f"db-slowest;dur={self.slowest_time * 1000:.2f}"
+        if self.slowest_statement:
+            slowest += f';desc="{quote(self.slowest_statement)}"'
+        return ", ".join(
+            [
+                f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"',
+                slowest,
+                f"db-pool;dur={self.pool_wait * 1000:.2f}",
+                f"total;dur={total * 1000:.2f}",
+            ]
+        )
+
+
+# Stats of the request being handled, set by QueryTimingMiddleware
+request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+class RouteMetrics:
+    """Histograms of request duration and database usage of one route."""
+
+    def __init__(self) -> None:
+        self.duration = Histogram()
+        self.db_time = Histogram()
+        self.pool_wait = Histogram()
+        self.queries = Histogram(buckets=QUERY_COUNT_BUCKETS)
+
+    def observe(self, duration: float, stats: RequestStats) -> None:
+        self.duration.observe(duration)
+        self.db_time.observe(stats.db_time)
+        self.pool_wait.observe(stats.pool_wait)
+        self.queries.observe(stats.queries)
+
+
+route_metrics: defaultdict[str, RouteMetrics] = defaultdict(RouteMetrics)
@@ -0,0 +1,142 @@
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from database import PoolStats, async_engine
+from src.admission import admission
+from src.cache import cache
+from src.metrics import Histogram, RequestStats, request_stats, route_metrics
+from src.notes.cache import single_flight
+from src.notes.events import board_events
+
+monitoring_router = APIRouter()
+
+
+class QueryTimingMiddleware:
+    """Records database usage of each request.
+
+    Adds a Server-Timing header with the time spent in queries, in the slowest
+    of them and waiting for a connection, and feeds per route histograms.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        start = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing", stats.server_timing(time.perf_counter() - start)
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_stats.reset(token)
+            endpoint = scope.get("endpoint")
+            route = endpoint.__name__ if endpoint else "unmatched"
+            route_metrics[route].observe(time.perf_counter() - start, stats)
+
+
+def format_histogram(name: str, histogram: Histogram, labels: str = "") -> list[str]:
+    """Returns lines of histogram in Prometheus text format."""
+
+    prefix = labels + "," if labels else ""
+    suffix = "{" + labels + "}" if labels else ""
+    return [
+        *(
+            f'{name}_bucket{{{prefix}le="{bound}"}} {count}'
+            for bound, count in histogram.cumulative_counts()
+        ),
+        f"{name}_sum{suffix} {histogram.sum}",
+        f"{name}_count{suffix} {histogram.count}",
+    ]
+
+
+@monitoring_router.get("", response_class=PlainTextResponse, status_code=200)
+async def get_metrics():
+    """Returns metrics of this process in Prometheus text format."""
+
+    lines = []
+    for name, attribute, description in (
+        ("http_request_duration_seconds", "duration", "Request duration"),
+        ("db_request_time_seconds", "db_time", "Time spent in queries per request"),
+        ("db_request_pool_wait_seconds", "pool_wait", "Connection wait per request"),
+        ("db_request_queries", "queries", "Queries per request"),
+    ):
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+        for route, metrics in sorted(route_metrics.items()):
+            lines += format_histogram(
+                name, getattr(metrics, attribute), f'route="{route}"'
+            )
+
+    pool = async_engine.pool
+    lines += ["# TYPE db_pool_wait_seconds histogram"]
+    lines += format_histogram("db_pool_wait_seconds", pool.wait_time)
+    lines += ["# TYPE db_pool_checkout_seconds histogram"]
+    lines += format_histogram("db_pool_checkout_seconds", pool.checkout_latency)
+    lines += [
+        "# TYPE db_pool_checked_out gauge",
+        f"db_pool_checked_out {pool.checkedout()}",
+        "# TYPE db_pool_idle gauge",
+        f"db_pool_idle {pool.checkedin()}",
+    ]
+
+    cache_stats = cache.stats()
+    for name in ("hits", "misses", "evictions"):
+        lines += [
+            f"# TYPE cache_{name}_total counter",
+            f"cache_{name}_total {getattr(cache_stats, name)}",
+        ]
+    lines += ["# TYPE cache_size gauge", f"cache_size {cache_stats.size}"]
+
+    lines += [
+        "# TYPE single_flight_calls_total counter",
+        f"single_flight_calls_total {single_flight.calls}",
+        "# TYPE single_flight_executions_total counter",
+        f"single_flight_executions_total {single_flight.executions}",
+        "# HELP single_flight_coalescing_ratio Share of reads joining one in flight",
+        "# TYPE single_flight_coalescing_ratio gauge",
+        f"single_flight_coalescing_ratio {single_flight.coalescing_ratio}",
+    ]
+
+    lines += [
+        "# TYPE board_event_subscribers gauge",
+        f"board_event_subscribers {board_events.subscribers}",
+        "# TYPE board_event_evictions_total counter",
+        f"board_event_evictions_total {board_events.evictions}",
+    ]
+
+    lines += [
+        "# HELP admission_limit Requests allowed to run at once",
+        "# TYPE admission_limit gauge",
+        f"admission_limit {int(admission.limit)}",
+        "# TYPE admission_running gauge",
+        f"admission_running {admission.running}",
+        "# TYPE admission_queued gauge",
+        f"admission_queued {admission.queued}",
+        "# TYPE admission_rejected_total counter",
+        f"admission_rejected_total {admission.rejected}",
+    ]
+
+    return "\n".join(lines) + "\n"
+
+
+@monitoring_router.get("/pool", response_model=PoolStats, status_code=200)
+async def get_pool_stats():
+    """Returns connection pool usage and checkout timings of this process."""
+
+    return async_engine.pool.stats()
@@ -0,0 +1,96 @@
+from collections.abc import AsyncGenerator, AsyncIterable, Sequence
+from typing import TypeVar
+
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+
+T = TypeVar("T")
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def request_body_schema(model: type[BaseModel]) -> dict:
+    """Returns OpenAPI request body of a JSON array or NDJSON stream of model."""
+
+    schema = model.model_json_schema()
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": schema}},
+                NDJSON_MEDIA_TYPE: {"schema": schema},
+            },
+        }
+    }
+
+
+def _error_message(error: ValidationError) -> str:
+    return "; ".join(
+        ".".join(map(str, item["loc"])) + ": " + item["msg"]
+        if item["loc"]
+        else item["msg"]
+        for item in error.errors()
+    )
+
+
+async def read_items(
+    request: Request, model: type[ModelT]
+) -> AsyncGenerator[ModelT | str, None]:
+    """Yields items of a JSON array or NDJSON request body validated as model.
+
+    Items which fail validation are yielded as error messages instead, so that
+    they can be reported without rejecting the whole request. NDJSON bodies are
+    parsed while they are received.
+    """
+
+    if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+        buffer = b""
+        async for chunk in request.stream():
+            *lines, buffer = (buffer + chunk).split(b"\n")
+            for line in lines:
+                if line.strip():
+                    try:
+                        yield model.model_validate_json(line)
+                    except ValidationError as error:
+                        yield _error_message(error)
+        if buffer.strip():
+            try:
+                yield model.model_validate_json(buffer)
+            except ValidationError as error:
+                yield _error_message(error)
+        return
+
+    try:
+        items = await request.json()
+    except ValueError:
+        items = None
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[{"msg": "Request body must be a JSON array."}],
+        )
+    for item in items:
+        try:
+            yield model.model_validate(item)
+        except ValidationError as error:
+            yield _error_message(error)
+
+
+async def chunked(items: AsyncIterable[T], size: int) -> AsyncGenerator[list[T], None]:
+    """Groups items into lists of at most size items."""
+
+    chunk = []
+    async for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def batches(items: Sequence[T], size: int) -> list[Sequence[T]]:
+    """Splits items into slices of at most size items."""
+
+    return [items[start : start + size] for start in range(0, len(items), size)]
@@ -0,0 +1,268 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections.abc import Iterable
+from typing import Any
+
+import asyncpg
+
+import config
+from database import async_engine
+from src.cache import cache
+from src.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Reads of notes and boards in flight, by their cache keys
+single_flight = SingleFlight()
+
+# Keys per notification, which payloads are limited to 8000 bytes
+INVALIDATION_CHUNK_SIZE = 200
+
+# Monotonic times of the invalidations of keys within the read-your-writes
+# window, oldest first, and of the last invalidation of all keys
+_invalidated_at: dict[str, float] = {}
+_all_invalidated_at = float("-inf")
+
+
+def note_key(note_id: int) -> str:
+    return f"note:{note_id}"
+
+
+def board_key(board_id: int) -> str:
+    return f"board:{board_id}"
+
+
+async def drop(keys: list[str] | None) -> None:
+    """Removes keys, or all keys when None, from the cache of this process."""
+
+    record_invalidation(keys)
+    if keys is None:
+        single_flight.forget_all()
+        await cache.clear()
+    else:
+        single_flight.forget(*keys)
+        await cache.delete(*keys)
+
+
+def record_invalidation(keys: list[str] | None) -> None:
+    global _all_invalidated_at
+
+    now = time.monotonic()
+    if keys is None:
+        _all_invalidated_at = now
+        _invalidated_at.clear()
+        return
+    for key in keys:
+        _invalidated_at.pop(key, None)
+        _invalidated_at[key] = now
+    # Forgets the invalidations which are out of the window
+    window_start = now - config.settings.READ_YOUR_WRITES_WINDOW
+    while _invalidated_at:
+        oldest = next(iter(_invalidated_at))
+        if _invalidated_at[oldest] >= window_start:
+            break
+        del _invalidated_at[oldest]
+
+
+def recently_invalidated(key: str) -> bool:
+    """Tells whether key was invalidated within the read-your-writes window."""
+
+    invalidated_at = _invalidated_at.get(key, _all_invalidated_at)
+    return time.monotonic() - invalidated_at < config.settings.READ_YOUR_WRITES_WINDOW
+
+
+class CacheInvalidations:
+    """Sends invalidations of cache keys to the other processes over NOTIFY.
+
+    Every process listens on one dedicated connection, which sends its own
+    invalidations as well. While it is not connected, other processes may miss
+    invalidations of this one and the other way around, so the local cache is
+    cleared whenever the connection is lost and not used until it is back.
+    """
+
+    def __init__(self, channel: str, reconnect_interval: float = 1.0) -> None:
+        self.channel = channel
+        self.reconnect_interval = reconnect_interval
+        self.origin = uuid.uuid4().hex
+        self._connection: asyncpg.Connection | None = None
+        self._send_lock = asyncio.Lock()
+        self._lost = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._drops: set[asyncio.Task] = set()
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None
+
+    @property
+    def connected(self) -> bool:
+        return self._connection is not None and not self._connection.is_closed()
+
+    async def publish(self, keys: list[str] | None) -> None:
+        """Sends keys, or None for all keys, to the other processes."""
+
+        if not self.connected:
+            return
+        chunks = [None] if keys is None else chunked(keys, INVALIDATION_CHUNK_SIZE)
+        try:
+            async with self._send_lock:
+                for chunk in chunks:
+                    payload = json.dumps({"origin": self.origin, "keys": chunk})
+                    await self._connection.execute(
+                        "SELECT pg_notify($1, $2)", self.channel, payload
+                    )
+        except (asyncpg.PostgresError, OSError, AttributeError):
+            logger.exception("Failed to publish cache invalidations")
+
+    def _dispatch(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+            origin, keys = message["origin"], message["keys"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Dropped malformed cache invalidation: %s", payload)
+            return
+        if origin != self.origin:
+            self._drop(keys)
+
+    def _drop(self, keys: list[str] | None) -> None:
+        task = asyncio.create_task(drop(keys))
+        self._drops.add(task)
+        task.add_done_callback(self._drops.discard)
+
+    def _on_termination(self, connection) -> None:
+        logger.warning("Cache invalidations connection lost, clearing the cache")
+        self._connection = None
+        self._lost.set()
+        self._drop(None)
+
+    async def _connect(self) -> None:
+        connection = await asyncpg.connect(
+            **async_engine.url.translate_connect_args(username="user")
+        )
+        connection.add_termination_listener(self._on_termination)
+        await connection.add_listener(self.channel, self._dispatch)
+        self._lost.clear()
+        self._connection = connection
+
+    async def _run(self) -> None:
+        while True:
+            if not self.connected:
+                try:
+                    await self._connect()
+                except (asyncpg.PostgresError, OSError):
+                    logger.exception("Failed to listen for cache invalidations")
+                    await asyncio.sleep(self.reconnect_interval)
+                    continue
+                # Invalidations may have been missed while disconnected
+                await drop(None)
+            await self._lost.wait()
+
+    async def start(self) -> None:
+        """Connects and keeps listening in the background."""
+
+        if self._task is None:
+            try:
+                await self._connect()
+            except (asyncpg.PostgresError, OSError):
+                logger.exception("Failed to listen for cache invalidations")
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            connection.remove_termination_listener(self._on_termination)
+            await connection.close()
+
+
+def chunked(keys: list[str], size: int) -> list[list[str]]:
+    return [keys[start : start + size] for start in range(0, len(keys), size)]
+
+
+cache_invalidations = CacheInvalidations(config.settings.CACHE_INVALIDATIONS_CHANNEL)
+
+
+def cache_available() -> bool:
+    """Tells whether the cache can be used, i.e. is kept in sync across processes.
+
+    A process which does not listen for invalidations, like in tests and
+    scripts which do not run the lifespan, is taken to be the only one.
+    """
+
+    return not cache_invalidations.started or cache_invalidations.connected
+
+
+async def fill(key: str, value: Any, generation: int, replica: bool) -> None:
+    """Caches value loaded since generation of key, if the cache can be used.
+
+    Replicas may not have caught up with the change which invalidated key, so
+    values read from them are not cached within the read-your-writes window
+    after it. Otherwise a stale value would be served to all clients.
+    """
+
+    if not cache_available():
+        return
+    if replica and recently_invalidated(key):
+        return
+    await cache.set(key, value, generation)
+
+
+async def invalidate(
+    note_ids: Iterable[int | None] = (), board_ids: Iterable[int | None] = ()
+) -> None:
+    """Removes cached notes and boards, including boards' note lists.
+
+    Reads in flight are forgotten as well, so that later reads do not join ones
+    which may have started before the change. Those reads do not cache what
+    they loaded either, as deleting starts a new generation of the keys. The
+    other processes are told to remove the keys as well.
+    """
+
+    keys = [
+        *(note_key(note_id) for note_id in note_ids if note_id is not None),
+        *(board_key(board_id) for board_id in board_ids if board_id is not None),
+    ]
+    await drop(keys)
+    await cache_invalidations.publish(keys)
+
+
+async def update_views(
+    views_counts: dict[int, int], board_ids: Iterable[int | None]
+) -> None:
+    """Sets views counts of cached notes, including the notes of cached boards.
+
+    Views change nothing else of notes and boards, so their entries are kept
+    rather than invalidated by every flush of views. Other processes keep the
+    counts they cached until they flush views of the notes themselves, which
+    they count as they serve the notes.
+    """
+
+    def with_views_count(note: dict) -> dict:
+        views_count = views_counts.get(note["id"])
+        if views_count is None or "views_count" not in note:
+            return note
+        return {**note, "views_count": views_count}
+
+    def with_notes_views_counts(board: dict) -> dict:
+        return {**board, "notes": list(map(with_views_count, board["notes"]))}
+
+    for note_id in views_counts:
+        await cache.update(note_key(note_id), with_views_count)
+    for board_id in set(board_ids) - {None}:
+        await cache.update(board_key(board_id), with_notes_views_counts)
+
+
+async def invalidate_all() -> None:
+    """Removes all cached notes and boards in all processes."""
+
+    await drop(None)
+    await cache_invalidations.publish(None)
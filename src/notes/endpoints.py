@@ -1,22 +1,425 @@
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Awaitable, Callable
 from datetime import datetime
+from typing import Literal, TypeVar
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import orjson
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.requests import HTTPConnection
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import (
+    ARRAY,
+    CompoundSelect,
+    Executable,
+    Float,
+    Integer,
+    Row,
+    Select,
+    any_,
+    case,
+    delete,
+    false,
+    func,
+    insert,
+    literal,
+    select,
+    true,
+    union_all,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from database import async_session
+import config
+from database import async_session, router
+from src.cache import cache
 from src.notes import schemas
-from src.notes.models import Board, Note
+from src.notes.bulk import batches, chunked, read_items, request_body_schema
+from src.notes.cache import board_key, fill, invalidate, note_key, single_flight
+from src.notes.etags import board_etag, etag_matches, if_match_versions, note_etag
+from src.notes.events import board_events, bulk_link_events, link_events, notify
+from src.notes.fields import Fields, fields_query, sparse, with_keys
+from src.notes.jobs import job_queue
+from src.notes.leaderboard import leaderboard
+from src.notes.models import Board, Note, NoteArchive
+from src.notes.pagination import after_cursor, next_cursor, paginate
+from src.notes.payloads import (
+    ARCHIVED_NOTE_COLUMNS,
+    NOTE_COLUMNS,
+    add_unflushed_views,
+    board_columns,
+    board_payload,
+    board_summary_payload,
+    note_columns,
+    note_payload,
+)
+from src.notes.view_counter import view_counter
 
 note_router = APIRouter()
 board_router = APIRouter()
 
+T = TypeVar("T")
+
+note_fields = fields_query(schemas.Note)
+# Notes of a board are a relationship, which is loaded only with include=notes
+board_fields = fields_query(schemas.Board, exclude=("notes", "notes_next_cursor"))
+board_summary_fields = fields_query(schemas.BoardSummary)
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
+
+# Set by mutations, so that the client reads its own writes from the primary
+READ_YOUR_WRITES_COOKIE = "read_primary"
+
+
+async def get_session(response: Response) -> AsyncGenerator[AsyncSession, None]:
+    if router.replicas:
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE,
+            "1",
+            max_age=config.settings.READ_YOUR_WRITES_WINDOW,
+            httponly=True,
+        )
     async with async_session() as session:
         yield session
 
 
+def is_sticky(connection: HTTPConnection) -> bool:
+    """Tells whether the client has to read its own writes from the primary."""
+
+    return READ_YOUR_WRITES_COOKIE in connection.cookies
+
+
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with router.read_session(is_sticky(request)) as session:
+        yield session
+
+
+async def coalesce(key: str, read: Callable[[], Awaitable[T]], request: Request) -> T:
+    """Shares the read with concurrent identical reads of this process.
+
+    Reads of clients which read their own writes are not shared, as they go to
+    the primary.
+    """
+
+    if is_sticky(request):
+        return await read()
+    return await single_flight.do(key, read)
+
+
+def note_query(note_id: int) -> CompoundSelect:
+    """Returns query of a live or archived note and whether it is archived."""
+
+    return union_all(
+        select(*NOTE_COLUMNS, false().label("archived")).where(Note.id == note_id),
+        select(*ARCHIVED_NOTE_COLUMNS, true()).where(NoteArchive.id == note_id),
+    ).limit(1)
+
+
+def board_query(board_id: int) -> Select:
+    return select(
+        Board.id,
+        Board.name,
+        Board.notes_count,
+        Board.version,
+        Board.created_at,
+        Board.updated_at,
+    ).where(Board.id == board_id)
+
+
+def board_notes_page_query(board_id: int) -> Select:
+    return paginate(
+        select(*NOTE_COLUMNS).where(Note.board_id == board_id),
+        [Note.id],
+        None,
+        config.settings.BOARD_NOTES_PAGE_SIZE,
+    )
+
+
+def warm_up_statements() -> list[Executable]:
+    """Returns statements of the hottest reads, to be prepared on new connections."""
+
+    return [note_query(0), board_query(0), board_notes_page_query(0)]
+
+
+async def read_note(note_id: int, sticky: bool) -> tuple[dict, bool]:
+    """Reads note payload with a session of its own and whether it is archived.
+
+    Falls back to archived notes in the same query, which probes the archive
+    only when the note is not live. Only live notes are cached, so that notes
+    in the cache can be counted views of.
+    """
+
+    generation = await cache.generation(note_key(note_id))
+    async with router.read_session(sticky) as session:
+        row = (await session.execute(note_query(note_id))).first()
+        replica = router.is_replica(session)
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=[{"msg": "A note with this id does not exist."}],
+        )
+    note = note_payload(row)
+    if not row.archived:
+        await fill(note_key(note_id), note, generation, replica)
+    return note, row.archived
+
+
+def version_matches(version, versions: list[int] | None) -> list:
+    """Returns criteria of a conditional update allowing versions, if any."""
+
+    if versions is None:
+        return []
+    return [version == any_(literal(versions, ARRAY(Integer)))]
+
+
+def precondition_failed() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail=[{"msg": "The resource has changed since If-Match was read."}],
+    )
+
+
+async def note_missing(session: AsyncSession, note_id: int) -> HTTPException:
+    """Returns error for a note which is not live, telling archived ones apart."""
+
+    if await session.scalar(select(NoteArchive.id).where(NoteArchive.id == note_id)):
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=[{"msg": "Archived notes are read-only."}],
+        )
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=[{"msg": "A note with this id does not exist."}],
+    )
+
+
+async def read_board(board_id: int, cached: dict | None, sticky: bool) -> dict:
+    """Returns payload of a board, loading and caching it if it is not cached."""
+
+    if cached is not None:
+        return cached
+    generation = await cache.generation(board_key(board_id))
+    async with router.read_session(sticky) as session:
+        board = (await session.execute(board_query(board_id))).first()
+        if not board:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=[{"msg": "A board with this id does not exist."}],
+            )
+        cached = await load_board_notes_page(session, board)
+        replica = router.is_replica(session)
+    await fill(board_key(board_id), cached, generation, replica)
+    return cached
+
+
+async def render_board(
+    board_id: int, cached: dict | None, sticky: bool
+) -> tuple[int, bytes]:
+    """Returns version and JSON body of a board, loading and caching it if needed."""
+
+    board = await read_board(board_id, cached, sticky)
+    body = orjson.dumps({**board, "notes": add_unflushed_views(board["notes"])})
+    return board["version"], body
+
+
+async def read_board_fields(
+    board_id: int, fields: tuple[str, ...], sticky: bool
+) -> tuple[int, dict]:
+    """Returns version and payload of just the fields of a board.
+
+    Only columns of the board are selected, so that its notes are not loaded.
+    """
+
+    version = [] if "version" in fields else [Board.version]
+    async with router.read_session(sticky) as session:
+        board = (
+            await session.execute(
+                select(*board_columns(fields), *version).where(Board.id == board_id)
+            )
+        ).first()
+    if not board:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=[{"msg": "A board with this id does not exist."}],
+        )
+    return board.version, dict(zip(fields, board))
+
+
+async def load_board_notes_page(session: AsyncSession, board: Board | Row) -> dict:
+    """Loads board payload with the first page of its notes.
+
+    The notes count is the one of the board, which counts archived notes too.
+    """
+
+    keys = [Note.id]
+    limit = config.settings.BOARD_NOTES_PAGE_SIZE
+    rows = (await session.execute(board_notes_page_query(board.id))).all()
+    cursor = next_cursor(rows, keys, limit)
+    return board_payload(board, list(map(note_payload, rows)), cursor)
+
+
+async def get_board_notes_page(session: AsyncSession, board: Board | Row) -> dict:
+    """Builds board payload with the first page of its notes."""
+
+    result = await load_board_notes_page(session, board)
+    result["notes"] = add_unflushed_views(result["notes"])
+    return result
+
+
+async def set_notes_board(
+    session: AsyncSession,
+    note_ids: list[int],
+    board_id: int | None,
+    *criteria,
+) -> dict[int, int | None]:
+    """Sets board of notes by id in chunks, sending events once per chunk.
+
+    Returns previous board ids of updated notes by note id.
+    """
+
+    updated = {}
+    for batch in batches(note_ids, config.settings.BULK_CHUNK_SIZE):
+        previous_note = aliased(Note)
+        previous = (
+            select(previous_note.id, previous_note.board_id)
+            .where(previous_note.id == any_(literal(list(batch), ARRAY(Integer))))
+            .subquery()
+        )
+        rows = await session.execute(
+            update(Note)
+            .where(Note.id == previous.c.id, *criteria)
+            .values(board_id=board_id, version=Note.version + 1)
+            .returning(Note.id, previous.c.board_id)
+            .execution_options(synchronize_session=False)
+        )
+        chunk = {row[0]: row[1] for row in rows}
+        if events := bulk_link_events(board_id, chunk):
+            await session.execute(select(*events))
+        updated.update(chunk)
+    return updated
+
+
+def touch_board(board_id: int):
+    """Returns a statement bumping board's updated_at and version.
+
+    The statement returns the board.
+    """
+
+    return (
+        update(Board)
+        .where(Board.id == board_id)
+        .values(updated_at=datetime.now(), version=Board.version + 1)
+        .returning(
+            Board.id,
+            Board.name,
+            Board.notes_count,
+            Board.version,
+            Board.created_at,
+            Board.updated_at,
+        )
+    )
+
+
+def bump_note_board(note_id: int, name: str, *criteria):
+    """Returns a CTE bumping version of the board the note is linked to."""
+
+    note = aliased(Note)
+    return (
+        update(Board)
+        .where(
+            Board.id
+            == select(note.board_id).where(note.id == note_id).scalar_subquery(),
+            *criteria,
+        )
+        # Changes of its notes do not change updated_at of the board itself
+        .values(version=Board.version + 1, updated_at=Board.updated_at)
+        .cte(name)
+    )
+
+
+async def set_note_board(
+    session: AsyncSession, board_id: int, note_id: int, linked: bool
+) -> Row:
+    """Links or unlinks a note in one statement which also touches the board.
+
+    Returns the board and previous board id of the note. Raises 404 when either
+    the board or the note does not exist.
+    """
+
+    board = touch_board(board_id).cte("touched_board")
+    previous_board = bump_note_board(note_id, "previous_board", Board.id != board_id)
+    previous_note = aliased(Note)
+    previous = (
+        select(
+            previous_note.id.label("note_id"),
+            previous_note.board_id.label("previous_board_id"),
+            board,
+        )
+        .join(board, true())
+        .where(previous_note.id == note_id)
+        .subquery()
+    )
+    row = (
+        await session.execute(
+            update(Note)
+            .add_cte(board, previous_board)
+            .where(Note.id == previous.c.note_id)
+            # onupdate default of updated_at is lost when the statement has a CTE
+            .values(
+                board_id=board_id if linked else None,
+                version=Note.version + 1,
+                updated_at=datetime.now(),
+            )
+            .returning(
+                previous.c.id,
+                previous.c.name,
+                # The board was read before triggers counted the note on it
+                (
+                    previous.c.notes_count
+                    + (
+                        case((previous.c.previous_board_id == board_id, 0), else_=1)
+                        if linked
+                        else case(
+                            (previous.c.previous_board_id == board_id, -1), else_=0
+                        )
+                    )
+                ).label("notes_count"),
+                previous.c.version,
+                previous.c.created_at,
+                previous.c.updated_at,
+                previous.c.previous_board_id,
+                *link_events(
+                    board_id if linked else None,
+                    previous.c.note_id,
+                    previous.c.previous_board_id,
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+    ).first()
+    if row is None:
+        await session.rollback()
+        if not await session.scalar(select(Board.id).where(Board.id == board_id)):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=[{"msg": "A board with this id does not exist."}],
+            )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=[{"msg": "A note with this id does not exist."}],
+        )
+    return row
+
+
 @note_router.post("", response_model=schemas.Note, status_code=201)
 async def create_new_note(
     new_note: schemas.NoteCreate,
@@ -32,44 +435,284 @@ async def create_new_note(
     return note
 
 
-@note_router.get("/{note_id}", response_model=schemas.Note, status_code=200)
+@note_router.post(
+    "/bulk",
+    response_model=schemas.NoteBulkCreateResult,
+    status_code=201,
+    openapi_extra=request_body_schema(schemas.NoteCreate),
+)
+async def create_new_notes(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+):
+    """Creates notes from a JSON array or NDJSON stream in one transaction.
+
+    Invalid items are skipped and reported by their index in the request.
+    """
+
+    result = schemas.NoteBulkCreateResult(ids=[])
+    index = 0
+    items = read_items(request, schemas.NoteCreate)
+    async for chunk in chunked(items, config.settings.BULK_CHUNK_SIZE):
+        rows = []
+        for item in chunk:
+            if isinstance(item, str):
+                result.errors.append(schemas.BulkError(index=index, msg=item))
+            else:
+                rows.append({"text": item.text})
+            index += 1
+        if rows:
+            result.ids.extend(
+                await session.scalars(
+                    insert(Note).returning(Note.id, sort_by_parameter_order=True),
+                    rows,
+                )
+            )
+    await session.commit()
+
+    return result
+
+
+@note_router.get("", response_model=schemas.PartialNotePage, status_code=200)
+async def list_notes(
+    board_id: int | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    order_by: Literal["id", "updated_at"] = "id",
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+    fields: Fields = Depends(note_fields),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Returns a page of notes and a cursor for the next one.
+
+    Only the columns of fields are selected.
+    """
+
+    keys = [Note.id] if order_by == "id" else [Note.updated_at, Note.id]
+    query = select(*note_columns(fields), *with_keys(fields, keys))
+    if board_id is not None:
+        query = query.where(Note.board_id == board_id)
+    if created_after is not None:
+        query = query.where(Note.created_at >= created_after)
+    if created_before is not None:
+        query = query.where(Note.created_at < created_before)
+
+    rows = (await session.execute(paginate(query, keys, cursor, limit))).all()
+    cursor = next_cursor(rows, keys, limit)
+
+    return ORJSONResponse(
+        {
+            "items": add_unflushed_views(note_payload(row, fields) for row in rows),
+            "next_cursor": cursor,
+        }
+    )
+
+
+@note_router.get("/search", response_model=schemas.PartialNotePage, status_code=200)
+async def search_notes(
+    q: str = Query(min_length=1, max_length=250),
+    board_id: int | None = None,
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+    fields: Fields = Depends(note_fields),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Returns a page of notes matching web search query q, most relevant first.
+
+    Only the columns of fields are selected.
+    """
+
+    query = func.websearch_to_tsquery("simple", q)
+    # Negated so that the most relevant notes come first in ascending key order
+    rank = (-func.ts_rank_cd(Note.search_vector, query, type_=Float)).label("rank")
+    keys = [rank, Note.id]
+    search = select(*note_columns(fields), rank).where(
+        Note.search_vector.bool_op("@@")(query)
+    )
+    if board_id is not None:
+        search = search.where(Note.board_id == board_id)
+
+    rows = (await session.execute(paginate(search, keys, cursor, limit))).all()
+    cursor = next_cursor(rows, keys, limit)
+
+    return ORJSONResponse(
+        {
+            "items": add_unflushed_views(note_payload(row, fields) for row in rows),
+            "next_cursor": cursor,
+        }
+    )
+
+
+@note_router.get("/top", response_model=schemas.TopNotes, status_code=200)
+async def get_top_notes(
+    board_id: int | None = None,
+    window: str = Query(
+        next(iter(config.settings.LEADERBOARD_WINDOWS)),
+        pattern=rf"^({'|'.join(config.settings.LEADERBOARD_WINDOWS)})$",
+    ),
+    limit: int = Query(10, ge=1, le=config.settings.LEADERBOARD_SIZE),
+):
+    """Returns the most viewed notes of a sliding window, of a board or of all.
+
+    The leaderboard is refreshed in background, so that the database is not
+    read. Views are ranked once they are flushed and the leaderboard refreshed.
+    """
+
+    return schemas.TopNotes(
+        window=window,
+        board_id=board_id,
+        items=leaderboard.top(window, board_id, limit),
+        refreshed_at=leaderboard.refreshed_at.get(window),
+    )
+
+
+@note_router.post(
+    "/batch-get", response_model=schemas.PartialNoteBatch, status_code=200
+)
+async def batch_get_notes(
+    data: schemas.BatchGet,
+    fields: Fields = Depends(note_fields),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Returns notes by ids and the ids which do not exist, counting the views.
+
+    Notes which are not cached are read with one query, falling back to archived
+    ones. Views of archived notes are not counted. Whole notes are read to be
+    cached, and narrowed to fields when they are serialized.
+    """
+
+    ids = list(dict.fromkeys(data.ids))
+    notes = {}
+    generations = {}
+    for note_id in ids:
+        if (note := await cache.get(note_key(note_id))) is not None:
+            notes[note_id] = note
+        else:
+            generations[note_id] = await cache.generation(note_key(note_id))
+    archived = {}
+    if generations:
+        uncached = literal(list(generations), ARRAY(Integer))
+        rows = await session.execute(
+            union_all(
+                select(*NOTE_COLUMNS, false().label("archived")).where(
+                    Note.id == any_(uncached)
+                ),
+                select(*ARCHIVED_NOTE_COLUMNS, true()).where(
+                    NoteArchive.id == any_(uncached)
+                ),
+            )
+        )
+        replica = router.is_replica(session)
+        for row in rows:
+            if row.archived:
+                archived[row.id] = note_payload(row)
+            else:
+                notes[row.id] = note_payload(row)
+                await fill(
+                    note_key(row.id), notes[row.id], generations[row.id], replica
+                )
+
+    items = []
+    for note_id in ids:
+        if note := notes.get(note_id):
+            views = view_counter.add(note_id)
+            note = {**note, "views_count": note["views_count"] + views}
+            items.append(sparse(note, fields))
+        elif note := archived.get(note_id):
+            items.append(sparse(note, fields))
+    return ORJSONResponse(
+        {
+            "items": items,
+            "missing_ids": [
+                note_id
+                for note_id in ids
+                if note_id not in notes and note_id not in archived
+            ],
+        }
+    )
+
+
+@note_router.get("/{note_id}", response_model=schemas.PartialNote, status_code=200)
 async def get_note(
     note_id: int,
-    session: AsyncSession = Depends(get_session),
+    request: Request,
+    if_none_match: str | None = Header(None),
+    fields: Fields = Depends(note_fields),
 ):
-    """Returns note by id."""
+    """Returns live or archived note by id and counts the view.
 
-    note = await session.get(Note, note_id)
-    if not note:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=[{"msg": "A note with this id does not exist."}],
+    Responds with 304 when If-None-Match matches the note, also counting the view.
+    Archived notes are read-only, so their views are not counted. Whole notes are
+    read to be cached, and narrowed to fields when they are serialized.
+    """
+
+    note, archived = await cache.get(note_key(note_id)), False
+    if note is None:
+        note, archived = await coalesce(
+            note_key(note_id), lambda: read_note(note_id, is_sticky(request)), request
         )
-    note.views_count += 1
-    await session.commit()
+    views = 0 if archived else view_counter.add(note_id)
 
-    return note
+    etag = note_etag(note_id, note["version"])
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    return ORJSONResponse(
+        sparse({**note, "views_count": note["views_count"] + views}, fields),
+        headers={"ETag": etag},
+    )
 
 
 @note_router.patch("/{note_id}", response_model=schemas.Note, status_code=200)
 async def update_note(
     note_id: int,
     new_data: schemas.NoteUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
     session: AsyncSession = Depends(get_session),
 ):
-    """Updates note."""
+    """Updates note and bumps version of its board.
 
-    note = await session.get(Note, note_id)
-    if not note:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=[{"msg": "A note with this id does not exist."}],
+    With If-Match, updates the note only if it is still of a version the header
+    matches, and responds with 412 otherwise.
+    """
+
+    versions = if_match_versions(if_match, "note", note_id)
+    note = (
+        await session.execute(
+            update(Note)
+            .add_cte(bump_note_board(note_id, "note_board"))
+            .where(
+                Note.id == note_id,
+                *version_matches(Note.version, versions),
+            )
+            # onupdate default of updated_at is lost when the statement has a CTE
+            .values(
+                **new_data.model_dump(),
+                version=Note.version + 1,
+                updated_at=datetime.now(),
+            )
+            .returning(
+                *NOTE_COLUMNS,
+                Note.board_id,
+                notify("note_updated", Note.board_id, Note.id),
+            )
+            .execution_options(synchronize_session=False)
         )
-    for field in new_data.model_fields:
-        setattr(note, field, getattr(new_data, field))
+    ).first()
+    if not note:
+        if versions is not None and await session.scalar(
+            select(Note.id).where(Note.id == note_id)
+        ):
+            raise precondition_failed()
+        raise await note_missing(session, note_id)
     await session.commit()
+    await invalidate([note_id], [note.board_id])
 
-    return note
+    response.headers["ETag"] = note_etag(note_id, note.version)
+    return add_unflushed_views([note_payload(note)])[0]
 
 
 @note_router.delete("/{note_id}", status_code=204)
@@ -77,16 +720,24 @@ async def delete_note(
     note_id: int,
     session: AsyncSession = Depends(get_session),
 ):
-    """Deletes note."""
+    """Deletes note and bumps version of its board."""
 
-    note = await session.get(Note, note_id)
-    if not note:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=[{"msg": "A note with this id does not exist."}],
+    note = (
+        await session.execute(
+            delete(Note)
+            .add_cte(bump_note_board(note_id, "note_board"))
+            .where(Note.id == note_id)
+            .returning(
+                Note.id, Note.board_id, notify("note_deleted", Note.board_id, Note.id)
+            )
         )
-    await session.delete(note)
+    ).first()
+    if not note:
+        raise await note_missing(session, note_id)
+    await leaderboard.forget(session, [note_id])
     await session.commit()
+    view_counter.discard(note_id)
+    await invalidate([note_id], [note.board_id])
 
 
 @board_router.post("", response_model=schemas.Board, status_code=201)
@@ -100,63 +751,359 @@ async def create_new_board(
 
     session.add(board)
     await session.commit()
-    await session.refresh(board, ["notes"])
-    return board
+    return await get_board_notes_page(session, board)
+
+
+@board_router.get("", response_model=schemas.PartialBoardPage, status_code=200)
+async def list_boards(
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    order_by: Literal["id", "updated_at"] = "id",
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=1000),
+    fields: Fields = Depends(board_summary_fields),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Returns a page of boards with counts of their notes and views.
+
+    Counts are maintained on the board, so the note table is not read. Views
+    which are not yet flushed are not counted. Only the columns of fields are
+    selected.
+    """
+
+    keys = [Board.id] if order_by == "id" else [Board.updated_at, Board.id]
+    query = select(*board_columns(fields), *with_keys(fields, keys))
+    if created_after is not None:
+        query = query.where(Board.created_at >= created_after)
+    if created_before is not None:
+        query = query.where(Board.created_at < created_before)
 
+    rows = (await session.execute(paginate(query, keys, cursor, limit))).all()
+    cursor = next_cursor(rows, keys, limit)
 
-@board_router.get("/{board_id}", response_model=schemas.Board, status_code=200)
+    return ORJSONResponse(
+        {
+            "items": [board_summary_payload(row, fields) for row in rows],
+            "next_cursor": cursor,
+        }
+    )
+
+
+@board_router.post(
+    "/batch-get", response_model=schemas.PartialBoardBatch, status_code=200
+)
+async def batch_get_boards(
+    data: schemas.BatchGet,
+    fields: Fields = Depends(board_summary_fields),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Returns boards by ids without their notes and the ids which do not exist.
+
+    Only the columns of fields are selected.
+    """
+
+    ids = list(dict.fromkeys(data.ids))
+    boards = {
+        row.id: board_summary_payload(row, fields)
+        for row in await session.execute(
+            select(*board_columns(fields)).where(
+                Board.id == any_(literal(ids, ARRAY(Integer)))
+            )
+        )
+    }
+    return ORJSONResponse(
+        {
+            "items": [boards[board_id] for board_id in ids if board_id in boards],
+            "missing_ids": [board_id for board_id in ids if board_id not in boards],
+        }
+    )
+
+
+@board_router.get("/{board_id}", response_model=schemas.PartialBoard, status_code=200)
 async def get_board(
     board_id: int,
-    session: AsyncSession = Depends(get_session),
+    request: Request,
+    if_none_match: str | None = Header(None),
+    fields: Fields = Depends(board_fields),
+    include: Literal["notes"]
+    | None = Query(
+        None,
+        description=(
+            "Relationships to respond with besides fields. Without fields, the"
+            " first page of notes is always included."
+        ),
+    ),
 ):
-    """Returns board by id."""
+    """Returns board by id.
 
-    board = await session.get(Board, board_id)
-    if not board:
+    Responds with 304 when If-None-Match matches the board version, in which case
+    the board is not serialized. When it is not cached, just its version is read
+    first, so that the notes are not loaded either.
+
+    With fields, responds with just them, and loads the notes only when they
+    are included.
+    """
+
+    cached = await cache.get(board_key(board_id))
+    if cached is not None:
+        version = cached["version"]
+    elif if_none_match is not None:
+        version = await board_version(board_id, is_sticky(request))
+    else:
+        version = None
+    if version is not None:
+        etag = board_etag(board_id, version)
+        if etag_matches(if_none_match, etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+
+    if fields is None:
+        version, body = await coalesce(
+            board_key(board_id),
+            lambda: render_board(board_id, cached, is_sticky(request)),
+            request,
+        )
+    elif include == "notes":
+        board = await read_board(board_id, cached, is_sticky(request))
+        version = board["version"]
+        body = orjson.dumps(
+            {
+                **sparse(board, fields),
+                "notes": add_unflushed_views(board["notes"]),
+                "notes_next_cursor": board["notes_next_cursor"],
+            }
+        )
+    else:
+        if cached is not None:
+            version, board = cached["version"], sparse(cached, fields)
+        else:
+            version, board = await read_board_fields(
+                board_id, fields, is_sticky(request)
+            )
+        body = orjson.dumps(board)
+    etag = board_etag(board_id, version)
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+
+async def board_version(board_id: int, sticky: bool) -> int | None:
+    """Returns version of a board if it exists, using a read session of its own."""
+
+    async with router.read_session(sticky) as session:
+        return await session.scalar(select(Board.version).where(Board.id == board_id))
+
+
+async def board_exists(board_id: int, sticky: bool) -> bool:
+    """Tells whether a board exists, using a read session of its own.
+
+    Meant for streaming endpoints, so that no connection is held while they
+    stream.
+    """
+
+    async with router.read_session(sticky) as session:
+        return bool(await session.scalar(select(Board.id).where(Board.id == board_id)))
+
+
+@board_router.get("/{board_id}/notes", response_class=StreamingResponse)
+async def stream_board_notes(
+    board_id: int,
+    request: Request,
+    cursor: str | None = None,
+):
+    """Streams all notes of a board as newline delimited JSON."""
+
+    sticky = is_sticky(request)
+    if not await board_exists(board_id, sticky):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=[{"msg": "A board with this id does not exist."}],
         )
-    await session.refresh(board, ["notes"])
-    return board
+    query = after_cursor(
+        select(*NOTE_COLUMNS).where(Note.board_id == board_id), [Note.id], cursor
+    )
+
+    async def notes() -> AsyncGenerator[bytes, None]:
+        # Rows are fetched in chunks from a server side cursor of its own session,
+        # so memory use does not depend on the number of notes
+        async with router.read_session(sticky) as stream_session:
+            rows = await stream_session.stream(
+                query.execution_options(yield_per=config.settings.STREAM_CHUNK_SIZE)
+            )
+            async for partition in rows.partitions():
+                notes = add_unflushed_views(map(note_payload, partition))
+                yield b"".join(orjson.dumps(note) + b"\n" for note in notes)
+
+    return StreamingResponse(notes(), media_type="application/x-ndjson")
+
+
+@board_router.get("/{board_id}/events", response_class=StreamingResponse)
+async def stream_board_events(board_id: int, request: Request):
+    """Streams changes of a board and its notes as server-sent events.
+
+    The stream ends when the client falls too far behind, after which it should
+    reconnect and reload the board.
+    """
+
+    if not await board_exists(board_id, is_sticky(request)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=[{"msg": "A board with this id does not exist."}],
+        )
+
+    async def events() -> AsyncGenerator[str, None]:
+        async with board_events.subscribe(board_id) as subscription:
+            while True:
+                event = await subscription.get(
+                    config.settings.EVENTS_KEEPALIVE_INTERVAL
+                )
+                if event is not None:
+                    yield f"data: {event}\n\n"
+                elif subscription.evicted:
+                    return
+                else:
+                    # Lets proxies keep the connection and detects closed ones
+                    yield ": keepalive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@board_router.websocket("/{board_id}/events/ws")
+async def board_events_websocket(websocket: WebSocket, board_id: int):
+    """Sends changes of a board and its notes as JSON text messages.
+
+    Closes with code 1013 when the client falls too far behind.
+    """
+
+    if not await board_exists(board_id, is_sticky(websocket)):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+
+    try:
+        async with board_events.subscribe(board_id) as subscription:
+            while True:
+                event = await subscription.get(
+                    config.settings.EVENTS_KEEPALIVE_INTERVAL
+                )
+                if event is not None:
+                    await websocket.send_text(event)
+                elif subscription.evicted:
+                    await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                    return
+                else:
+                    await websocket.send_text('{"type": "keepalive"}')
+    except WebSocketDisconnect:
+        pass
 
 
 @board_router.patch("/{board_id}", response_model=schemas.Board, status_code=200)
 async def update_board(
     board_id: int,
     new_data: schemas.BoardUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
     session: AsyncSession = Depends(get_session),
 ):
-    """Updates board."""
+    """Updates board.
 
-    board = await session.get(Board, board_id)
+    With If-Match, updates the board only if it is still of a version the header
+    matches, and responds with 412 otherwise.
+    """
+
+    versions = if_match_versions(if_match, "board", board_id)
+    board = await session.scalar(
+        update(Board)
+        .where(Board.id == board_id, *version_matches(Board.version, versions))
+        .values(**new_data.model_dump(), version=Board.version + 1)
+        .returning(Board, notify("board_updated", Board.id))
+    )
     if not board:
+        if versions is not None and await session.scalar(
+            select(Board.id).where(Board.id == board_id)
+        ):
+            raise precondition_failed()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=[{"msg": "A board with this id does not exist."}],
         )
-    for field in new_data.model_fields:
-        setattr(board, field, getattr(new_data, field))
     await session.commit()
-    await session.refresh(board, ["notes"])
-    return board
+    await invalidate(board_ids=[board_id])
+    response.headers["ETag"] = board_etag(board_id, board.version)
+    return await get_board_notes_page(session, board)
 
 
-@board_router.delete("/{board_id}", status_code=204)
+@board_router.delete("/{board_id}", response_model=schemas.Job, status_code=202)
 async def delete_board(
     board_id: int,
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_session),
 ):
-    """Deletes board."""
+    """Deletes board and its notes in a background job and returns the job.
 
-    board = await session.get(Board, board_id)
-    if not board:
+    Notes are deleted in chunks, so that no transaction holds locks on many of
+    them. The board is listed with its remaining notes until the job is done.
+    """
+
+    notes_count = await session.scalar(
+        select(Board.notes_count).where(Board.id == board_id)
+    )
+    if notes_count is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=[{"msg": "A board with this id does not exist."}],
         )
-    await session.delete(board)
+    job = await job_queue.enqueue(
+        session, "delete_board", {"board_id": board_id}, total=notes_count
+    )
     await session.commit()
+    job_queue.wake()
+    response.headers["Location"] = str(request.url_for("get_job", job_id=job.id))
+    return job
+
+
+@job_queue.step("delete_board")
+async def delete_board_step(payload: dict) -> tuple[int, bool]:
+    """Deletes a chunk of notes of a board, then archived ones, then the board."""
+
+    board_id = payload["board_id"]
+    size = config.settings.BULK_CHUNK_SIZE
+    async with async_session() as session:
+        for model in [Note, NoteArchive]:
+            chunk = select(model.id).where(model.board_id == board_id).limit(size)
+            note_ids = list(
+                await session.scalars(
+                    delete(model).where(model.id.in_(chunk)).returning(model.id)
+                )
+            )
+            if note_ids:
+                await leaderboard.forget(session, note_ids)
+                await session.execute(
+                    update(Board)
+                    .where(Board.id == board_id)
+                    .values(version=Board.version + 1, updated_at=Board.updated_at)
+                )
+                await session.commit()
+                for note_id in note_ids:
+                    view_counter.discard(note_id)
+                await invalidate(note_ids, [board_id])
+                return len(note_ids), False
+        await session.execute(
+            delete(Board)
+            .where(Board.id == board_id)
+            .returning(Board.id, notify("board_deleted", Board.id))
+        )
+        await session.commit()
+    await invalidate(board_ids=[board_id])
+    return 0, True
 
 
 @board_router.post(
@@ -169,25 +1116,10 @@ async def link_note_to_board(
 ):
     """Links a note to a board."""
 
-    board = await session.get(Board, board_id)
-    if not board:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=[{"msg": "A board with this id does not exist."}],
-        )
-
-    note = await session.get(Note, note_id)
-    if not note:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=[{"msg": "A note with this id does not exist."}],
-        )
-
-    note.board_id = board_id
-    board.updated_at = datetime.now()
+    board = await set_note_board(session, board_id, note_id, linked=True)
     await session.commit()
-    await session.refresh(board, ["notes"])
-    return board
+    await invalidate([note_id], [board_id, board.previous_board_id])
+    return await get_board_notes_page(session, board)
 
 
 @board_router.post(
@@ -200,22 +1132,80 @@ async def unlink_note_from_board(
 ):
     """Unlinks a note from a board."""
 
-    board = await session.get(Board, board_id)
-    if not board:
+    board = await set_note_board(session, board_id, note_id, linked=False)
+    await session.commit()
+    await invalidate([note_id], [board_id, board.previous_board_id])
+    return await get_board_notes_page(session, board)
+
+
+@board_router.post(
+    "/{board_id}/link-notes", response_model=schemas.BulkLinkResult, status_code=201
+)
+async def link_notes_to_board(
+    board_id: int,
+    data: schemas.NoteIds,
+    session: AsyncSession = Depends(get_session),
+):
+    """Links notes to a board, reporting ids of notes which do not exist."""
+
+    if not (await session.execute(touch_board(board_id))).first():
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=[{"msg": "A board with this id does not exist."}],
         )
 
-    note = await session.get(Note, note_id)
-    if not note:
+    linked = await set_notes_board(session, data.note_ids, board_id)
+    previous_board_ids = set(linked.values()) - {board_id, None}
+    if previous_board_ids:
+        await session.execute(
+            update(Board)
+            .where(Board.id.in_(previous_board_ids))
+            .values(version=Board.version + 1, updated_at=Board.updated_at)
+        )
+    await session.commit()
+    await invalidate(linked, [board_id, *linked.values()])
+
+    return schemas.BulkLinkResult(
+        board_id=board_id,
+        note_ids=[note_id for note_id in data.note_ids if note_id in linked],
+        errors=[
+            schemas.BulkError(index=index, msg="A note with this id does not exist.")
+            for index, note_id in enumerate(data.note_ids)
+            if note_id not in linked
+        ],
+    )
+
+
+@board_router.post(
+    "/{board_id}/unlink-notes", response_model=schemas.BulkLinkResult, status_code=201
+)
+async def unlink_notes_from_board(
+    board_id: int,
+    data: schemas.NoteIds,
+    session: AsyncSession = Depends(get_session),
+):
+    """Unlinks notes from a board, reporting ids of notes which are not linked."""
+
+    if not (await session.execute(touch_board(board_id))).first():
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=[{"msg": "A note with this id does not exist."}],
+            detail=[{"msg": "A board with this id does not exist."}],
         )
 
-    note.board_id = None
-    board.updated_at = datetime.now()
+    unlinked = await set_notes_board(
+        session, data.note_ids, None, Note.board_id == board_id
+    )
     await session.commit()
-    await session.refresh(board, ["notes"])
-    return board
+    await invalidate(unlinked, [board_id])
+
+    return schemas.BulkLinkResult(
+        board_id=board_id,
+        note_ids=[note_id for note_id in data.note_ids if note_id in unlinked],
+        errors=[
+            schemas.BulkError(
+                index=index, msg="A note with this id is not linked to this board."
+            )
+            for index, note_id in enumerate(data.note_ids)
+            if note_id not in unlinked
+        ],
+    )
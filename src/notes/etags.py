@@ -0,0 +1,45 @@
+import re
+
+
+def board_etag(board_id: int, version: int) -> str:
+    """Returns weak ETag of a board and the first page of its notes.
+
+    Views of notes are not versioned, so responses with the same ETag are only
+    equivalent rather than identical.
+    """
+
+    return f'W/"board-{board_id}-{version}"'
+
+
+def note_etag(note_id: int, version: int) -> str:
+    """Returns weak ETag of a note, not covering its views count."""
+
+    return f'W/"note-{note_id}-{version}"'
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """Tells whether If-None-Match header matches etag by weak comparison."""
+
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def if_match_versions(
+    header: str | None, kind: str, entity_id: int
+) -> list[int] | None:
+    """Returns versions If-Match header allows, or None when it allows any.
+
+    ETags are weak only as views are not versioned, while edits always bump
+    versions, so they are compared weakly here too. ETags of other entities
+    match no version.
+    """
+
+    if header is None:
+        return None
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    if "*" in tags:
+        return None
+    etag = re.compile(rf'"{kind}-{entity_id}-(\d+)"')
+    return [int(match[1]) for tag in tags if (match := etag.fullmatch(tag))]
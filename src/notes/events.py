@@ -0,0 +1,242 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict, deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import asyncpg
+from sqlalchemy import ColumnElement, Text, cast, func
+
+import config
+from database import async_engine
+
+logger = logging.getLogger(__name__)
+
+# Note ids per event of many notes, which payloads are limited to 8000 bytes
+EVENT_NOTE_IDS_CHUNK_SIZE = 500
+
+
+def notify(event_type: str, board_id, note_id=None) -> ColumnElement:
+    """Returns SQL expression sending an event of a board to all processes.
+
+    Meant for RETURNING of the mutation, so that the event is sent once per
+    changed row and only when the transaction commits. Events without a board
+    are dropped by the listeners.
+    """
+
+    payload = func.json_build_object(
+        "type", event_type, "board_id", board_id, "note_id", note_id
+    )
+    return func.pg_notify(config.settings.EVENTS_CHANNEL, cast(payload, Text))
+
+
+def link_events(board_id: int | None, note_id, previous_board_id) -> list:
+    """Returns expressions notifying boards a note was linked to or unlinked from."""
+
+    if board_id is None:
+        return [notify("note_unlinked", previous_board_id, note_id)]
+    return [
+        notify("note_linked", board_id, note_id),
+        notify("note_unlinked", func.nullif(previous_board_id, board_id), note_id),
+    ]
+
+
+def notify_notes(event_type: str, board_id: int, note_ids: list[int]) -> list:
+    """Returns expressions sending one event of a board about many notes.
+
+    Note ids are sent in chunks, as payloads of notifications are limited.
+    """
+
+    return [
+        func.pg_notify(
+            config.settings.EVENTS_CHANNEL,
+            json.dumps(
+                {
+                    "type": event_type,
+                    "board_id": board_id,
+                    "note_ids": note_ids[start : start + EVENT_NOTE_IDS_CHUNK_SIZE],
+                }
+            ),
+        )
+        for start in range(0, len(note_ids), EVENT_NOTE_IDS_CHUNK_SIZE)
+    ]
+
+
+def bulk_link_events(
+    board_id: int | None, previous_board_ids: dict[int, int | None]
+) -> list:
+    """Returns expressions notifying boards many notes were linked to or unlinked from.
+
+    Meant for a statement of its own in the transaction of the mutation, run
+    once per chunk of notes rather than per note, which would overflow buffers
+    of subscribers.
+    """
+
+    unlinked = defaultdict(list)
+    for note_id, previous_board_id in previous_board_ids.items():
+        if previous_board_id is not None and previous_board_id != board_id:
+            unlinked[previous_board_id].append(note_id)
+    events = [
+        notify_notes("notes_unlinked", previous_board_id, note_ids)
+        for previous_board_id, note_ids in unlinked.items()
+    ]
+    if board_id is not None:
+        events.append(notify_notes("notes_linked", board_id, list(previous_board_ids)))
+    return [event for chunk in events for event in chunk]
+
+
+class Subscription:
+    """Bounded buffer of events of one board for one subscriber.
+
+    A subscriber whose buffer is full is evicted rather than slowing down
+    delivery to the others. Its buffered events can still be read, after which
+    get returns None right away.
+    """
+
+    __slots__ = ("board_id", "max_size", "evicted", "_events", "_waiter")
+
+    def __init__(self, board_id: int, max_size: int) -> None:
+        self.board_id = board_id
+        self.max_size = max_size
+        self.evicted = False
+        self._events: deque[str] | None = None
+        self._waiter: asyncio.Future | None = None
+
+    def put(self, event: str) -> bool:
+        """Buffers an event, returns False when the subscriber is too slow."""
+
+        if self._events is None:
+            self._events = deque()
+        if len(self._events) >= self.max_size:
+            return False
+        self._events.append(event)
+        self._wake()
+        return True
+
+    def evict(self) -> None:
+        self.evicted = True
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def get(self, timeout: float | None = None) -> str | None:
+        """Returns the next event or None on timeout and after eviction."""
+
+        if not self._events and not self.evicted:
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.wait_for(self._waiter, timeout)
+            except asyncio.TimeoutError:
+                return None
+            finally:
+                self._waiter = None
+        if self._events:
+            return self._events.popleft()
+        return None
+
+
+class BoardEventBroker:
+    """Fans out board events from Postgres NOTIFY to subscribers of this process.
+
+    All subscribers share one dedicated LISTEN connection, opened with the
+    first subscription. Each event is parsed once and the same payload is
+    buffered for every subscriber of its board. When the connection is lost,
+    all subscribers are evicted, as they may have missed events.
+    """
+
+    def __init__(self, channel: str, queue_size: int) -> None:
+        self.channel = channel
+        self.queue_size = queue_size
+        self.evictions = 0
+        # Set when the process drains, after which subscribers are evicted at once
+        self.closed = False
+        self._subscriptions: defaultdict[int, set[Subscription]] = defaultdict(set)
+        self._connection: asyncpg.Connection | None = None
+        self._connect_lock = asyncio.Lock()
+
+    @property
+    def subscribers(self) -> int:
+        return sum(map(len, self._subscriptions.values()))
+
+    async def _listen(self) -> None:
+        async with self._connect_lock:
+            if self._connection is not None and not self._connection.is_closed():
+                return
+            self._connection = await asyncpg.connect(
+                **async_engine.url.translate_connect_args(username="user")
+            )
+            self._connection.add_termination_listener(self._on_termination)
+            await self._connection.add_listener(self.channel, self._dispatch)
+
+    def _dispatch(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            board_id = json.loads(payload)["board_id"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Dropped malformed board event: %s", payload)
+            return
+        for subscription in list(self._subscriptions.get(board_id, ())):
+            if not subscription.put(payload):
+                self._evict(subscription)
+
+    def _on_termination(self, connection) -> None:
+        logger.warning("Board events connection lost, evicting subscribers")
+        self._connection = None
+        self._evict_all()
+
+    def _evict_all(self) -> None:
+        for subscriptions in list(self._subscriptions.values()):
+            for subscription in list(subscriptions):
+                self._evict(subscription)
+
+    def _evict(self, subscription: Subscription) -> None:
+        self.evictions += 1
+        subscription.evict()
+        self._remove(subscription)
+
+    def _remove(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.board_id)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.board_id]
+
+    @asynccontextmanager
+    async def subscribe(self, board_id: int) -> AsyncIterator[Subscription]:
+        """Subscribes to events of a board for the duration of the context."""
+
+        subscription = Subscription(board_id, self.queue_size)
+        if not self.closed:
+            await self._listen()
+        if self.closed:
+            subscription.evict()
+            yield subscription
+            return
+        self._subscriptions[board_id].add(subscription)
+        try:
+            yield subscription
+        finally:
+            self._remove(subscription)
+
+    def close(self) -> None:
+        """Evicts all subscribers and the ones to come, so that their streams end."""
+
+        self.closed = True
+        self._evict_all()
+
+    async def stop(self) -> None:
+        """Evicts all subscribers and closes the listener connection."""
+
+        self._evict_all()
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            connection.remove_termination_listener(self._on_termination)
+            await connection.close()
+
+
+board_events = BoardEventBroker(
+    config.settings.EVENTS_CHANNEL, config.settings.EVENTS_QUEUE_SIZE
+)
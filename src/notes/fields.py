@@ -0,0 +1,59 @@
+from collections.abc import Callable, Iterable, Sequence
+
+from fastapi import Query
+from pydantic import BaseModel
+
+# Sparse fieldsets of responses, as in ?fields=id,name
+Fields = tuple[str, ...] | None
+
+
+def fields_query(
+    model: type[BaseModel], exclude: Iterable[str] = ()
+) -> Callable[..., Fields]:
+    """Returns dependency parsing comma separated fields of model responses.
+
+    The dependency returns the fields in the order of the model, always with id,
+    or None when all of them are requested. Relationships are left to
+    ``include`` by listing them in exclude.
+    """
+
+    allowed = [name for name in model.model_fields if name not in exclude]
+    choices = "|".join(allowed)
+
+    def dependency(
+        fields: str
+        | None = Query(
+            None,
+            description=(
+                "Comma separated fields to respond with, all of them by default."
+                " The id is always included."
+            ),
+            pattern=rf"^({choices})(,({choices}))*$",
+            examples=[",".join(allowed[:2])],
+        )
+    ) -> Fields:
+        if fields is None:
+            return None
+        names = set(fields.split(","))
+        return tuple(name for name in allowed if name in names or name == "id")
+
+    return dependency
+
+
+def sparse(payload: dict, fields: Fields) -> dict:
+    """Returns payload narrowed to fields."""
+
+    if fields is None:
+        return payload
+    return {field: payload[field] for field in fields}
+
+
+def with_keys(fields: Fields, keys: Sequence) -> list:
+    """Returns keys of pagination which are not among fields, to be selected too.
+
+    Cursors are made of the keys of the last row of a page.
+    """
+
+    if fields is None:
+        return []
+    return [key for key in keys if key.key not in fields]
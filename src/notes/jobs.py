@@ -0,0 +1,198 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+
+from fastapi import APIRouter, HTTPException, status
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import config
+from database import async_session
+from src.notes import schemas
+from src.notes.models import Job
+
+logger = logging.getLogger(__name__)
+
+job_router = APIRouter()
+
+# Runs one bounded step of a job with its payload and returns the number of
+# items it processed and whether the job is done. Steps commit their own work,
+# so a job which is retried after a crash resumes where it stopped.
+JobStep = Callable[[dict], Awaitable[tuple[int, bool]]]
+
+
+class JobQueue:
+    """Durable queue of background jobs shared by all processes.
+
+    Jobs are rows of the job table, claimed with ``FOR UPDATE SKIP LOCKED`` so
+    that processes never wait for each other's claims. A claim is a lease which
+    every step renews, and a job whose lease expires, e.g. as its process died,
+    is claimed again until it ran ``max_attempts`` times, after which it fails.
+    """
+
+    def __init__(self, poll_interval: float, lease: float, max_attempts: int) -> None:
+        self.poll_interval = poll_interval
+        self.lease = timedelta(seconds=lease)
+        self.max_attempts = max_attempts
+        self._steps: dict[str, JobStep] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def step(self, kind: str) -> Callable[[JobStep], JobStep]:
+        """Registers the decorated function as the step of jobs of kind."""
+
+        def register(step: JobStep) -> JobStep:
+            self._steps[kind] = step
+            return step
+
+        return register
+
+    async def enqueue(
+        self, session: AsyncSession, kind: str, payload: dict, total: int | None
+    ) -> Job:
+        """Adds a job to the session, which is queued once the session commits."""
+
+        job = Job(kind=kind, payload=payload, total=total)
+        session.add(job)
+        await session.flush()
+        return job
+
+    def wake(self) -> None:
+        """Makes the worker of this process look for jobs right away."""
+
+        self._wakeup.set()
+
+    async def claim(self) -> Job | None:
+        """Claims the oldest queued job, or a running one whose lease expired.
+
+        Running jobs whose lease expired after their last attempt are failed.
+        """
+
+        now = func.localtimestamp()
+        expired = (Job.status == "running") & (Job.locked_until < now)
+        claimable = (
+            select(Job.id)
+            .where(
+                or_(
+                    Job.status == "queued",
+                    expired & (Job.attempts < self.max_attempts),
+                )
+            )
+            .order_by(Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with async_session() as session:
+            await session.execute(
+                update(Job)
+                .where(expired & (Job.attempts >= self.max_attempts))
+                .values(
+                    status="failed",
+                    error="The lease of the last attempt expired.",
+                    locked_until=None,
+                )
+            )
+            job = await session.scalar(
+                update(Job)
+                .where(Job.id == claimable)
+                .values(
+                    status="running",
+                    attempts=Job.attempts + 1,
+                    locked_until=now + self.lease,
+                )
+                .returning(Job)
+            )
+            await session.commit()
+        return job
+
+    async def run(self, job: Job) -> None:
+        """Runs a claimed job step by step, recording its progress."""
+
+        step = self._steps[job.kind]
+        progress = job.progress
+        try:
+            done = False
+            while not done:
+                processed, done = await step(job.payload)
+                progress += processed
+                await self._update(
+                    job.id,
+                    progress=progress,
+                    status="succeeded" if done else "running",
+                    locked_until=func.localtimestamp() + self.lease,
+                )
+        except Exception as error:
+            logger.exception("Job %s of kind %s failed", job.id, job.kind)
+            failed = job.attempts >= self.max_attempts
+            await self._update(
+                job.id,
+                status="failed" if failed else "queued",
+                error=repr(error),
+                locked_until=None,
+            )
+
+    async def _update(self, job_id: int, **values) -> None:
+        async with async_session() as session:
+            await session.execute(update(Job).where(Job.id == job_id).values(**values))
+            await session.commit()
+
+    async def run_pending(self) -> int:
+        """Runs claimable jobs until there are none and returns how many ran."""
+
+        ran = 0
+        while (job := await self.claim()) is not None:
+            await self.run(job)
+            ran += 1
+        return ran
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_pending()
+            except Exception:
+                logger.exception("Failed to run jobs")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        """Starts running jobs in the background."""
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops running jobs, the interrupted one is resumed after its lease."""
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+job_queue = JobQueue(
+    poll_interval=config.settings.JOB_POLL_INTERVAL,
+    lease=config.settings.JOB_LEASE,
+    max_attempts=config.settings.JOB_MAX_ATTEMPTS,
+)
+
+
+@job_router.get("/{job_id}", response_model=schemas.Job, status_code=200)
+async def get_job(job_id: int):
+    """Returns status and progress of a background job."""
+
+    async with async_session() as session:
+        job = await session.get(Job, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=[{"msg": "A job with this id does not exist."}],
+        )
+    return job
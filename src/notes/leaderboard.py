@@ -0,0 +1,203 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import ARRAY, Integer, Select, any_, delete, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import config
+from database import async_session
+from src.notes.models import NoteViewBucket
+
+logger = logging.getLogger(__name__)
+
+# asyncpg can bind at most 32767 parameters per statement
+RECORD_CHUNK_SIZE = 1000
+# Share of a window its leaderboard may lag behind, as sums of long windows
+# read the most buckets
+WINDOW_STALENESS = 0.001
+
+
+class Leaderboard:
+    """Most viewed notes of sliding windows, of all boards and of each board.
+
+    Views are added to buckets of ``bucket_size`` seconds per note as the view
+    counter flushes them. Every ``refresh_interval`` seconds, the buckets of
+    each window are summed up and the ``size`` most viewed notes of all boards
+    and of each board are kept in process, so that reads take O(size) however
+    many notes there are. Each window is refreshed every ``refresh_interval``
+    seconds, or every WINDOW_STALENESS of it when that is longer. Buckets older
+    than the longest window are deleted, and so are the ones of deleted notes,
+    which leave the leaderboards when they are refreshed next.
+    """
+
+    def __init__(
+        self,
+        windows: dict[str, int],
+        bucket_size: int,
+        size: int,
+        refresh_interval: float,
+    ) -> None:
+        self.windows = windows
+        self.bucket_size = bucket_size
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self.refreshed_at: dict[str, datetime] = {}
+        # Top notes by window and board, of all boards under None
+        self._top: dict[str, dict[int | None, list[dict]]] = {}
+        self._task: asyncio.Task | None = None
+
+    def bucket(self, at: datetime) -> datetime:
+        """Returns start of the bucket of a time."""
+
+        return at - (at - datetime.min) % timedelta(seconds=self.bucket_size)
+
+    async def record(
+        self, session: AsyncSession, views: list[tuple[int, int | None, int]]
+    ) -> None:
+        """Adds views of notes and their boards to the current bucket.
+
+        Meant for the transaction which counts the views on the notes. Rows are
+        upserted in order of note ids, so that concurrent flushes of other
+        processes do not deadlock.
+        """
+
+        bucket = self.bucket(datetime.now())
+        rows = [
+            {"bucket": bucket, "note_id": note_id, "board_id": board_id, "views": count}
+            for note_id, board_id, count in sorted(views)
+        ]
+        for start in range(0, len(rows), RECORD_CHUNK_SIZE):
+            statement = insert(NoteViewBucket).values(
+                rows[start : start + RECORD_CHUNK_SIZE]
+            )
+            await session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[NoteViewBucket.note_id, NoteViewBucket.bucket],
+                    set_={
+                        "board_id": statement.excluded.board_id,
+                        "views": NoteViewBucket.views + statement.excluded.views,
+                    },
+                )
+            )
+
+    async def forget(self, session: AsyncSession, note_ids: list[int]) -> None:
+        """Deletes views of deleted notes, in the transaction which deletes them."""
+
+        await session.execute(
+            delete(NoteViewBucket).where(
+                NoteViewBucket.note_id == any_(literal(note_ids, ARRAY(Integer)))
+            )
+        )
+
+    def top_query(self, since: datetime) -> Select:
+        """Returns query of the top notes of all boards and of each board since."""
+
+        totals = (
+            select(
+                NoteViewBucket.note_id,
+                # Notes moved within the window count for their latest board
+                func.array_agg(
+                    aggregate_order_by(
+                        NoteViewBucket.board_id, NoteViewBucket.bucket.desc()
+                    )
+                )[1].label("board_id"),
+                func.sum(NoteViewBucket.views).label("views"),
+            )
+            .where(NoteViewBucket.bucket >= self.bucket(since))
+            .group_by(NoteViewBucket.note_id)
+            .subquery()
+        )
+        order = (totals.c.views.desc(), totals.c.note_id)
+        ranked = select(
+            totals,
+            func.row_number().over(order_by=order).label("rank"),
+            func.row_number()
+            .over(partition_by=totals.c.board_id, order_by=order)
+            .label("board_rank"),
+        ).subquery()
+        return (
+            select(ranked)
+            .where(or_(ranked.c.rank <= self.size, ranked.c.board_rank <= self.size))
+            .order_by(ranked.c.rank)
+        )
+
+    def due(self, now: datetime) -> list[str]:
+        """Returns windows whose leaderboards are to be refreshed."""
+
+        return [
+            window
+            for window, seconds in self.windows.items()
+            if window not in self.refreshed_at
+            or (now - self.refreshed_at[window]).total_seconds()
+            >= max(self.refresh_interval, seconds * WINDOW_STALENESS)
+        ]
+
+    async def refresh(self, windows: list[str] | None = None) -> None:
+        """Reads the top notes of windows, all by default, and drops expired buckets."""
+
+        now = datetime.now()
+        async with async_session() as session:
+            for window in self.windows if windows is None else windows:
+                seconds = self.windows[window]
+                boards: dict[int | None, list[dict]] = defaultdict(list)
+                rows = await session.execute(
+                    self.top_query(now - timedelta(seconds=seconds))
+                )
+                for row in rows:
+                    note = {
+                        "id": row.note_id,
+                        "board_id": row.board_id,
+                        "views": row.views,
+                    }
+                    if row.rank <= self.size:
+                        boards[None].append(note)
+                    if row.board_id is not None and row.board_rank <= self.size:
+                        boards[row.board_id].append(note)
+                self._top[window] = dict(boards)
+                self.refreshed_at[window] = now
+            await session.execute(
+                delete(NoteViewBucket).where(
+                    NoteViewBucket.bucket
+                    < self.bucket(now - timedelta(seconds=max(self.windows.values())))
+                )
+            )
+            await session.commit()
+
+    def top(self, window: str, board_id: int | None, limit: int) -> list[dict]:
+        """Returns the most viewed notes of a window, of a board or of all boards."""
+
+        return self._top.get(window, {}).get(board_id, [])[:limit]
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh(self.due(datetime.now()))
+            except Exception:
+                logger.exception("Failed to refresh the note leaderboard")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        """Starts periodic refreshing in the background."""
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+leaderboard = Leaderboard(
+    windows=config.settings.LEADERBOARD_WINDOWS,
+    bucket_size=config.settings.LEADERBOARD_BUCKET_SIZE,
+    size=config.settings.LEADERBOARD_SIZE,
+    refresh_interval=config.settings.LEADERBOARD_REFRESH_INTERVAL,
+)
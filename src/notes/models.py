@@ -1,8 +1,26 @@
 from datetime import datetime
 from typing import List
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy import (
+    DDL,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    PrimaryKeyConstraint,
+    String,
+    Text,
+    event,
+)
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    Mapped,
+    declared_attr,
+    mapped_column,
+    relationship,
+)
 
 
 class Base(DeclarativeBase):
@@ -10,27 +28,192 @@ class Base(DeclarativeBase):
 
 
 class TimeStampMixin(object):
-    created_at = mapped_column(DateTime, default=datetime.now(), sort_order=999)
+    created_at = mapped_column(DateTime, default=datetime.now, sort_order=999)
     updated_at = mapped_column(
-        DateTime, default=datetime.now(), onupdate=datetime.now, sort_order=999
+        DateTime, default=datetime.now, onupdate=datetime.now, sort_order=999
     )
 
 
 class Board(Base, TimeStampMixin):
     __tablename__ = "board"
+    __table_args__ = (Index("ix_board_updated_at_id", "updated_at", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(75))
-    notes: Mapped[List["Note"]] = relationship(back_populates="board")
+    # Bumped whenever the board or any of its notes changes
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
+    # Maintained by the count_board_notes triggers on note
+    notes_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    views_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    notes: Mapped[List["Note"]] = relationship(
+        back_populates="board", passive_deletes=True
+    )
 
 
 class Note(Base, TimeStampMixin):
+    """Note partitioned by month of creation, see src.notes.partitions."""
+
     __tablename__ = "note"
+    __table_args__ = (
+        # The primary key of a partitioned table has to include its partition key
+        PrimaryKeyConstraint("id", "created_at"),
+        Index("ix_note_board_id_id", "board_id", "id"),
+        Index("ix_note_updated_at_id", "updated_at", "id"),
+        Index("ix_note_board_id_updated_at_id", "board_id", "updated_at", "id"),
+        Index("ix_note_search_vector", "search_vector", postgresql_using="gin"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    @declared_attr.directive
+    def __mapper_args__(cls) -> dict:
+        # ids are unique on their own, as all partitions draw them from one sequence
+        return {"primary_key": [cls.__table__.c.id]}
+
+    id: Mapped[int] = mapped_column(Integer, autoincrement=True)
     board_id: Mapped[int] = mapped_column(
         ForeignKey("board.id", ondelete="CASCADE"), nullable=True
     )
     board: Mapped[List["Board"]] = relationship(back_populates="notes")
     text: Mapped[str] = mapped_column(String(250), nullable=False)
     views_count: Mapped[int] = mapped_column(Integer, default=0)
+    # Bumped whenever the note is changed, but not by its views
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR, Computed("to_tsvector('simple', text)", persisted=True), deferred=True
+    )
+
+
+class NoteArchive(Base, TimeStampMixin):
+    """Notes of archived partitions, kept read-only and without search columns."""
+
+    __tablename__ = "note_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    board_id: Mapped[int] = mapped_column(
+        ForeignKey("board.id", ondelete="CASCADE"), nullable=True, index=True
+    )
+    text: Mapped[str] = mapped_column(String(250), nullable=False)
+    views_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    version: Mapped[int] = mapped_column(Integer, server_default="1")
+
+
+class Job(Base, TimeStampMixin):
+    """Background job of the queue in src.notes.jobs."""
+
+    __tablename__ = "job"
+    __table_args__ = (
+        # Claiming scans only the jobs which are not done yet
+        Index(
+            "ix_job_pending_id",
+            "id",
+            postgresql_where="status IN ('queued', 'running')",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(50))
+    payload: Mapped[dict] = mapped_column(JSONB)
+    # queued, running, succeeded or failed
+    status: Mapped[str] = mapped_column(String(20), default="queued")
+    progress: Mapped[int] = mapped_column(Integer, default=0)
+    total: Mapped[int] = mapped_column(Integer, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    # Running jobs whose lease expired are claimed again
+    locked_until: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    error: Mapped[str] = mapped_column(Text, nullable=True)
+
+
+class NoteViewBucket(Base):
+    """Views of a note in one bucket of time, see src.notes.leaderboard."""
+
+    __tablename__ = "note_view_bucket"
+    __table_args__ = (
+        # Views of a window are summed up from the buckets since its start
+        Index("ix_note_view_bucket_bucket", "bucket"),
+    )
+
+    # Not a foreign key, as ids of partitioned notes are not unique on their own
+    note_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Start of the bucket
+    bucket: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    # Board of the note when it was last viewed in the bucket
+    board_id: Mapped[int] = mapped_column(Integer, nullable=True)
+    views: Mapped[int] = mapped_column(Integer)
+
+
+# Adds changes of notes to the counts of their boards once per statement, so
+# that bulk links and view flushes update each board row once. A branch per
+# operation, as transition tables a trigger does not define cannot be referenced
+COUNT_BOARD_NOTES_FUNCTION = """
+CREATE OR REPLACE FUNCTION count_board_notes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE board
+        SET notes_count = board.notes_count + changes.notes,
+            views_count = board.views_count + changes.views
+        FROM (
+            SELECT board_id, count(*) AS notes, sum(views_count) AS views
+            FROM new_notes
+            GROUP BY board_id
+        ) AS changes
+        WHERE board.id = changes.board_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE board
+        SET notes_count = board.notes_count - changes.notes,
+            views_count = board.views_count - changes.views
+        FROM (
+            SELECT board_id, count(*) AS notes, sum(views_count) AS views
+            FROM old_notes
+            GROUP BY board_id
+        ) AS changes
+        WHERE board.id = changes.board_id;
+    ELSE
+        UPDATE board
+        SET notes_count = board.notes_count + changes.notes,
+            views_count = board.views_count + changes.views
+        FROM (
+            SELECT board_id, sum(notes) AS notes, sum(views) AS views
+            FROM (
+                SELECT board_id, 1 AS notes, views_count AS views FROM new_notes
+                UNION ALL
+                SELECT board_id, -1, -views_count FROM old_notes
+            ) AS note_changes
+            GROUP BY board_id
+        ) AS changes
+        WHERE board.id = changes.board_id
+            AND (changes.notes <> 0 OR changes.views <> 0);
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+COUNT_BOARD_NOTES_TRIGGERS = [
+    """
+    CREATE TRIGGER count_board_notes_on_insert AFTER INSERT ON note
+    REFERENCING NEW TABLE AS new_notes
+    FOR EACH STATEMENT EXECUTE FUNCTION count_board_notes()
+    """,
+    """
+    CREATE TRIGGER count_board_notes_on_update AFTER UPDATE ON note
+    REFERENCING OLD TABLE AS old_notes NEW TABLE AS new_notes
+    FOR EACH STATEMENT EXECUTE FUNCTION count_board_notes()
+    """,
+    """
+    CREATE TRIGGER count_board_notes_on_delete AFTER DELETE ON note
+    REFERENCING OLD TABLE AS old_notes
+    FOR EACH STATEMENT EXECUTE FUNCTION count_board_notes()
+    """,
+]
+
+# Catches notes created before the partition of their month, see
+# src.notes.partitions for the monthly ones
+NOTE_DEFAULT_PARTITION = "CREATE TABLE note_default PARTITION OF note DEFAULT"
+
+for statement in [
+    NOTE_DEFAULT_PARTITION,
+    COUNT_BOARD_NOTES_FUNCTION,
+    *COUNT_BOARD_NOTES_TRIGGERS,
+]:
+    event.listen(Note.__table__, "after_create", DDL(statement))
@@ -0,0 +1,78 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException, status
+from sqlalchemy import ColumnElement, Select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+# Columns or labelled expressions rows of a page are ordered by
+Key = InstrumentedAttribute | ColumnElement
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encodes keyset values of the last row of a page into an opaque token."""
+
+    raw = json.dumps(
+        [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ]
+    )
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, keys: Sequence[Key]) -> list[Any]:
+    """Decodes a token made by `encode_cursor` back into keyset values."""
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError
+        return [
+            datetime.fromisoformat(value)
+            if key.type.python_type is datetime
+            else key.type.python_type(value)
+            for key, value in zip(keys, values)
+        ]
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=[{"msg": "Invalid cursor."}],
+        )
+
+
+def after_cursor(query: Select, keys: Sequence[Key], cursor: str | None) -> Select:
+    """Restricts query to rows after cursor in ascending order of keys."""
+
+    if cursor is not None:
+        query = query.where(tuple_(*keys) > tuple_(*decode_cursor(cursor, keys)))
+    return query.order_by(*keys)
+
+
+def paginate(
+    query: Select,
+    keys: Sequence[Key],
+    cursor: str | None,
+    limit: int,
+) -> Select:
+    """Restricts query to one page after cursor in ascending order of keys.
+
+    One extra row is fetched so that `next_cursor` can tell whether
+    there is a next page.
+    """
+
+    return after_cursor(query, keys, cursor).limit(limit + 1)
+
+
+def next_cursor(rows: list, keys: Sequence[Key], limit: int) -> str | None:
+    """Drops the extra row fetched by `paginate` and returns a cursor for it."""
+
+    if len(rows) <= limit:
+        return None
+    del rows[limit:]
+    return encode_cursor([getattr(rows[-1], key.key) for key in keys])
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import re
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import config
+from database import async_session
+from src.notes.cache import invalidate_all
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME = re.compile(r"note_p(\d{4})(\d{2})")
+# Serializes maintenance between processes sharing the database
+MAINTENANCE_LOCK_ID = 0x6E6F7465
+# Detaching and dropping partitions lock note and board exclusively, so
+# maintenance gives up and retries later instead of queueing requests behind it
+MAINTENANCE_LOCK_TIMEOUT = "5s"
+
+
+def add_months(month: date, months: int) -> date:
+    """Returns first day of the month months after the one of month."""
+
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"note_p{month:%Y%m}"
+
+
+async def list_partitions(session: AsyncSession) -> dict[date, str]:
+    """Returns monthly partitions of note by their first day."""
+
+    names = await session.scalars(
+        text(
+            "SELECT inhrelid::regclass::text FROM pg_inherits"
+            " WHERE inhparent = 'note'::regclass"
+        )
+    )
+    partitions = {}
+    for name in names:
+        if match := PARTITION_NAME.fullmatch(name):
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+async def create_partitions(
+    session: AsyncSession, today: date, months_ahead: int
+) -> list[str]:
+    """Creates partitions from the month of today on and returns the new ones.
+
+    A partition cannot be created while note_default holds notes of its month,
+    so they are created ahead of the notes they receive.
+    """
+
+    existing = await list_partitions(session)
+    created = []
+    for months in range(months_ahead + 1):
+        month = add_months(today, months)
+        if month in existing:
+            continue
+        name = partition_name(month)
+        await session.execute(
+            text(
+                f"CREATE TABLE {name} PARTITION OF note"
+                f" FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+            )
+        )
+        created.append(name)
+    return created
+
+
+async def archive_partition(session: AsyncSession, before: date) -> str | None:
+    """Moves the oldest partition of a month before the one of before to the archive.
+
+    Notes are copied while the partition is only locked against writes, so that
+    note is locked exclusively just to detach and drop it. Archived notes keep
+    counting towards their boards, but are no longer listed on them, so versions
+    of their boards are bumped. Returns the archived partition if any.
+    """
+
+    partitions = sorted((await list_partitions(session)).items())
+    if not partitions or add_months(partitions[0][0], 1) > before:
+        return None
+    name = partitions[0][1]
+    await session.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+    await session.execute(
+        text(
+            "INSERT INTO note_archive"
+            " (id, board_id, text, views_count, version, created_at, updated_at)"
+            " SELECT id, board_id, text, views_count, version, created_at,"
+            " updated_at"
+            f" FROM {name}"
+        )
+    )
+    board_ids = list(
+        await session.scalars(
+            text(f"SELECT DISTINCT board_id FROM {name} WHERE board_id IS NOT NULL")
+        )
+    )
+    await session.execute(text(f"ALTER TABLE note DETACH PARTITION {name}"))
+    await session.execute(
+        text("UPDATE board SET version = version + 1 WHERE id = ANY(:ids)"),
+        {"ids": board_ids},
+    )
+    await session.execute(text(f"DROP TABLE {name}"))
+    return name
+
+
+class PartitionMaintenance:
+    """Creates upcoming partitions of note and archives cold ones periodically."""
+
+    def __init__(
+        self, interval: float, months_ahead: int, archive_after_months: int | None
+    ) -> None:
+        self.interval = interval
+        self.months_ahead = months_ahead
+        self.archive_after_months = archive_after_months
+        self._task: asyncio.Task | None = None
+
+    async def run(self, today: date | None = None) -> tuple[list[str], list[str]]:
+        """Runs maintenance once and returns created and archived partitions.
+
+        Each partition is archived in a transaction of its own.
+        """
+
+        today = today or date.today()
+        async with self.transaction() as session:
+            created = await create_partitions(session, today, self.months_ahead)
+        archived = []
+        while self.archive_after_months is not None:
+            async with self.transaction() as session:
+                name = await archive_partition(
+                    session, add_months(today, -self.archive_after_months)
+                )
+            if name is None:
+                break
+            archived.append(name)
+        if archived:
+            # Cached boards list notes of archived partitions
+            await invalidate_all()
+        return created, archived
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[AsyncSession]:
+        """Returns session committed on exit, holding the maintenance lock."""
+
+        async with async_session() as session:
+            await session.execute(
+                text("SELECT pg_advisory_xact_lock(:id)"), {"id": MAINTENANCE_LOCK_ID}
+            )
+            await session.execute(
+                text(f"SET LOCAL lock_timeout = '{MAINTENANCE_LOCK_TIMEOUT}'")
+            )
+            yield session
+            await session.commit()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                created, archived = await self.run()
+                if created or archived:
+                    logger.info(
+                        "Created note partitions %s, archived %s", created, archived
+                    )
+            except Exception:
+                logger.exception("Failed to maintain note partitions")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Starts periodic maintenance in the background."""
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+partition_maintenance = PartitionMaintenance(
+    interval=config.settings.NOTE_MAINTENANCE_INTERVAL,
+    months_ahead=config.settings.NOTE_PARTITIONS_AHEAD,
+    archive_after_months=config.settings.NOTE_ARCHIVE_AFTER_MONTHS,
+)
@@ -0,0 +1,72 @@
+from collections.abc import Iterable, Sequence
+
+from sqlalchemy import Row
+
+from src.notes import schemas
+from src.notes.models import Board, Note, NoteArchive
+from src.notes.view_counter import view_counter
+
+# Columns of notes selected for responses, in the order of schemas.Note fields
+NOTE_FIELDS = tuple(schemas.Note.model_fields)
+NOTE_COLUMNS = tuple(getattr(Note, field) for field in NOTE_FIELDS)
+ARCHIVED_NOTE_COLUMNS = tuple(getattr(NoteArchive, field) for field in NOTE_FIELDS)
+BOARD_SUMMARY_FIELDS = tuple(schemas.BoardSummary.model_fields)
+
+
+def note_columns(fields: Sequence[str] | None) -> tuple:
+    """Returns columns of note fields, NOTE_COLUMNS when all are requested."""
+
+    if fields is None:
+        return NOTE_COLUMNS
+    return tuple(getattr(Note, field) for field in fields)
+
+
+def note_payload(row: Row, fields: Sequence[str] | None = None) -> dict:
+    """Returns note response from a row starting with columns of fields."""
+
+    return dict(zip(fields or NOTE_FIELDS, row))
+
+
+def board_columns(fields: Sequence[str] | None) -> tuple:
+    """Returns columns of board fields, of all of schemas.BoardSummary by default."""
+
+    return tuple(getattr(Board, field) for field in fields or BOARD_SUMMARY_FIELDS)
+
+
+def board_summary_payload(row: Row, fields: Sequence[str] | None = None) -> dict:
+    """Returns board summary response from a row starting with columns of fields."""
+
+    return dict(zip(fields or BOARD_SUMMARY_FIELDS, row))
+
+
+def board_payload(
+    board: Board | Row,
+    notes: list[dict],
+    notes_next_cursor: str | None,
+) -> dict:
+    """Returns board response with a page of note payloads."""
+
+    return {
+        "name": board.name,
+        "id": board.id,
+        "notes": notes,
+        "notes_count": board.notes_count,
+        "notes_next_cursor": notes_next_cursor,
+        "version": board.version,
+        "created_at": board.created_at,
+        "updated_at": board.updated_at,
+    }
+
+
+def add_unflushed_views(notes: Iterable[dict]) -> list[dict]:
+    """Returns note payloads with views which are not yet written to the database.
+
+    Payloads may be shared with the cache, so changed notes are copied.
+    """
+
+    result = []
+    for note in notes:
+        if "views_count" in note and (views := view_counter.unflushed(note["id"])):
+            note = {**note, "views_count": note["views_count"] + views}
+        result.append(note)
+    return result
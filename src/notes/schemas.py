@@ -1,10 +1,32 @@
 from datetime import datetime
+from typing import Literal
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, create_model
+from pydantic.fields import FieldInfo
+
+
+def partial(model: type[BaseModel]) -> type[BaseModel]:
+    """Returns model of sparse responses of model, of which only id is required.
+
+    Documents responses of endpoints which take ``fields``.
+    """
+
+    return create_model(
+        f"Partial{model.__name__}",
+        **{
+            name: (
+                field.annotation,
+                field
+                if name == "id"
+                else FieldInfo.merge_field_infos(field, default=None),
+            )
+            for name, field in model.model_fields.items()
+        },
+    )
 
 
 class NoteBase(BaseModel):
-    text: str
+    text: str = Field(max_length=250)
 
 
 class NoteCreate(NoteBase):
@@ -16,14 +38,51 @@ class Note(NoteBase):
 
     id: int
     views_count: int | None = None
+    version: int
     created_at: datetime
     updated_at: datetime
 
 
+PartialNote = partial(Note)
+
+
 class NoteUpdate(NoteBase):
     pass
 
 
+class BulkError(BaseModel):
+    index: int
+    msg: str
+
+
+class NoteBulkCreateResult(BaseModel):
+    ids: list[int]
+    errors: list[BulkError] = []
+
+
+class NotePage(BaseModel):
+    items: list[Note]
+    next_cursor: str | None = None
+
+
+class PartialNotePage(BaseModel):
+    items: list[PartialNote]
+    next_cursor: str | None = None
+
+
+class TopNote(BaseModel):
+    id: int
+    board_id: int | None = None
+    views: int
+
+
+class TopNotes(BaseModel):
+    window: str
+    board_id: int | None = None
+    items: list[TopNote]
+    refreshed_at: datetime | None = None
+
+
 class LinkNoteToBoard(BaseModel):
     board_id: int
     note_id: int
@@ -34,8 +93,32 @@ class UnlinkNoteToBoard(BaseModel):
     note_id: int
 
 
+class NoteIds(BaseModel):
+    note_ids: list[int]
+
+
+class BatchGet(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=1000)
+
+
+class NoteBatch(BaseModel):
+    items: list[Note]
+    missing_ids: list[int] = []
+
+
+class PartialNoteBatch(BaseModel):
+    items: list[PartialNote]
+    missing_ids: list[int] = []
+
+
+class BulkLinkResult(BaseModel):
+    board_id: int
+    note_ids: list[int]
+    errors: list[BulkError] = []
+
+
 class BoardBase(BaseModel):
-    name: str
+    name: str = Field(max_length=75)
 
 
 class BoardCreate(BoardBase):
@@ -47,9 +130,61 @@ class Board(BoardBase):
 
     id: int
     notes: list[Note] = []
+    notes_count: int = 0
+    notes_next_cursor: str | None = None
+    version: int
     created_at: datetime
     updated_at: datetime
 
 
+PartialBoard = partial(Board)
+
+
 class BoardUpdate(BoardBase):
     pass
+
+
+class BoardSummary(BoardBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    notes_count: int
+    views_count: int
+    created_at: datetime
+    updated_at: datetime
+
+
+PartialBoardSummary = partial(BoardSummary)
+
+
+class BoardPage(BaseModel):
+    items: list[BoardSummary]
+    next_cursor: str | None = None
+
+
+class PartialBoardPage(BaseModel):
+    items: list[PartialBoardSummary]
+    next_cursor: str | None = None
+
+
+class BoardBatch(BaseModel):
+    items: list[BoardSummary]
+    missing_ids: list[int] = []
+
+
+class PartialBoardBatch(BaseModel):
+    items: list[PartialBoardSummary]
+    missing_ids: list[int] = []
+
+
+class Job(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    kind: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    progress: int
+    total: int | None = None
+    error: str | None = None
+    created_at: datetime
+    updated_at: datetime
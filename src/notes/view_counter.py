@@ -0,0 +1,140 @@
+import asyncio
+import logging
+from collections import Counter
+
+from sqlalchemy import Integer, column, update, values
+
+import config
+from database import async_session
+from src.notes.cache import update_views
+from src.notes.leaderboard import leaderboard
+from src.notes.models import Note
+
+logger = logging.getLogger(__name__)
+
+# asyncpg can bind at most 32767 parameters per statement
+FLUSH_CHUNK_SIZE = 1000
+
+
+class ViewCounter:
+    """Buffers note views in process and writes them to the database in batches.
+
+    Increments are accumulated per note id and flushed with one
+    ``UPDATE note ... FROM (VALUES ...)`` statement per chunk, either every
+    ``flush_interval`` seconds or as soon as ``flush_threshold`` distinct notes
+    are pending, whichever comes first. The same transaction adds them to the
+    buckets of the leaderboard.
+    """
+
+    def __init__(self, flush_interval: float, flush_threshold: int) -> None:
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._pending: Counter[int] = Counter()
+        self._in_flight: Counter[int] = Counter()
+        self._flush_lock = asyncio.Lock()
+        self._flush_requested = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def add(self, note_id: int, count: int = 1) -> int:
+        """Registers views of a note and returns its not yet persisted views."""
+
+        self._pending[note_id] += count
+        if len(self._pending) >= self.flush_threshold:
+            self._flush_requested.set()
+        return self.unflushed(note_id)
+
+    def unflushed(self, note_id: int) -> int:
+        """Returns views of a note which are not yet written to the database."""
+
+        return self._pending[note_id] + self._in_flight[note_id]
+
+    def discard(self, note_id: int) -> None:
+        """Drops pending views of a note, e.g. after it was deleted."""
+
+        self._pending.pop(note_id, None)
+
+    async def flush(self) -> None:
+        """Writes all pending views to the database."""
+
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            self._in_flight, self._pending = self._pending, Counter()
+            self._flush_requested.clear()
+            try:
+                rows = list(self._in_flight.items())
+                updated = []
+                async with async_session() as session:
+                    for start in range(0, len(rows), FLUSH_CHUNK_SIZE):
+                        increments = values(
+                            column("id", Integer),
+                            column("delta", Integer),
+                            name="increments",
+                        ).data(rows[start : start + FLUSH_CHUNK_SIZE])
+                        result = await session.execute(
+                            update(Note)
+                            .where(Note.id == increments.c.id)
+                            .values(
+                                views_count=Note.views_count + increments.c.delta,
+                                # views are not edits of the note
+                                updated_at=Note.updated_at,
+                            )
+                            .returning(Note.id, Note.board_id, Note.views_count)
+                        )
+                        updated.extend(result.tuples())
+                    await leaderboard.record(
+                        session,
+                        [
+                            (note_id, board_id, self._in_flight[note_id])
+                            for note_id, board_id, _ in updated
+                        ],
+                    )
+                    await session.commit()
+            except Exception:
+                # Keep the views so that the next flush retries them
+                self._pending.update(self._in_flight)
+                raise
+            finally:
+                self._in_flight = Counter()
+            # Cached notes and boards hold views count without pending views
+            await update_views(
+                {note_id: views_count for note_id, _, views_count in updated},
+                {board_id for _, board_id, _ in updated},
+            )
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._flush_requested.wait(), timeout=self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush note views")
+
+    def start(self) -> None:
+        """Starts periodic flushing in the background."""
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops periodic flushing and writes the remaining views."""
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+view_counter = ViewCounter(
+    flush_interval=config.settings.VIEWS_FLUSH_INTERVAL,
+    flush_threshold=config.settings.VIEWS_FLUSH_THRESHOLD,
+)
@@ -0,0 +1,55 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Shares one in-flight call per key between concurrent callers.
+
+    The call runs in a task of its own, so that a caller being cancelled does
+    not cancel it for the others. Its result is not kept once it completes.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.executions = 0
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+
+    @property
+    def coalescing_ratio(self) -> float:
+        """Returns the share of calls which joined a call already in flight."""
+
+        return 1 - self.executions / self.calls if self.calls else 0.0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """Returns result of call, joining the one in flight for key if any."""
+
+        self.calls += 1
+        task = self._tasks.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(call())
+            self._tasks[key] = task
+            task.add_done_callback(lambda task: self._discard(key, task))
+        return await asyncio.shield(task)
+
+    def forget(self, *keys: Hashable) -> None:
+        """Makes later calls for keys start anew, e.g. after the data changed."""
+
+        for key in keys:
+            self._tasks.pop(key, None)
+
+    def forget_all(self) -> None:
+        """Makes all later calls start anew."""
+
+        self._tasks.clear()
+
+    def _discard(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+import config
+from main import app
+from src.admission import BULK, READ, WRITE, AdmissionController, admission
+
+
+def controller(**kwargs) -> AdmissionController:
+    options = dict(
+        max_limit=1,
+        min_limit=1,
+        route_limit=1,
+        queue_size=10,
+        queue_timeout=1.0,
+        latency_target=0.1,
+    )
+    return AdmissionController(**{**options, **kwargs})
+
+
+async def test_reads_are_admitted_before_bulk_writes():
+    admission = controller()
+    assert await admission.acquire("running", WRITE)
+
+    bulk = asyncio.create_task(admission.acquire("bulk", BULK))
+    write = asyncio.create_task(admission.acquire("write", WRITE))
+    read = asyncio.create_task(admission.acquire("read", READ))
+    await asyncio.sleep(0)
+    assert admission.queued == 3
+
+    admission.release("running", 0.01)
+    assert await read and not write.done() and not bulk.done()
+    admission.release("read", 0.01)
+    assert await write and not bulk.done()
+    admission.release("write", 0.01)
+    assert await bulk
+
+
+async def test_full_queue_sheds_lowest_priority():
+    admission = controller(queue_size=1)
+    assert await admission.acquire("running", WRITE)
+
+    bulk = asyncio.create_task(admission.acquire("bulk", BULK))
+    await asyncio.sleep(0)
+    read = asyncio.create_task(admission.acquire("read", READ))
+    await asyncio.sleep(0)
+    assert not await bulk
+    assert not await admission.acquire("write", WRITE)
+    assert admission.rejected == 2
+
+    admission.release("running", 0.01)
+    assert await read
+
+
+async def test_waiters_are_rejected_after_queue_timeout():
+    admission = controller(queue_timeout=0.01)
+    assert await admission.acquire("running", READ)
+    assert not await admission.acquire("read", READ)
+    assert (admission.queued, admission.rejected) == (0, 1)
+
+
+async def test_route_limit_leaves_room_to_other_routes():
+    admission = controller(max_limit=2, queue_timeout=0.01)
+    assert await admission.acquire("slow", READ)
+    assert not await admission.acquire("slow", READ)
+    assert await admission.acquire("fast", READ)
+
+
+async def test_limit_adapts_to_latency():
+    admission = controller(max_limit=10, min_limit=2)
+    for _ in range(20):
+        assert await admission.acquire("slow", READ)
+        admission.release("slow", 1.0)
+    assert admission.limit == 2
+
+    for _ in range(50):
+        assert await admission.acquire("fast", READ)
+        admission.release("fast", 0.01)
+    assert admission.limit == 10
+
+    for _ in range(20):
+        assert await admission.acquire("bulk", BULK)
+        admission.release("bulk", 1.0, BULK)
+    assert admission.limit == 10
+
+
+def test_limits_follow_pool_connections():
+    connections = config.settings.DATABASE_POOL_SIZE
+    assert admission.max_limit == connections
+    assert admission.route_limit == int(
+        connections * config.settings.ADMISSION_ROUTE_SHARE
+    )
+
+
+async def test_overloaded_requests_fail_fast(
+    monkeypatch: pytest.MonkeyPatch, client: AsyncClient
+):
+    monkeypatch.setattr(admission, "limit", 0.0)
+    monkeypatch.setattr(admission, "queue_timeout", 0.01)
+
+    response = await client.get(app.url_path_for("list_notes"))
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(config.settings.ADMISSION_RETRY_AFTER)
+    assert response.json() == {
+        "detail": [{"msg": "The server is overloaded, retry later."}]
+    }
+
+    response = await client.get(app.url_path_for("get_liveness"))
+    assert response.status_code == 200
+    response = await client.get(app.url_path_for("get_metrics"))
+    assert response.status_code == 200
+    assert "admission_rejected_total" in response.text
@@ -1,8 +1,20 @@
+import asyncio
+import json
+from datetime import timedelta
+
+import pytest
 from httpx import AsyncClient
+from sqlalchemy import func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+import config
 from main import app
-from src.notes.models import Board, Note
+from src.cache import cache
+from src.notes import schemas
+from src.notes.cache import board_key
+from src.notes.jobs import job_queue
+from src.notes.models import Board, Job, Note
+from src.notes.view_counter import view_counter
 
 
 async def test_retrieve_board(client: AsyncClient, session: AsyncSession):
@@ -23,6 +35,30 @@ async def test_retrieve_board(client: AsyncClient, session: AsyncSession):
     assert result["name"] == board.name
 
 
+async def test_board_etag_of_uncached_board(client: AsyncClient, session: AsyncSession):
+    board = Board(name="Test board etag")
+    session.add(Note(text="Test board etag note", board=board))
+    await session.commit()
+
+    url = app.url_path_for("get_board", board_id=board.id)
+    etag = (await client.get(url)).headers["ETag"]
+    await cache.clear()
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert 'desc="1 queries"' in response.headers["Server-Timing"]
+    assert await cache.get(board_key(board.id)) is None
+
+    response = await client.get(url, headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == etag
+    response = await client.get(
+        app.url_path_for("get_board", board_id=999999),
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 404
+
+
 async def test_create_board(client: AsyncClient):
     name = "Test create board"
     response = await client.post(
@@ -47,6 +83,28 @@ async def test_update_board(client: AsyncClient, session: AsyncSession):
     assert result["name"] == name
 
 
+async def test_update_board_if_match(client: AsyncClient, session: AsyncSession):
+    board = Board(name="Test if match board")
+    session.add(board)
+    await session.commit()
+
+    url = app.url_path_for("update_board", board_id=board.id)
+    etag = (await client.get(app.url_path_for("get_board", board_id=board.id))).headers[
+        "ETag"
+    ]
+    responses = await asyncio.gather(
+        *(
+            client.patch(url, json={"name": f"Edit {i}"}, headers={"If-Match": etag})
+            for i in range(2)
+        )
+    )
+    assert sorted(response.status_code for response in responses) == [200, 412]
+
+    response = await client.patch(url, json={"name": "Unconditional"})
+    assert response.status_code == 200
+    assert response.json()["version"] == board.version + 2
+
+
 async def test_delete_board(client: AsyncClient, session: AsyncSession):
     board = Board(name="Test delete board")
     session.add(board)
@@ -55,12 +113,123 @@ async def test_delete_board(client: AsyncClient, session: AsyncSession):
     response = await client.delete(
         app.url_path_for("delete_board", board_id=board.id),
     )
-    assert response.status_code == 204
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+    await job_queue.run_pending()
 
     response = await client.get(
         app.url_path_for("get_board", board_id=board.id),
     )
     assert response.status_code == 404
+    response = await client.delete(
+        app.url_path_for("delete_board", board_id=board.id),
+    )
+    assert response.status_code == 404
+
+
+async def test_delete_board_deletes_its_notes_in_chunks(
+    monkeypatch: pytest.MonkeyPatch, client: AsyncClient, session: AsyncSession
+):
+    monkeypatch.setattr(config.settings, "BULK_CHUNK_SIZE", 2)
+    board = Board(name="Test delete board with notes")
+    notes = [Note(text=f"Test deleted with board {i}", board=board) for i in range(5)]
+    session.add_all(notes)
+    await session.commit()
+    await session.refresh(board)
+    note_ids = [note.id for note in notes]
+
+    response = await client.delete(
+        app.url_path_for("delete_board", board_id=board.id),
+    )
+    assert response.status_code == 202
+    job = response.json()
+    assert job["total"] == 5 and job["progress"] == 0
+    url = response.headers["Location"]
+    assert url.endswith(app.url_path_for("get_job", job_id=job["id"]))
+
+    assert await job_queue.run_pending() == 1
+    response = await client.get(url)
+    assert response.status_code == 200
+    job = response.json()
+    assert job["status"] == "succeeded" and job["progress"] == 5
+
+    session.expunge_all()
+    for note_id in note_ids:
+        assert await session.get(Note, note_id) is None
+    assert await session.get(Board, board.id) is None
+
+
+async def test_failed_job_is_retried(
+    monkeypatch: pytest.MonkeyPatch, client: AsyncClient, session: AsyncSession
+):
+    board = Board(name="Test failed job")
+    session.add(board)
+    await session.commit()
+
+    async def fail(payload: dict) -> tuple[int, bool]:
+        raise RuntimeError("Test failure")
+
+    monkeypatch.setitem(job_queue._steps, "delete_board", fail)
+    response = await client.delete(app.url_path_for("delete_board", board_id=board.id))
+    url = response.headers["Location"]
+    await job_queue.run_pending()
+    job = (await client.get(url)).json()
+    assert job["status"] == "failed"
+    assert "Test failure" in job["error"]
+    assert (
+        await client.get(app.url_path_for("get_board", board_id=board.id))
+    ).status_code == 200
+
+    monkeypatch.undo()
+    response = await client.get(app.url_path_for("get_job", job_id=0))
+    assert response.status_code == 404
+
+
+async def test_job_whose_lease_expired_is_retried(
+    client: AsyncClient, session: AsyncSession
+):
+    board = Board(name="Test expired job")
+    session.add(board)
+    await session.commit()
+
+    response = await client.delete(app.url_path_for("delete_board", board_id=board.id))
+    job_id = response.json()["id"]
+    # Claims without runs stand in for processes which died during a step
+    for attempt in range(1, job_queue.max_attempts + 1):
+        job = await job_queue.claim()
+        assert (job.id, job.status, job.attempts) == (job_id, "running", attempt)
+        await session.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .values(locked_until=func.localtimestamp() - timedelta(seconds=1))
+        )
+        await session.commit()
+
+    assert await job_queue.claim() is None
+    job = (await client.get(response.headers["Location"])).json()
+    assert job["status"] == "failed" and "expired" in job["error"]
+
+
+async def test_link_missing_note_or_board(client: AsyncClient, session: AsyncSession):
+    board = Board(name="Test link missing")
+    note = Note(text="Test link missing")
+    session.add_all([board, note])
+    await session.commit()
+    updated_at = board.updated_at
+
+    for board_id, note_id, msg in (
+        (0, note.id, "A board with this id does not exist."),
+        (board.id, 0, "A note with this id does not exist."),
+    ):
+        for endpoint in ("link_note_to_board", "unlink_note_from_board"):
+            response = await client.post(
+                app.url_path_for(endpoint, board_id=board_id, note_id=note_id),
+            )
+            assert response.status_code == 404
+            assert response.json()["detail"] == [{"msg": msg}]
+
+    await session.refresh(board)
+    assert board.updated_at == updated_at
 
 
 async def test_link_and_unlink_note_to_board(
@@ -88,3 +257,253 @@ async def test_link_and_unlink_note_to_board(
     )
     result = response.json()
     assert not result["notes"]
+
+
+async def test_list_boards(client: AsyncClient, session: AsyncSession):
+    boards = [Board(name=f"Test list board {i}") for i in range(3)]
+    session.add_all(boards)
+    await session.commit()
+
+    params = {"created_after": boards[0].created_at.isoformat(), "limit": 2}
+    response = await client.get(app.url_path_for("list_boards"), params=params)
+    assert response.status_code == 200
+    first_page = response.json()
+    assert "notes" not in first_page["items"][0]
+
+    params["cursor"] = first_page["next_cursor"]
+    response = await client.get(app.url_path_for("list_boards"), params=params)
+    second_page = response.json()
+    assert second_page["next_cursor"] is None
+    assert [item["id"] for item in first_page["items"] + second_page["items"]] == [
+        board.id for board in boards
+    ]
+
+
+async def test_board_notes_page_and_stream(
+    client: AsyncClient, session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(config.settings, "BOARD_NOTES_PAGE_SIZE", 2)
+    board = Board(name="Test board notes page")
+    notes = [Note(text=f"Test board page note {i}", board=board) for i in range(3)]
+    session.add_all(notes)
+    await session.commit()
+
+    response = await client.get(app.url_path_for("get_board", board_id=board.id))
+    result = response.json()
+    assert [note["id"] for note in result["notes"]] == [note.id for note in notes[:2]]
+    assert result["notes_count"] == 3
+    assert result["notes_next_cursor"]
+
+    response = await client.get(
+        app.url_path_for("stream_board_notes", board_id=board.id)
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == [note.id for note in notes]
+
+    response = await client.get(
+        app.url_path_for("stream_board_notes", board_id=board.id),
+        params={"cursor": result["notes_next_cursor"]},
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == [notes[2].id]
+
+    response = await client.get(app.url_path_for("stream_board_notes", board_id=0))
+    assert response.status_code == 404
+
+
+async def test_link_and_unlink_notes_in_bulk(
+    client: AsyncClient, session: AsyncSession
+):
+    board = Board(name="Test bulk link board")
+    notes = [Note(text=f"Test bulk link note {i}") for i in range(2)]
+    session.add_all([board, *notes])
+    await session.commit()
+    note_ids = [note.id for note in notes]
+
+    response = await client.post(
+        app.url_path_for("link_notes_to_board", board_id=board.id),
+        json={"note_ids": [*note_ids, 0]},
+    )
+    assert response.status_code == 201
+    result = response.json()
+    assert result["note_ids"] == note_ids
+    assert [error["index"] for error in result["errors"]] == [2]
+
+    response = await client.get(app.url_path_for("get_board", board_id=board.id))
+    assert [note["id"] for note in response.json()["notes"]] == note_ids
+
+    response = await client.post(
+        app.url_path_for("unlink_notes_from_board", board_id=board.id),
+        json={"note_ids": note_ids[:1]},
+    )
+    assert response.json()["note_ids"] == note_ids[:1]
+    response = await client.get(app.url_path_for("get_board", board_id=board.id))
+    assert [note["id"] for note in response.json()["notes"]] == note_ids[1:]
+
+    response = await client.post(
+        app.url_path_for("link_notes_to_board", board_id=0),
+        json={"note_ids": note_ids},
+    )
+    assert response.status_code == 404
+
+
+async def test_board_etag(client: AsyncClient, session: AsyncSession):
+    boards = [Board(name=f"Test etag board {i}") for i in range(2)]
+    note = Note(text="Test etag board note", board=boards[0])
+    session.add_all([*boards, note])
+    await session.commit()
+
+    url = app.url_path_for("get_board", board_id=boards[0].id)
+    response = await client.get(url)
+    etag = response.headers["ETag"]
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    await client.patch(
+        app.url_path_for("update_note", note_id=note.id), json={"text": "Edited"}
+    )
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["notes"][0]["text"] == "Edited"
+    etag = response.headers["ETag"]
+
+    await client.post(
+        app.url_path_for("link_note_to_board", board_id=boards[1].id, note_id=note.id)
+    )
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["notes"] == []
+
+
+async def test_board_payload_matches_schema(client: AsyncClient, session: AsyncSession):
+    board = Board(name="Test board payload")
+    notes = [Note(text=f"Test board payload note {i}", board=board) for i in range(2)]
+    session.add_all([board, *notes])
+    await session.commit()
+    # Whole seconds are encoded without the fraction
+    notes[0].updated_at = notes[0].updated_at.replace(microsecond=0)
+    await session.commit()
+
+    response = await client.get(app.url_path_for("get_board", board_id=board.id))
+    expected = schemas.Board(
+        id=board.id,
+        name=board.name,
+        notes=notes,
+        notes_count=2,
+        version=board.version,
+        created_at=board.created_at,
+        updated_at=board.updated_at,
+    )
+    assert response.json() == expected.model_dump(mode="json")
+
+
+async def test_board_counts(client: AsyncClient, session: AsyncSession):
+    boards = [Board(name=f"Test counts board {i}") for i in range(2)]
+    notes = [
+        Note(text=f"Test counts note {i}", board=boards[0], views_count=i)
+        for i in range(3)
+    ]
+    session.add_all([*boards, *notes])
+    await session.commit()
+
+    async def counts() -> list[tuple[int, int]]:
+        response = await client.get(
+            app.url_path_for("list_boards"),
+            params={"created_after": boards[0].created_at.isoformat()},
+        )
+        return [
+            (item["notes_count"], item["views_count"])
+            for item in response.json()["items"]
+        ]
+
+    assert await counts() == [(3, 3), (0, 0)]
+
+    await client.post(
+        app.url_path_for(
+            "link_note_to_board", board_id=boards[1].id, note_id=notes[2].id
+        )
+    )
+    await client.post(
+        app.url_path_for("link_notes_to_board", board_id=boards[1].id),
+        json={"note_ids": [notes[0].id, notes[1].id]},
+    )
+    await client.post(
+        app.url_path_for(
+            "unlink_note_from_board", board_id=boards[1].id, note_id=notes[0].id
+        )
+    )
+    assert await counts() == [(0, 0), (2, 3)]
+
+    await client.get(app.url_path_for("get_note", note_id=notes[1].id))
+    await view_counter.flush()
+    await client.delete(app.url_path_for("delete_note", note_id=notes[2].id))
+    assert await counts() == [(0, 0), (1, 2)]
+
+
+async def test_batch_get_boards(client: AsyncClient, session: AsyncSession):
+    boards = [Board(name=f"Test batch board {i}") for i in range(2)]
+    session.add_all(boards)
+    await session.commit()
+
+    response = await client.post(
+        app.url_path_for("batch_get_boards"),
+        json={"ids": [boards[1].id, 999999, boards[0].id]},
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert [item["id"] for item in result["items"]] == [boards[1].id, boards[0].id]
+    assert result["missing_ids"] == [999999]
+
+    response = await client.post(app.url_path_for("batch_get_boards"), json={"ids": []})
+    assert response.status_code == 422
+
+
+async def test_board_fields(client: AsyncClient, session: AsyncSession):
+    board = Board(name="Test board fields")
+    session.add(Note(text="Test board fields note", board=board))
+    await session.commit()
+
+    response = await client.get(
+        app.url_path_for("get_board", board_id=board.id),
+        params={"fields": "name,notes_count"},
+    )
+    assert response.status_code == 200
+    assert 'desc="1 queries"' in response.headers["Server-Timing"]
+    assert "FROM note" not in response.headers["Server-Timing"]
+    assert response.json() == {"id": board.id, "name": board.name, "notes_count": 1}
+    assert response.headers["ETag"] == f'W/"board-{board.id}-{board.version}"'
+    assert await cache.get(board_key(board.id)) is None
+
+    response = await client.get(
+        app.url_path_for("get_board", board_id=board.id),
+        params={"fields": "name", "include": "notes"},
+    )
+    result = response.json()
+    assert list(result) == ["name", "id", "notes", "notes_next_cursor"]
+    assert [note["text"] for note in result["notes"]] == ["Test board fields note"]
+
+    response = await client.get(
+        app.url_path_for("list_boards"),
+        params={
+            "fields": "views_count",
+            "order_by": "updated_at",
+            "created_after": board.created_at.isoformat(),
+        },
+    )
+    assert response.json()["items"] == [{"id": board.id, "views_count": 0}]
+
+    response = await client.post(
+        app.url_path_for("batch_get_boards"),
+        params={"fields": "name"},
+        json={"ids": [board.id]},
+    )
+    assert response.json()["items"] == [{"id": board.id, "name": board.name}]
+
+    response = await client.get(
+        app.url_path_for("get_board", board_id=board.id), params={"fields": "notes"}
+    )
+    assert response.status_code == 422
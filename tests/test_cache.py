@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from main import app
+from src.cache import MemoryCache, cache
+from src.notes.cache import CacheInvalidations, board_key, note_key
+from src.notes.models import Board, Note
+from src.notes.view_counter import view_counter
+
+
+async def test_memory_cache_evicts_least_recently_used():
+    memory_cache = MemoryCache(max_size=2, ttl=60)
+    await memory_cache.set("a", 1)
+    await memory_cache.set("b", 2)
+    assert await memory_cache.get("a") == 1
+    await memory_cache.set("c", 3)
+
+    assert await memory_cache.get("b") is None
+    assert await memory_cache.get("a") == 1
+    assert await memory_cache.get("c") == 3
+    assert memory_cache.stats().model_dump() == {
+        "hits": 3,
+        "misses": 1,
+        "evictions": 1,
+        "size": 2,
+    }
+
+
+async def test_memory_cache_expires_entries():
+    memory_cache = MemoryCache(max_size=2, ttl=0)
+    await memory_cache.set("a", 1)
+
+    assert await memory_cache.get("a") is None
+    assert memory_cache.stats().size == 0
+
+
+async def test_memory_cache_drops_values_of_older_generations():
+    memory_cache = MemoryCache(max_size=2, ttl=60)
+    generation = await memory_cache.generation("a")
+    await memory_cache.delete("a")
+    await memory_cache.set("a", 1, generation)
+    assert await memory_cache.get("a") is None
+
+    generation = await memory_cache.generation("a")
+    await memory_cache.set("a", 1, generation)
+    assert await memory_cache.get("a") == 1
+
+    # Generations of keys forgotten beyond max_size are not reused
+    generation = await memory_cache.generation("a")
+    await memory_cache.delete("a", "b", "c")
+    await memory_cache.set("a", 1, generation)
+    assert await memory_cache.get("a") is None
+
+
+async def test_memory_cache_updates_entries_in_place():
+    memory_cache = MemoryCache(max_size=10, ttl=60)
+    await memory_cache.set("a", 1)
+    generation = await memory_cache.generation("a")
+    await memory_cache.update("a", lambda value: value + 1)
+    await memory_cache.update("b", lambda value: value + 1)
+
+    assert await memory_cache.get("a") == 2
+    assert await memory_cache.get("b") is None
+    assert await memory_cache.generation("a") == generation
+
+
+async def test_read_started_before_update_is_not_cached(
+    monkeypatch: pytest.MonkeyPatch, client: AsyncClient, session: AsyncSession
+):
+    note = Note(text="Old")
+    session.add(note)
+    await session.commit()
+    url = app.url_path_for("get_note", note_id=note.id)
+
+    set_value = cache.set
+    loaded = asyncio.Event()
+
+    async def set_later(*args) -> None:
+        loaded.set()
+        await asyncio.sleep(0.2)
+        await set_value(*args)
+
+    monkeypatch.setattr(cache, "set", set_later)
+    read = asyncio.create_task(client.get(url))
+    await loaded.wait()
+    monkeypatch.setattr(cache, "set", set_value)
+    await client.patch(
+        app.url_path_for("update_note", note_id=note.id), json={"text": "New"}
+    )
+    assert (await read).json()["text"] == "Old"
+
+    response = await client.get(url)
+    assert response.json()["text"] == "New"
+
+
+async def test_invalidations_reach_other_processes():
+    processes = [CacheInvalidations("test_cache_invalidations") for _ in range(2)]
+    for process in processes:
+        await process.start()
+    try:
+        await cache.set("note:0", {"text": "Cached"})
+        await processes[0].publish(["note:0"])
+        async with asyncio.timeout(5):
+            while await cache.get("note:0") is not None:
+                await asyncio.sleep(0.01)
+    finally:
+        for process in processes:
+            await process.stop()
+    assert not processes[0].started and not processes[0].connected
+
+
+async def test_cached_board_is_invalidated_by_link(
+    client: AsyncClient, session: AsyncSession
+):
+    boards = [Board(name=f"Test cached board {i}") for i in range(2)]
+    note = Note(text="Test cached board note", board=boards[0])
+    session.add_all([*boards, note])
+    await session.commit()
+
+    for board in boards:
+        await client.get(app.url_path_for("get_board", board_id=board.id))
+    hits = cache.stats().hits
+    response = await client.get(app.url_path_for("get_board", board_id=boards[0].id))
+    assert cache.stats().hits == hits + 1
+    assert [item["id"] for item in response.json()["notes"]] == [note.id]
+
+    await client.post(
+        app.url_path_for("link_note_to_board", board_id=boards[1].id, note_id=note.id)
+    )
+
+    response = await client.get(app.url_path_for("get_board", board_id=boards[0].id))
+    assert response.json()["notes"] == []
+    response = await client.get(app.url_path_for("get_board", board_id=boards[1].id))
+    assert [item["id"] for item in response.json()["notes"]] == [note.id]
+
+    response = await client.get(app.url_path_for("get_cache_stats"))
+    assert response.json()["hits"] == cache.stats().hits
+
+
+async def test_view_flush_keeps_cached_note_and_board(
+    client: AsyncClient, session: AsyncSession
+):
+    board = Board(name="Test cached views board")
+    note = Note(text="Test cached views note", board=board)
+    session.add_all([board, note])
+    await session.commit()
+
+    await client.get(app.url_path_for("get_note", note_id=note.id))
+    await client.get(app.url_path_for("get_board", board_id=board.id))
+    await view_counter.flush()
+
+    assert (await cache.get(note_key(note.id)))["views_count"] == 1
+    assert (await cache.get(board_key(board.id)))["notes"][0]["views_count"] == 1
+    hits = cache.stats().hits
+    response = await client.get(app.url_path_for("get_note", note_id=note.id))
+    assert cache.stats().hits == hits + 1
+    assert response.json()["views_count"] == 2
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import tracemalloc
+from contextlib import AsyncExitStack
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from main import app
+from src.notes import events
+from src.notes.events import BoardEventBroker, board_events
+from src.notes.jobs import job_queue
+from src.notes.models import Board, Note
+
+
+async def next_event(subscription) -> dict:
+    return json.loads(await subscription.get(timeout=5))
+
+
+async def test_board_events_are_delivered(client: AsyncClient, session: AsyncSession):
+    boards = [Board(name=f"Test events board {i}") for i in range(2)]
+    note = Note(text="Test events note", board=boards[0])
+    session.add_all([*boards, note])
+    await session.commit()
+
+    async with AsyncExitStack() as stack:
+        first, second = [
+            await stack.enter_async_context(board_events.subscribe(board.id))
+            for board in boards
+        ]
+
+        await client.patch(
+            app.url_path_for("update_note", note_id=note.id), json={"text": "Edited"}
+        )
+        event = await next_event(first)
+        assert event == {
+            "type": "note_updated",
+            "board_id": boards[0].id,
+            "note_id": note.id,
+        }
+
+        await client.post(
+            app.url_path_for(
+                "link_note_to_board", board_id=boards[1].id, note_id=note.id
+            )
+        )
+        assert (await next_event(first))["type"] == "note_unlinked"
+        assert (await next_event(second))["type"] == "note_linked"
+
+        await client.delete(app.url_path_for("delete_board", board_id=boards[1].id))
+        await job_queue.run_pending()
+        assert (await next_event(second))["type"] == "board_deleted"
+        assert await first.get(timeout=0.1) is None
+
+
+async def test_bulk_link_sends_one_event_per_chunk(
+    monkeypatch: pytest.MonkeyPatch, client: AsyncClient, session: AsyncSession
+):
+    monkeypatch.setattr(events, "EVENT_NOTE_IDS_CHUNK_SIZE", 2)
+    boards = [Board(name=f"Test bulk events board {i}") for i in range(2)]
+    notes = [Note(text=f"Test bulk events note {i}", board=boards[0]) for i in range(3)]
+    session.add_all([*boards, *notes])
+    await session.commit()
+    note_ids = [note.id for note in notes]
+
+    async with AsyncExitStack() as stack:
+        first, second = [
+            await stack.enter_async_context(board_events.subscribe(board.id))
+            for board in boards
+        ]
+        response = await client.post(
+            app.url_path_for("link_notes_to_board", board_id=boards[1].id),
+            json={"note_ids": note_ids},
+        )
+        assert response.status_code == 201
+
+        unlinked = [await next_event(first) for _ in range(2)]
+        assert {event["type"] for event in unlinked} == {"notes_unlinked"}
+        assert sorted(sum((event["note_ids"] for event in unlinked), [])) == note_ids
+        linked = [await next_event(second) for _ in range(2)]
+        assert {event["type"] for event in linked} == {"notes_linked"}
+        assert sorted(sum((event["note_ids"] for event in linked), [])) == note_ids
+        assert await first.get(timeout=0.1) is None
+        assert await second.get(timeout=0.1) is None
+
+
+async def test_slow_subscriber_is_evicted():
+    broker = BoardEventBroker("test_board_events", queue_size=2)
+    async with broker.subscribe(1) as slow, broker.subscribe(1) as fast:
+        for i in range(3):
+            broker._dispatch(None, 0, broker.channel, json.dumps({"board_id": 1}))
+            await fast.get()
+
+        assert slow.evicted and not fast.evicted
+        assert broker.evictions == 1
+        assert broker.subscribers == 1
+        assert [await slow.get(), await slow.get()] == ['{"board_id": 1}'] * 2
+        assert await slow.get() is None
+    await broker.stop()
+
+
+async def test_idle_subscribers_memory():
+    broker = BoardEventBroker("test_board_events", queue_size=100)
+    # Opens the listener connection before measuring
+    async with broker.subscribe(0):
+        pass
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    async with AsyncExitStack() as stack:
+        subscriptions = [
+            await stack.enter_async_context(broker.subscribe(i % 100))
+            for i in range(10000)
+        ]
+        # Idle subscribers wait for events, as the streaming endpoints do
+        waiters = [asyncio.create_task(s.get()) for s in subscriptions]
+        await asyncio.sleep(0)
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+        assert broker.subscribers == 10000
+        assert used < 10000 * 4096
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+    assert broker.subscribers == 0
+    await broker.stop()
+
+
+async def test_board_events_of_missing_board(client: AsyncClient):
+    response = await client.get(
+        app.url_path_for("stream_board_events", board_id=999999)
+    )
+    assert response.status_code == 404
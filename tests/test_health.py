@@ -0,0 +1,96 @@
+import asyncio
+import signal
+
+import pytest
+import uvicorn
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import config
+from database import create_engine, warm_up
+from main import app, lifespan
+from src.health import drain_on_exit, health
+from src.notes.endpoints import warm_up_statements
+from src.notes.events import board_events
+from src.notes.models import Board
+
+
+async def test_warm_up_keeps_connections_in_pool():
+    engine = create_engine(config.settings.TEST_SQLALCHEMY_DATABASE_URI)
+    await warm_up(engine, 3, warm_up_statements())
+    assert engine.pool.checkedin() == 3
+    assert engine.pool.wait_time.count == 3
+
+    async with engine.connect():
+        pass
+    assert engine.pool.checkedin() == 3
+    await engine.dispose()
+
+
+class DrainingServer(uvicorn.Server):
+    pass
+
+
+drain_on_exit(DrainingServer, delay=0.5)
+
+
+async def test_shutdown_signal_drains_before_server_stops(
+    monkeypatch: pytest.MonkeyPatch, session: AsyncSession
+):
+    # Without the lifespan, so that the pools of other tests are not disposed of
+    monkeypatch.setattr(health, "state", "ready")
+    monkeypatch.setattr(board_events, "closed", False)
+    board = Board(name="Test draining board")
+    session.add(board)
+    await session.commit()
+
+    server = DrainingServer(
+        uvicorn.Config(
+            app, host="127.0.0.1", port=0, lifespan="off", log_level="warning"
+        )
+    )
+    monkeypatch.setattr(server, "install_signal_handlers", lambda: None)
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    async with AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+        events_url = app.url_path_for("stream_board_events", board_id=board.id)
+        async with client.stream("GET", events_url) as events:
+            assert events.status_code == 200
+            while not board_events.subscribers:
+                await asyncio.sleep(0.01)
+            server.handle_exit(signal.SIGTERM, None)
+
+            # Still accepting requests, but no longer ready, and events end
+            async with AsyncClient(base_url=f"http://127.0.0.1:{port}") as probe:
+                response = await probe.get(app.url_path_for("get_readiness"))
+            assert response.status_code == 503
+            assert response.json()["state"] == "draining"
+            async for _ in events.aiter_lines():
+                pass
+            assert not serving.done()
+
+    await asyncio.wait_for(serving, 5)
+    assert board_events.subscribers == 0 and board_events.closed
+
+
+async def test_readiness_follows_lifespan(
+    monkeypatch: pytest.MonkeyPatch, client: AsyncClient
+):
+    monkeypatch.setattr(health, "state", "starting")
+    response = await client.get(app.url_path_for("get_readiness"))
+    assert response.status_code == 503
+    assert response.json()["state"] == "starting"
+    response = await client.get(app.url_path_for("get_liveness"))
+    assert response.status_code == 200
+
+    async with lifespan(app):
+        response = await client.get(app.url_path_for("get_readiness"))
+        assert response.status_code == 200
+        assert response.json() == {"state": "ready", "in_flight": 1}
+
+    response = await client.get(app.url_path_for("get_readiness"))
+    assert response.status_code == 503
+    assert response.json()["state"] == "draining"
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from main import app
+from src.notes.leaderboard import Leaderboard, leaderboard
+from src.notes.models import Board, Note, NoteViewBucket
+from src.notes.view_counter import view_counter
+
+
+async def top(client: AsyncClient, **params) -> list[tuple[int, int]]:
+    response = await client.get(app.url_path_for("get_top_notes"), params=params)
+    assert response.status_code == 200
+    return [(item["id"], item["views"]) for item in response.json()["items"]]
+
+
+async def test_top_notes(client: AsyncClient, session: AsyncSession):
+    boards = [Board(name=f"Test top board {i}") for i in range(2)]
+    notes = [Note(text=f"Test top note {i}", board=boards[i % 2]) for i in range(4)]
+    session.add_all(notes)
+    await session.commit()
+
+    for note, views in zip(notes, [1000, 3000, 2000, 5]):
+        view_counter.add(note.id, views)
+    await view_counter.flush()
+    await client.get(app.url_path_for("get_note", note_id=notes[0].id))
+    await view_counter.flush()
+    await leaderboard.refresh()
+
+    assert await top(client, limit=3) == [
+        (notes[1].id, 3000),
+        (notes[2].id, 2000),
+        (notes[0].id, 1001),
+    ]
+    assert await top(client, board_id=boards[0].id, window="week") == [
+        (notes[2].id, 2000),
+        (notes[0].id, 1001),
+    ]
+    assert await top(client, board_id=boards[1].id, limit=1) == [(notes[1].id, 3000)]
+
+    await client.post(
+        app.url_path_for(
+            "link_note_to_board", board_id=boards[0].id, note_id=notes[3].id
+        )
+    )
+    await client.delete(app.url_path_for("delete_note", note_id=notes[1].id))
+    view_counter.add(notes[3].id)
+    await view_counter.flush()
+    await leaderboard.refresh()
+    assert (notes[1].id, 3000) not in await top(client, limit=100)
+    assert await top(client, board_id=boards[0].id) == [
+        (notes[2].id, 2000),
+        (notes[0].id, 1001),
+        (notes[3].id, 6),
+    ]
+
+    response = await client.get(
+        app.url_path_for("get_top_notes"), params={"window": "year"}
+    )
+    assert response.status_code == 422
+
+
+async def test_top_notes_of_windows(client: AsyncClient, session: AsyncSession):
+    board = Board(name="Test top windows board")
+    notes = [Note(text=f"Test top windows note {i}", board=board) for i in range(3)]
+    session.add_all(notes)
+    await session.commit()
+
+    now = datetime.now()
+    session.add_all(
+        [
+            NoteViewBucket(
+                bucket=leaderboard.bucket(now - timedelta(hours=2)),
+                note_id=notes[0].id,
+                board_id=board.id,
+                views=10,
+            ),
+            NoteViewBucket(
+                bucket=leaderboard.bucket(now - timedelta(days=8)),
+                note_id=notes[1].id,
+                board_id=board.id,
+                views=10,
+            ),
+        ]
+    )
+    await session.commit()
+    view_counter.add(notes[2].id, 5)
+    await view_counter.flush()
+    await leaderboard.refresh()
+
+    assert await top(client, board_id=board.id, window="hour") == [(notes[2].id, 5)]
+    assert await top(client, board_id=board.id, window="day") == [
+        (notes[0].id, 10),
+        (notes[2].id, 5),
+    ]
+    expired = await session.scalars(
+        select(NoteViewBucket).where(NoteViewBucket.note_id == notes[1].id)
+    )
+    assert not expired.all()
+
+
+def test_buckets_and_refreshes_of_windows():
+    board = Leaderboard(
+        windows={"minute": 60, "week": 604800},
+        bucket_size=60,
+        size=10,
+        refresh_interval=10,
+    )
+    assert board.bucket(datetime(2026, 10, 18, 14, 59, 59, 999999)) == datetime(
+        2026, 10, 18, 14, 59
+    )
+    now = datetime.now()
+    assert board.due(now) == ["minute", "week"]
+
+    board.refreshed_at = {"minute": now, "week": now}
+    assert board.due(now + timedelta(seconds=10)) == ["minute"]
+    assert board.due(now + timedelta(seconds=605)) == ["minute", "week"]
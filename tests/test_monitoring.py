@@ -0,0 +1,94 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import config
+from database import async_engine, create_engine
+from main import app
+from src.metrics import SLOWEST_STATEMENT_LENGTH, Histogram, RequestStats
+from src.notes.models import Note
+
+
+def test_histogram_counts_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 5):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot.buckets == {"0.1": 2, "1": 3, "+Inf": 4}
+    assert snapshot.count == 4
+    assert snapshot.sum == pytest.approx(5.65)
+
+
+async def test_pool_stats(client: AsyncClient):
+    await client.get(app.url_path_for("list_notes"))
+
+    response = await client.get(app.url_path_for("get_pool_stats"))
+    assert response.status_code == 200
+    result = response.json()
+    assert result["size"] == config.settings.DATABASE_POOL_SIZE
+    assert result["idle"] >= 1
+    assert result["wait_time"]["count"] >= 1
+    assert result["checkout_latency"]["count"] >= result["wait_time"]["count"]
+
+
+async def test_pool_histograms_are_per_engine():
+    engine = create_engine(config.settings.TEST_SQLALCHEMY_DATABASE_URI)
+    wait_time = async_engine.pool.wait_time.count
+    async with engine.connect():
+        pass
+    assert engine.pool.wait_time.count == 1
+    assert async_engine.pool.wait_time.count == wait_time
+
+    await engine.dispose()
+    assert engine.pool.wait_time.count == 1
+
+
+async def test_server_timing_header(client: AsyncClient, session: AsyncSession):
+    note = Note(text="Test server timing")
+    session.add(note)
+    await session.commit()
+
+    response = await client.patch(
+        app.url_path_for("update_note", note_id=note.id), json={"text": "Updated"}
+    )
+    server_timing = response.headers["Server-Timing"]
+    assert 'desc="1 queries"' in server_timing
+    assert "db-pool;dur=" in server_timing
+    assert "db-slowest;dur=" in server_timing
+    assert ';desc="WITH note_board AS' in server_timing
+
+
+def test_slowest_statement_is_quoted():
+    stats = RequestStats()
+    stats.record_query("SELECT \"text\"\n  FROM note WHERE text = '\\'", 0.1)
+    assert 'desc="SELECT \\"text\\" FROM note WHERE text = \'\\\\\'"' in (
+        stats.server_timing(1)
+    )
+
+    stats.record_query(f"SELECT {'x, ' * 100}é", 0.2)
+    desc = stats.server_timing(1).split('desc="')[2].split('"')[0]
+    assert len(desc) == SLOWEST_STATEMENT_LENGTH
+    assert desc.startswith("SELECT x, x") and desc.endswith("...")
+
+
+async def test_prometheus_metrics(client: AsyncClient):
+    await client.get(app.url_path_for("list_boards"))
+
+    response = await client.get(app.url_path_for("get_metrics"))
+    assert response.status_code == 200
+    assert 'db_request_queries_bucket{route="list_boards",le="1"}' in response.text
+    assert "db_pool_checked_out " in response.text
+    assert "cache_hits_total " in response.text
+
+
+async def test_slow_queries_are_logged(
+    client: AsyncClient,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+):
+    monkeypatch.setattr(config.settings, "SLOW_QUERY_THRESHOLD", 0)
+
+    await client.get(app.url_path_for("list_boards"))
+
+    assert any("Slow query" in message for message in caplog.messages)
@@ -2,7 +2,8 @@ from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from main import app
-from src.notes.models import Note
+from src.notes.models import Board, Note
+from src.notes.view_counter import view_counter
 
 
 async def test_retrieve_note(client: AsyncClient, session: AsyncSession):
@@ -20,6 +21,28 @@ async def test_retrieve_note(client: AsyncClient, session: AsyncSession):
     assert result["views_count"] == 1
 
 
+async def test_note_views_are_flushed(client: AsyncClient, session: AsyncSession):
+    note = Note(text="Test flush note views")
+    session.add(note)
+    await session.commit()
+
+    for views_count in (1, 2):
+        response = await client.get(
+            app.url_path_for("get_note", note_id=note.id),
+        )
+        assert response.json()["views_count"] == views_count
+
+    await view_counter.flush()
+    await session.refresh(note)
+    assert note.views_count == 2
+    assert view_counter.unflushed(note.id) == 0
+
+    response = await client.get(
+        app.url_path_for("get_note", note_id=note.id),
+    )
+    assert response.json()["views_count"] == 3
+
+
 async def test_create_note(client: AsyncClient):
     text = "Test create note text"
     response = await client.post(
@@ -58,3 +81,209 @@ async def test_delete_note(client: AsyncClient, session: AsyncSession):
         app.url_path_for("get_note", note_id=note.id),
     )
     assert response.status_code == 404
+
+
+async def test_list_notes(client: AsyncClient, session: AsyncSession):
+    board = Board(name="Test list notes board")
+    notes = [Note(text=f"Test list note {i}", board=board) for i in range(3)]
+    session.add_all(notes)
+    await session.commit()
+
+    for order_by in ("id", "updated_at"):
+        params = {"board_id": board.id, "order_by": order_by, "limit": 2}
+        response = await client.get(app.url_path_for("list_notes"), params=params)
+        assert response.status_code == 200
+        first_page = response.json()
+        assert len(first_page["items"]) == 2
+        assert first_page["next_cursor"]
+
+        params["cursor"] = first_page["next_cursor"]
+        response = await client.get(app.url_path_for("list_notes"), params=params)
+        second_page = response.json()
+        assert second_page["next_cursor"] is None
+        assert [item["id"] for item in first_page["items"] + second_page["items"]] == [
+            note.id for note in notes
+        ]
+
+    response = await client.get(
+        app.url_path_for("list_notes"), params={"cursor": "not a cursor"}
+    )
+    assert response.status_code == 400
+
+
+async def test_create_notes_in_bulk(client: AsyncClient, session: AsyncSession):
+    notes = [{"text": "Test bulk note 1"}, {"text": "x" * 251}, {"text": "Test bulk 2"}]
+    response = await client.post(app.url_path_for("create_new_notes"), json=notes)
+    assert response.status_code == 201
+    result = response.json()
+    assert len(result["ids"]) == 2
+    assert [error["index"] for error in result["errors"]] == [1]
+    assert (await session.get(Note, result["ids"][1])).text == notes[2]["text"]
+
+    response = await client.post(
+        app.url_path_for("create_new_notes"),
+        content=b'{"text": "Test ndjson note"}\n{"txt": ""}\n',
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 201
+    result = response.json()
+    assert len(result["ids"]) == 1
+    assert [error["index"] for error in result["errors"]] == [1]
+
+    response = await client.post(
+        app.url_path_for("create_new_notes"), json={"text": "Not an array"}
+    )
+    assert response.status_code == 422
+
+
+async def test_search_notes(client: AsyncClient, session: AsyncSession):
+    board = Board(name="Test search board")
+    best = Note(text="zebra zebra crossing", board=board)
+    other = Note(text="zebra in the zoo", board=board)
+    elsewhere = Note(text="zebra outside of the board")
+    session.add_all([best, other, elsewhere])
+    await session.commit()
+
+    params = {"q": "zebra", "board_id": board.id, "limit": 1}
+    response = await client.get(app.url_path_for("search_notes"), params=params)
+    assert response.status_code == 200
+    first_page = response.json()
+    assert [item["id"] for item in first_page["items"]] == [best.id]
+
+    params["cursor"] = first_page["next_cursor"]
+    response = await client.get(app.url_path_for("search_notes"), params=params)
+    second_page = response.json()
+    assert [item["id"] for item in second_page["items"]] == [other.id]
+    assert second_page["next_cursor"] is None
+
+    response = await client.get(
+        app.url_path_for("search_notes"), params={"q": "zebra crossing"}
+    )
+    assert [item["id"] for item in response.json()["items"]] == [best.id]
+
+
+async def test_note_etag(client: AsyncClient, session: AsyncSession):
+    note = Note(text="Test etag note")
+    session.add(note)
+    await session.commit()
+
+    url = app.url_path_for("get_note", note_id=note.id)
+    etag = (await client.get(url)).headers["ETag"]
+    assert etag.startswith("W/")
+    response = await client.get(url, headers={"If-None-Match": f'{etag}, "x"'})
+    assert response.status_code == 304
+    response = await client.get(url, headers={"If-None-Match": etag.removeprefix("W/")})
+    assert response.status_code == 304
+
+    response = await client.patch(
+        app.url_path_for("update_note", note_id=note.id), json={"text": "Edited"}
+    )
+    assert response.headers["ETag"] != etag
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["text"] == "Edited"
+
+
+async def test_update_note_if_match(client: AsyncClient, session: AsyncSession):
+    note = Note(text="Test if match note")
+    session.add(note)
+    await session.commit()
+
+    url = app.url_path_for("update_note", note_id=note.id)
+    etag = (await client.get(app.url_path_for("get_note", note_id=note.id))).headers[
+        "ETag"
+    ]
+    response = await client.patch(
+        url, json={"text": "First"}, headers={"If-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert response.headers["ETag"] != etag
+
+    for if_match in [etag, 'W/"note-0-2"', "garbage"]:
+        response = await client.patch(
+            url, json={"text": "Second"}, headers={"If-Match": if_match}
+        )
+        assert response.status_code == 412
+    response = await client.patch(
+        url, json={"text": "Second"}, headers={"If-Match": "*"}
+    )
+    assert response.status_code == 200
+    assert response.json()["text"] == "Second"
+
+    response = await client.patch(
+        app.url_path_for("update_note", note_id=0),
+        json={"text": "Missing"},
+        headers={"If-Match": etag},
+    )
+    assert response.status_code == 404
+
+
+async def test_batch_get_notes(client: AsyncClient, session: AsyncSession):
+    notes = [Note(text=f"Test batch note {i}") for i in range(3)]
+    session.add_all(notes)
+    await session.commit()
+    await client.get(app.url_path_for("get_note", note_id=notes[0].id))
+
+    ids = [notes[2].id, 999999, notes[0].id, notes[1].id, notes[2].id]
+    response = await client.post(app.url_path_for("batch_get_notes"), json={"ids": ids})
+    assert response.status_code == 200
+    assert 'desc="1 queries"' in response.headers["Server-Timing"]
+    result = response.json()
+    assert [item["id"] for item in result["items"]] == [
+        notes[2].id,
+        notes[0].id,
+        notes[1].id,
+    ]
+    assert [item["views_count"] for item in result["items"]] == [1, 2, 1]
+    assert result["missing_ids"] == [999999]
+
+
+async def test_note_fields(client: AsyncClient, session: AsyncSession):
+    board = Board(name="Test note fields board")
+    notes = [Note(text=f"Test note fields {i}", board=board) for i in range(3)]
+    session.add_all(notes)
+    await session.commit()
+
+    params = {"board_id": board.id, "order_by": "updated_at", "limit": 2}
+    response = await client.get(
+        app.url_path_for("list_notes"), params={**params, "fields": "text"}
+    )
+    assert response.status_code == 200
+    assert 'desc="1 queries"' in response.headers["Server-Timing"]
+    page = response.json()
+    assert page["items"] == [{"text": note.text, "id": note.id} for note in notes[:2]]
+    response = await client.get(
+        app.url_path_for("list_notes"),
+        params={**params, "fields": "text", "cursor": page["next_cursor"]},
+    )
+    assert response.json()["items"] == [{"text": notes[2].text, "id": notes[2].id}]
+
+    response = await client.get(
+        app.url_path_for("get_note", note_id=notes[0].id),
+        params={"fields": "views_count,id"},
+    )
+    assert response.json() == {"id": notes[0].id, "views_count": 1}
+
+    response = await client.post(
+        app.url_path_for("batch_get_notes"),
+        params={"fields": "version"},
+        json={"ids": [notes[1].id]},
+    )
+    assert response.json()["items"] == [{"id": notes[1].id, "version": 1}]
+
+    response = await client.get(
+        app.url_path_for("list_notes"), params={"fields": "text,board"}
+    )
+    assert response.status_code == 422
+
+
+async def test_note_fields_are_documented(client: AsyncClient):
+    response = await client.get(app.openapi_url)
+    openapi = response.json()
+    parameters = openapi["paths"]["/note/{note_id}"]["get"]["parameters"]
+    fields = next(
+        parameter for parameter in parameters if parameter["name"] == "fields"
+    )
+    assert "views_count" in fields["schema"]["anyOf"][0]["pattern"]
+    assert openapi["components"]["schemas"]["PartialNote"]["required"] == ["id"]
@@ -0,0 +1,98 @@
+from datetime import date, datetime
+
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from main import app
+from src.notes.models import Board, Note, NoteArchive
+from src.notes.partitions import PartitionMaintenance, add_months
+
+
+def test_add_months():
+    assert add_months(date(2001, 1, 31), 1) == date(2001, 2, 1)
+    assert add_months(date(2001, 1, 1), -1) == date(2000, 12, 1)
+    assert add_months(date(2001, 11, 5), 14) == date(2003, 1, 1)
+
+
+async def test_cold_partitions_are_archived(client: AsyncClient, session: AsyncSession):
+    maintenance = PartitionMaintenance(
+        interval=0, months_ahead=1, archive_after_months=1
+    )
+    assert await maintenance.run(date(2001, 1, 1)) == (
+        ["note_p200101", "note_p200102"],
+        [],
+    )
+
+    board = Board(name="Test archived board")
+    note = Note(text="Test archived note", board=board, created_at=datetime(2001, 1, 9))
+    session.add_all([board, note])
+    await session.commit()
+    await session.refresh(board)
+    note_id, version = note.id, board.version
+    # Dropping a partition locks the boards its notes reference
+    await session.commit()
+
+    assert await maintenance.run(date(2001, 3, 5)) == (
+        ["note_p200103", "note_p200104"],
+        ["note_p200101"],
+    )
+    session.expire_all()
+    assert await session.scalar(select(Note.id).where(Note.id == note_id)) is None
+    assert await session.get(NoteArchive, note_id)
+    await session.refresh(board)
+    assert (board.notes_count, board.version) == (1, version + 1)
+    board_id = board.id
+    await session.commit()
+
+    for _ in range(2):
+        response = await client.get(app.url_path_for("get_note", note_id=note_id))
+        assert response.status_code == 200
+        assert response.json()["text"] == "Test archived note"
+        assert response.json()["views_count"] == 0
+
+    response = await client.post(
+        app.url_path_for("batch_get_notes"), json={"ids": [note_id]}
+    )
+    assert [note["id"] for note in response.json()["items"]] == [note_id]
+    assert response.json()["missing_ids"] == []
+
+    response = await client.patch(
+        app.url_path_for("update_note", note_id=note_id), json={"text": "Edited"}
+    )
+    assert response.status_code == 409
+    response = await client.delete(app.url_path_for("delete_note", note_id=note_id))
+    assert response.status_code == 409
+
+    response = await client.get(app.url_path_for("get_board", board_id=board_id))
+    assert response.json()["notes"] == []
+
+
+async def test_archived_notes_count_on_boards(
+    client: AsyncClient, session: AsyncSession
+):
+    maintenance = PartitionMaintenance(
+        interval=0, months_ahead=1, archive_after_months=1
+    )
+    await maintenance.run(date(2001, 1, 1))
+    board = Board(name="Test archived count board")
+    archived = Note(text="Test archived", board=board, created_at=datetime(2001, 1, 9))
+    session.add(archived)
+    await session.commit()
+    await maintenance.run(date(2001, 3, 5))
+    session.add_all([Note(text=f"Test live {i}", board=board) for i in range(2)])
+    await session.commit()
+
+    url = app.url_path_for("get_board", board_id=board.id)
+    fields = {"fields": "notes_count"}
+    # Just the fields of the board, then all of it, cached, then the fields again
+    counts = [
+        (await client.get(url, params=fields)).json()["notes_count"],
+        (await client.get(url)).json()["notes_count"],
+        (await client.get(url, params=fields)).json()["notes_count"],
+    ]
+    response = await client.post(
+        app.url_path_for("batch_get_boards"), params=fields, json={"ids": [board.id]}
+    )
+    counts.append(response.json()["items"][0]["notes_count"])
+    assert counts == [3, 3, 3, 3]
@@ -0,0 +1,298 @@
+"""Guards query plans of the endpoints against regressions.
+
+Every statement which an endpoint of src.notes.endpoints issues against a
+seeded dataset is explained with EXPLAIN (ANALYZE, BUFFERS). A plan fails when
+it scans one of the large tables sequentially or touches more buffers than
+BUFFER_BUDGET. Statements are explained in a transaction which is rolled back,
+so explaining writes does not change the data.
+"""
+from collections.abc import AsyncGenerator, Awaitable, Callable, Iterator
+from contextlib import contextmanager
+
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import event, text
+
+from database import async_engine
+from main import app
+from src.notes.jobs import job_queue
+from src.notes.leaderboard import leaderboard
+from src.notes.view_counter import view_counter
+
+BOARDS = 2000
+NOTES_PER_BOARD = 25
+ARCHIVED_PER_BOARD = 5
+# Pages of shared buffers a statement may hit or read, a small fraction of the
+# ones of note and note_archive in the seeded dataset
+BUFFER_BUDGET = 200
+# Tables of fewer pages, like empty partitions or the job queue, are scanned
+# faster than looked up in an index
+SEQ_SCAN_PAGES = 10
+SEED_NAME = "Test plans board"
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+@pytest_asyncio.fixture(scope="module")
+async def dataset(test_db_setup_sessionmaker) -> AsyncGenerator[dict, None]:
+    async with async_engine.begin() as conn:
+        board_ids = list(
+            await conn.scalars(
+                text(
+                    "INSERT INTO board (name, created_at, updated_at)"
+                    " SELECT :name, now(), now() FROM generate_series(1, :boards)"
+                    " RETURNING id"
+                ),
+                {"name": SEED_NAME, "boards": BOARDS},
+            )
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO note (board_id, text, views_count, created_at, updated_at)"
+                " SELECT board_id, 'Test plans note ' || md5(board_id || '-' || i), i % 100,"
+                " now() - i * interval '1 minute', now()"
+                " FROM unnest(CAST(:board_ids AS integer[])) AS board_id,"
+                " generate_series(1, :notes) AS i"
+            ),
+            {"board_ids": board_ids, "notes": NOTES_PER_BOARD},
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO note_archive"
+                " (id, board_id, text, views_count, created_at, updated_at)"
+                " SELECT nextval('note_id_seq'), board_id, 'Test archived ' || i, 0,"
+                " now() - interval '2 years', now() - interval '2 years'"
+                " FROM unnest(CAST(:board_ids AS integer[])) AS board_id,"
+                " generate_series(1, :notes) AS i"
+            ),
+            {"board_ids": board_ids, "notes": ARCHIVED_PER_BOARD},
+        )
+        note_ids = list(
+            await conn.scalars(
+                text("SELECT id FROM note WHERE board_id = :board_id ORDER BY id"),
+                {"board_id": board_ids[0]},
+            )
+        )
+        word = await conn.scalar(
+            text("SELECT split_part(text, ' ', 4) FROM note WHERE id = :id"),
+            {"id": note_ids[-1]},
+        )
+        archived_id = await conn.scalar(
+            text("SELECT max(id) FROM note_archive WHERE board_id = :board_id"),
+            {"board_id": board_ids[0]},
+        )
+    async with async_engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in ["board", "note", "note_archive"]:
+            await conn.execute(text(f"VACUUM ANALYZE {table}"))
+    yield {
+        "board_ids": board_ids,
+        "note_ids": note_ids,
+        "archived_id": archived_id,
+        "word": word,
+    }
+    async with async_engine.begin() as conn:
+        await conn.execute(
+            text("DELETE FROM board WHERE name = :name"), {"name": SEED_NAME}
+        )
+
+
+@contextmanager
+def captured_statements() -> Iterator[list[tuple[str, tuple]]]:
+    """Collects statements executed on the engine with their parameters."""
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        # Statements executed with many sets of parameters are explained with
+        # the first one, batches of insertmanyvalues come with one flat set
+        if executemany and parameters and isinstance(parameters[0], (list, tuple)):
+            parameters = parameters[0]
+        statements.append((statement, tuple(parameters or ())))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+
+async def explain(statement: str, parameters: tuple) -> dict:
+    """Returns plan of a statement executed in a transaction which is rolled back."""
+
+    async with async_engine.connect() as conn:
+        raw = (await conn.get_raw_connection()).driver_connection
+        transaction = raw.transaction()
+        await transaction.start()
+        try:
+            plans = await raw.fetchval(
+                f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", *parameters
+            )
+        finally:
+            await transaction.rollback()
+    # JSON is decoded by the codec SQLAlchemy sets up on the connection
+    return plans[0]
+
+
+def plan_nodes(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def buffers(node: dict) -> int:
+    return node["Shared Hit Blocks"] + node["Shared Read Blocks"]
+
+
+def plan_problems(plan: dict) -> list[str]:
+    """Returns sequential scans of large tables and excess of the buffer budget."""
+
+    problems = [
+        f"Seq Scan on {node['Relation Name']}"
+        for node in plan_nodes(plan["Plan"])
+        if node["Node Type"] == "Seq Scan" and buffers(node) >= SEQ_SCAN_PAGES
+    ]
+    if buffers(plan["Plan"]) > BUFFER_BUDGET:
+        problems.append(
+            f"{buffers(plan['Plan'])} buffers over budget of {BUFFER_BUDGET}"
+        )
+    return problems
+
+
+def endpoint_calls(
+    client: AsyncClient, data: dict
+) -> list[tuple[str, Callable[[], Awaitable]]]:
+    """Returns requests issuing the statements of every note and board endpoint."""
+
+    board_id, other_board_id = data["board_ids"][:2]
+    note_id, *note_ids = data["note_ids"]
+    url = app.url_path_for
+
+    return [
+        (
+            "create_new_note",
+            lambda: client.post(url("create_new_note"), json={"text": "x"}),
+        ),
+        (
+            "create_new_notes",
+            lambda: client.post(url("create_new_notes"), json=[{"text": "x"}] * 3),
+        ),
+        ("list_notes", lambda: client.get(url("list_notes"))),
+        (
+            "list_notes by board",
+            lambda: client.get(url("list_notes"), params={"board_id": board_id}),
+        ),
+        (
+            "list_notes by updated_at",
+            lambda: client.get(url("list_notes"), params={"order_by": "updated_at"}),
+        ),
+        (
+            "list_notes by board and updated_at",
+            lambda: client.get(
+                url("list_notes"),
+                params={"board_id": board_id, "order_by": "updated_at"},
+            ),
+        ),
+        (
+            "search_notes",
+            lambda: client.get(url("search_notes"), params={"q": data["word"]}),
+        ),
+        (
+            "batch_get_notes",
+            lambda: client.post(
+                url("batch_get_notes"),
+                json={"ids": [*note_ids[:10], data["archived_id"]]},
+            ),
+        ),
+        ("get_note", lambda: client.get(url("get_note", note_id=note_id))),
+        (
+            "get_note archived",
+            lambda: client.get(url("get_note", note_id=data["archived_id"])),
+        ),
+        (
+            "update_note",
+            lambda: client.patch(
+                url("update_note", note_id=note_id),
+                json={"text": "Edited"},
+                headers={"If-Match": f'W/"note-{note_id}-1"'},
+            ),
+        ),
+        (
+            "delete_note",
+            lambda: client.delete(url("delete_note", note_id=note_ids[-1])),
+        ),
+        (
+            "create_new_board",
+            lambda: client.post(url("create_new_board"), json={"name": "x"}),
+        ),
+        ("list_boards", lambda: client.get(url("list_boards"))),
+        (
+            "batch_get_boards",
+            lambda: client.post(
+                url("batch_get_boards"), json={"ids": data["board_ids"][:10]}
+            ),
+        ),
+        ("get_board", lambda: client.get(url("get_board", board_id=board_id))),
+        (
+            "stream_board_notes",
+            lambda: client.get(url("stream_board_notes", board_id=board_id)),
+        ),
+        (
+            "update_board",
+            lambda: client.patch(
+                url("update_board", board_id=board_id), json={"name": "x"}
+            ),
+        ),
+        (
+            "link_note_to_board",
+            lambda: client.post(
+                url("link_note_to_board", board_id=other_board_id, note_id=note_id)
+            ),
+        ),
+        (
+            "unlink_note_from_board",
+            lambda: client.post(
+                url(
+                    "unlink_note_from_board",
+                    board_id=other_board_id,
+                    note_id=note_id,
+                )
+            ),
+        ),
+        (
+            "link_notes_to_board",
+            lambda: client.post(
+                url("link_notes_to_board", board_id=other_board_id),
+                json={"note_ids": note_ids[:10]},
+            ),
+        ),
+        (
+            "unlink_notes_from_board",
+            lambda: client.post(
+                url("unlink_notes_from_board", board_id=other_board_id),
+                json={"note_ids": note_ids[:10]},
+            ),
+        ),
+        (
+            "delete_board",
+            lambda: client.delete(url("delete_board", board_id=data["board_ids"][-1])),
+        ),
+        ("delete_board job", lambda: job_queue.run_pending()),
+        ("view flush", lambda: view_counter.flush()),
+        ("leaderboard refresh", lambda: leaderboard.refresh()),
+    ]
+
+
+async def test_endpoint_plans(client: AsyncClient, dataset: dict):
+    problems = []
+    for name, call in endpoint_calls(client, dataset):
+        with captured_statements() as statements:
+            await call()
+        assert statements, f"{name} issued no statements"
+        for statement, parameters in statements:
+            if not statement.lstrip().startswith(EXPLAINABLE):
+                continue
+            plan = await explain(statement, parameters)
+            problems.extend(
+                f"{name}: {problem} in {statement}" for problem in plan_problems(plan)
+            )
+    assert not problems, "\n".join(problems)
@@ -0,0 +1,146 @@
+from collections.abc import AsyncGenerator, Generator
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import insert, make_url, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+import config
+from database import Replica, create_engine, router
+from main import app
+from src.cache import cache
+from src.notes.cache import board_key, drop, invalidate
+from src.notes.models import Base, Board, Note
+
+# Rows are written to the replica database only, so that reads tell apart
+# which database served them
+REPLICA_BOARD_ID = 2_000_000_000
+
+
+@pytest_asyncio.fixture(scope="module")
+async def replica_engine() -> AsyncGenerator[AsyncEngine, None]:
+    uri = make_url(config.settings.TEST_SQLALCHEMY_REPLICA_URI)
+    server = create_async_engine(
+        uri.set(database="postgres"), isolation_level="AUTOCOMMIT"
+    )
+    async with server.connect() as conn:
+        exists = await conn.scalar(
+            text("SELECT 1 FROM pg_database WHERE datname = :name"),
+            {"name": uri.database},
+        )
+        if not exists:
+            await conn.execute(text(f'CREATE DATABASE "{uri.database}"'))
+    await server.dispose()
+
+    engine = create_engine(config.settings.TEST_SQLALCHEMY_REPLICA_URI)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(Board).values(id=REPLICA_BOARD_ID, name="Test replica board")
+        )
+        await conn.execute(
+            insert(Note).values(text="Test replica note", board_id=REPLICA_BOARD_ID)
+        )
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def replica(
+    monkeypatch: pytest.MonkeyPatch, client: AsyncClient, replica_engine: AsyncEngine
+) -> Generator[Replica, None, None]:
+    replica = Replica(replica_engine)
+    monkeypatch.setattr(router, "replicas", [replica])
+    yield replica
+    client.cookies.clear()
+
+
+async def list_replica_board_notes(client: AsyncClient) -> list:
+    response = await client.get(
+        app.url_path_for("list_notes"), params={"board_id": REPLICA_BOARD_ID}
+    )
+    return response.json()["items"]
+
+
+async def test_reads_go_to_replica(client: AsyncClient, replica: Replica):
+    response = await client.get(
+        app.url_path_for("get_board", board_id=REPLICA_BOARD_ID)
+    )
+    assert response.status_code == 200
+    assert [note["text"] for note in response.json()["notes"]] == ["Test replica note"]
+    assert len(await list_replica_board_notes(client)) == 1
+
+    response = await client.patch(
+        app.url_path_for("update_board", board_id=REPLICA_BOARD_ID),
+        json={"name": "Written to the primary"},
+    )
+    assert response.status_code == 404
+
+
+async def test_reads_after_own_write_go_to_primary(
+    client: AsyncClient, replica: Replica
+):
+    response = await client.post(
+        app.url_path_for("create_new_board"), json={"name": "Test sticky board"}
+    )
+    assert response.cookies["read_primary"]
+    board_id = response.json()["id"]
+
+    response = await client.get(app.url_path_for("get_board", board_id=board_id))
+    assert response.status_code == 200
+    assert await list_replica_board_notes(client) == []
+
+    client.cookies.clear()
+    assert len(await list_replica_board_notes(client)) == 1
+
+
+async def test_replica_reads_are_not_cached_right_after_invalidation(
+    monkeypatch: pytest.MonkeyPatch, client: AsyncClient, replica: Replica
+):
+    url = app.url_path_for("get_board", board_id=REPLICA_BOARD_ID)
+    await invalidate(board_ids=[REPLICA_BOARD_ID])
+    assert (await client.get(url)).status_code == 200
+    assert await cache.get(board_key(REPLICA_BOARD_ID)) is None
+
+    monkeypatch.setattr(config.settings, "READ_YOUR_WRITES_WINDOW", 0)
+    assert (await client.get(url)).status_code == 200
+    assert await cache.get(board_key(REPLICA_BOARD_ID)) is not None
+    await invalidate(board_ids=[REPLICA_BOARD_ID])
+
+
+async def test_replica_reads_are_not_cached_after_invalidation_of_other_process(
+    client: AsyncClient, replica: Replica
+):
+    url = app.url_path_for("get_board", board_id=REPLICA_BOARD_ID)
+    # As received from the other processes over NOTIFY
+    await drop([board_key(REPLICA_BOARD_ID)])
+    assert (await client.get(url)).status_code == 200
+    assert await cache.get(board_key(REPLICA_BOARD_ID)) is None
+
+    await drop(None)
+    assert (await client.get(url)).status_code == 200
+    assert await cache.get(board_key(REPLICA_BOARD_ID)) is None
+
+
+async def test_reads_fail_over_to_primary(client: AsyncClient, replica: Replica):
+    await router.check()
+    assert replica.healthy
+
+    unreachable = Replica(
+        create_engine(
+            make_url(config.settings.TEST_SQLALCHEMY_REPLICA_URI)
+            .set(port=1)
+            .render_as_string(hide_password=False)
+        )
+    )
+    router.replicas.append(unreachable)
+    await router.check()
+    assert replica.healthy and not unreachable.healthy
+
+    replica.healthy = False
+    assert await list_replica_board_notes(client) == []
+    async with router.read_session() as session:
+        assert await session.scalar(select(Board.id).limit(1)) != REPLICA_BOARD_ID
+    await unreachable.engine.dispose()
@@ -0,0 +1,67 @@
+import asyncio
+
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from main import app
+from src.admission import admission
+from src.notes.cache import single_flight
+from src.notes.models import Board, Note
+from src.single_flight import SingleFlight
+
+
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def read() -> object:
+        started.set()
+        await release.wait()
+        return object()
+
+    callers = [asyncio.create_task(flight.do("key", read)) for _ in range(10)]
+    await started.wait()
+    callers[0].cancel()
+    release.set()
+    results = await asyncio.gather(*callers[1:])
+
+    assert len(set(map(id, results))) == 1
+    assert (flight.calls, flight.executions, flight.in_flight) == (10, 1, 0)
+    assert flight.coalescing_ratio == 0.9
+
+
+async def test_forgotten_call_is_not_joined():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def read() -> object:
+        await release.wait()
+        return object()
+
+    first = asyncio.create_task(flight.do("key", read))
+    await asyncio.sleep(0)
+    flight.forget("key")
+    second = asyncio.create_task(flight.do("key", read))
+    release.set()
+
+    assert await first is not await second
+    assert flight.executions == 2
+
+
+async def test_concurrent_board_reads_are_coalesced(
+    client: AsyncClient, session: AsyncSession
+):
+    board = Board(name="Test coalesced board")
+    session.add_all([board, Note(text="Test coalesced note", board=board)])
+    await session.commit()
+
+    executions = single_flight.executions
+    url = app.url_path_for("get_board", board_id=board.id)
+    # As many as admission lets run at once, as queued ones read after the flight
+    readers = admission.route_limit
+    responses = await asyncio.gather(*(client.get(url) for _ in range(readers)))
+
+    assert single_flight.executions == executions + 1
+    assert {response.content for response in responses} == {responses[0].content}
+    assert responses[0].json()["notes"][0]["text"] == "Test coalesced note"